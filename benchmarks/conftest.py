@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+import json
+import logging
+import socket
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+# the benchmarks drive the agent with the events of the VTN simulator in utils/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+
+from openadr_ven.agent import OpenADRVenAgent
+
+
+class StubPubSub:
+    """Counts publishes instead of sending them, so that the benchmarks measure the agent and not the mock."""
+
+    def __init__(self) -> None:
+        self.published = 0
+        self.last_topic = None
+
+    def publish(self, peer, topic, headers=None, message=None):
+        self.published += 1
+        self.last_topic = topic
+
+    def subscribe(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def agent(tmp_path):
+    """An agent with an injected fake VEN client for 'ven0' and a stubbed pubsub.
+
+    The agent's log records are discarded below WARNING, so that the benchmarks do not measure the log handlers.
+    """
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps({
+            "ven_name": "ven0",
+            "vtn_url": "http://127.0.0.1:8080/OpenADR2/Simple/2.0b"
+        }))
+    ven_client = mock.Mock()
+    ven_client.get_ven_name.return_value = "ven0"
+    with mock.patch.object(OpenADRVenAgent, "vip", create=True), \
+            mock.patch.object(OpenADRVenAgent, "core", create=True):
+        agent = OpenADRVenAgent(str(config_path), fake_ven_client=ven_client)
+        agent.vip.pubsub = StubPubSub()
+        logger = logging.getLogger("openadr_ven")
+        level = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            yield agent
+        finally:
+            logger.setLevel(level)
+            agent.signal_scheduler.stop()
+
+
+@pytest.fixture
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
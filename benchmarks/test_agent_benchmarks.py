@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+import asyncio
+import itertools
+import tracemalloc
+
+import gevent
+import pytest
+
+from conftest import StubPubSub
+from volttron.utils import jsonapi
+from vtn_simulator import EventScenario, VTNSimulator
+
+from openadr_ven.volttron_openadr_client import VolttronOpenADRClient
+
+
+class SerializingPubSub(StubPubSub):
+
+    def publish(self, peer, topic, headers=None, message=None):
+        jsonapi.dumps({"headers": headers, "message": message})
+        super().publish(peer, topic, headers, message)
+
+
+def _handle(agent, ven_name, event):
+    # handle_event only awaits in the deferred opt response mode, so it runs to completion without an event loop,
+    # which would otherwise dominate the measurement
+    coroutine = agent.handle_event(event, ven_name=ven_name)
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("handle_event waited for an opt response")
+
+
+@pytest.mark.parametrize("intervals", [1, 24, 288])
+def test_event_latency(benchmark, agent, intervals):
+    """Time from the receipt of a modified event to its publish on the message bus."""
+    scenario = EventScenario(intervals=intervals, churn=1.0)
+    for ven_name, event in scenario.populate():
+        _handle(agent, ven_name, event)
+
+    modified = []
+
+    def modified_event():
+        ven_name, event = scenario.tick()[0]
+        modified.append(event)
+        return (agent, ven_name, event), {}
+
+    published = agent.vip.pubsub.published
+    benchmark.pedantic(_handle, setup=modified_event, rounds=200, warmup_rounds=5)
+    # the number of rounds depends on the benchmark options, e.g. a single one with --benchmark-disable
+    assert agent.vip.pubsub.published - published == len(modified) > 0
+
+
+@pytest.mark.parametrize("vens,events_per_ven", [(10, 10), (100, 5)])
+def test_event_throughput(benchmark, agent, vens, events_per_ven):
+    """Events handled per second while every event of every VEN is modified at once."""
+    scenario = EventScenario(vens, events_per_ven, intervals=24, churn=0.8, cancel=0.2)
+    for ven_name, event in scenario.populate():
+        _handle(agent, ven_name, event)
+
+    def handle_all(changed):
+        for ven_name, event in changed:
+            _handle(agent, ven_name, event)
+
+    changed_counts = []
+
+    def tick():
+        changed = scenario.tick()
+        changed_counts.append(len(changed))
+        return (changed, ), {}
+
+    benchmark.pedantic(handle_all, setup=tick, rounds=20)
+    # there are no stats with --benchmark-disable
+    if benchmark.stats is not None:
+        benchmark.extra_info["events_per_second"] = \
+            sum(changed_counts) / len(changed_counts) / benchmark.stats.stats.mean
+
+
+@pytest.mark.parametrize("publish_window", [None, 0.001])
+def test_burst_publish_throughput(benchmark, agent, publish_window):
+    """Events per second from the receipt of a burst of 100 single-interval events on the asyncio loop thread until
+    they are published on the gevent hub, one publish per event or coalesced into batches. Publishes are serialized as
+    the message bus does."""
+    agent.vip.pubsub = SerializingPubSub()
+    agent._configure_publish_queue({"publish_window": publish_window, "publish_event_topics": False})
+    agent._loop_thread.start()
+    seeds = itertools.count()
+
+    def burst():
+        return (EventScenario(events_per_ven=100, seed=next(seeds)).populate(), ), {}
+
+    async def handle_all(events):
+        await asyncio.gather(*(agent.handle_event(event, ven_name=ven_name) for ven_name, event in events))
+
+    def publish_all(events):
+        published = agent.vip.pubsub.published
+        agent._loop_thread.wait(handle_all(events))
+        # the events are published once the gevent hub has drained the dispatcher
+        while agent.publish_queue and len(agent.publish_queue) or agent._dispatcher._pending \
+                or agent._dispatcher._draining:
+            gevent.sleep(0.001)
+        return agent.vip.pubsub.published - published
+
+    try:
+        published = benchmark.pedantic(publish_all, setup=burst, rounds=20)
+    finally:
+        agent._loop_thread.stop()
+    assert published == (1 if publish_window else 100)
+    benchmark.extra_info["publishes_per_burst"] = published
+    if benchmark.stats is not None:
+        benchmark.extra_info["events_per_second"] = 100 / benchmark.stats.stats.mean
+
+
+def test_event_memory(benchmark, agent):
+    """Memory retained per event by the agent's indexes, for 10 VENs with 100 events of 24 intervals."""
+    scenario = EventScenario(vens=10, events_per_ven=100, intervals=24)
+    events = scenario.populate()
+
+    def handle_all():
+        tracemalloc.start()
+        try:
+            for ven_name, event in events:
+                _handle(agent, ven_name, event)
+            return tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    retained, peak = benchmark.pedantic(handle_all, rounds=1)
+    benchmark.extra_info["retained_bytes_per_event"] = retained / len(events)
+    benchmark.extra_info["peak_bytes"] = peak
+
+
+def test_end_to_end_first_poll(benchmark, agent, free_port):
+    """Time for 10 VENs to register with the VTN simulator and publish the 5 events of their first poll."""
+    vtn_url = f"http://127.0.0.1:{free_port}/OpenADR2/Simple/2.0b"
+
+    async def first_poll():
+        scenario = EventScenario(vens=10, events_per_ven=5, intervals=24)
+        simulator = VTNSimulator(scenario, port=free_port)
+        await simulator.run()
+        clients = []
+        try:
+            published = agent.vip.pubsub.published
+            for ven_name in scenario.ven_names:
+                client = VolttronOpenADRClient.build_client({
+                    "ven_name": ven_name,
+                    "vtn_url": vtn_url,
+                    "show_fingerprint": False
+                })
+                client.add_handler("on_event", lambda event, ven_name=ven_name: agent.handle_event(event, ven_name))
+                clients.append(client)
+            await asyncio.gather(*(client.run() for client in clients))
+            return agent.vip.pubsub.published - published
+        finally:
+            for client in clients:
+                await client.stop()
+            await simulator.stop()
+
+    def run():
+        agent.event_indexes.clear()
+        agent.signal_indexes.clear()
+        return asyncio.run(first_poll())
+
+    assert benchmark.pedantic(run, rounds=3) == 10 * 5
@@ -21,36 +21,77 @@
 #
 # ===----------------------------------------------------------------------===
 
-from pathlib import Path
-from pprint import pformat
-from typing import Callable, Dict
+from collections import defaultdict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
 
 from volttron.client.messaging import (headers)
-from volttron.client.vip.agent import Agent
+from volttron.client.vip.agent import Agent, Core
 from volttron.client.vip.agent.subsystems.rpc import RPC
 from volttron.utils import (format_timestamp, get_aware_utc_now, load_config,
-                            setup_logging, vip_main)
-
-from openadr_ven.volttron_openadr_client import (
-    VolttronOpenADRClient,
-    OpenADRClientInterface,
-    OpenADREvent,
-    OpenADRReportName,
-    OpenADRMeasurements,
-    OpenADROpt,
-)
+                            parse_timestamp_string, setup_logging, vip_main)
+
+from openadr_ven.constants import (OPENADR_EVENT,
+                                   OPENADR_STATUS, RECONFIGURABLE_KEYS,
+                                   POOL_SIZE, KEEPALIVE_TIMEOUT,
+                                   DEFAULT_POOL_SIZE,
+                                   DEFAULT_KEEPALIVE_TIMEOUT, REPORTS,
+                                   REPORT_NAME, RESOURCE_ID, MEASUREMENT, UNIT,
+                                   TOPIC, POINT, MIN_SAMPLING_INTERVAL,
+                                   MAX_SAMPLING_INTERVAL, BUFFER_SIZE,
+                                   AGGREGATION, DEFAULT_AGGREGATION,
+                                   DEFAULT_REPORT_NAME,
+                                   DEFAULT_MIN_SAMPLING_INTERVAL,
+                                   DEFAULT_MAX_SAMPLING_INTERVAL,
+                                   LOG_EVENT_DETAILS, LOG_PAYLOAD_LIMIT,
+                                   DEFAULT_LOG_EVENT_DETAILS,
+                                   DEFAULT_LOG_PAYLOAD_LIMIT, EVENT_STORE,
+                                   DEFAULT_DELTA_SNAPSHOT_EVERY,
+                                   OPENADR_EVENT_DELTA, OPT_RULES, OPT_DEFAULT,
+                                   OPT_LATENCY_BUDGET, DEFAULT_OPT_DEFAULT,
+                                   DEFAULT_OPT_LATENCY_BUDGET, OPT_ACTIONS,
+                                   DEFER_OPT_RESPONSES, OPT_RESPONSE_TIMEOUT,
+                                   DEFAULT_OPT_RESPONSE_TIMEOUT,
+                                   CORRELATION_ID,
+                                   PUBLISH_WINDOW,
+                                   PUBLISH_QUEUE_SIZE, PUBLISH_EVENT_TOPICS,
+                                   DEFAULT_PUBLISH_QUEUE_SIZE,
+                                   OPENADR_EVENT_BATCH)
+from openadr_ven.config import VenConfig, parse_config, resolve_ven_configs
+from openadr_ven.decision import DecisionEngine
+from openadr_ven.event_delta import diff
+from openadr_ven.event_index import EventIndex
+from openadr_ven.event_store import EventStore
+from openadr_ven.event_sweeper import EventSweeper
+from openadr_ven.log_format import LazyFormat, PayloadLogger
+from openadr_ven.loop_thread import AsyncioLoopThread, GeventDispatcher
+from openadr_ven.metrics import VenMetrics, timed
+from openadr_ven.openadr_event import OpenADREvent
+from openadr_ven.opt_responses import PendingOptResponses
+from openadr_ven.publish_queue import PublishQueue
+from openadr_ven.reporting import TelemetryBuffer, parse_report_config
+from openadr_ven.signal_index import SignalIndex
+from openadr_ven.signal_scheduler import SignalScheduler
+
+import base64
+import importlib
+import logging
+import sys
+import threading
+import time
+import uuid
 
-from openadr_ven.constants import (REQUIRED_KEYS, VEN_NAME, VTN_URL, DEBUG,
-                                   CERT, KEY, PASSPHRASE, VTN_FINGERPRINT,
-                                   SHOW_FINGERPRINT, CA_FILE, VEN_ID,
-                                   DISABLE_SIGNATURE, OPENADR_EVENT)
+if TYPE_CHECKING:
+    from openleadr.objects import Event
 
-from openleadr.objects import Event
+    from openadr_ven.volttron_openadr_client import (OpenADRClientInterface, OpenADRMeasurements, OpenADROpt,
+                                                     OpenADRReportName)
 
-import logging
-import asyncio
-import sys
-import gevent
+# the openleadr client stack (openleadr, aiohttp, lxml, signxml) accounts for most of the agent's import time; it is
+# imported on first use, or in the background once the configuration has been parsed, see preload_client
+CLIENT_MODULE = "openadr_ven.volttron_openadr_client"
 
 setup_logging()
 _log = logging.getLogger(__name__)
@@ -69,14 +110,71 @@ class OpenADRVenAgent(Agent):
     """
 
     def __init__(self, config_path: str, **kwargs) -> None:
+        # the configuration is parsed first, so that an invalid configuration fails before the agent's core is set up
+        # and before the client stack is imported
+        self.default_config = self._parse_config(config_path)
+        preload_client()
+        # VEN clients keyed by ven_name; a configuration may list many VEN identities that all share one event loop
+        self.ven_clients: Dict[str, "OpenADRClientInterface"] = {}
         # adding 'fake_ven_client' to support dependency injection and preventing call to super class for unit testing
-        self.ven_client: OpenADRClientInterface
         if kwargs.get("fake_ven_client"):
-            self.ven_client = kwargs["fake_ven_client"]
+            fake_ven_client = kwargs["fake_ven_client"]
+            self.ven_clients[fake_ven_client.get_ven_name()] = fake_ven_client
         else:
             super(OpenADRVenAgent, self).__init__(enable_web=True, **kwargs)
 
-        self.default_config = self._parse_config(config_path)
+        # the events that were published, to skip unchanged copies; only used on the asyncio loop thread, where
+        # handle_event runs
+        self.event_indexes: Dict[str, EventIndex] = defaultdict(EventIndex)
+        # events and their signal intervals by time, for the event query RPCs; only updated on the gevent hub
+        self.signal_indexes: Dict[str, SignalIndex] = defaultdict(SignalIndex)
+        # publishes the signal intervals of all VENs' events when they start and end, from a single core timer
+        self.signal_scheduler = SignalScheduler(self._publish_transition, self._schedule)
+        # publishes the status of all VENs' events when they start, end or are cancelled, and evicts events from the
+        # indexes above once they have ended, from a single core timer; the only timer that expires events
+        self.event_sweeper = EventSweeper(self._publish_transition, self._schedule, self._evict_event)
+        # in delta mode, modified events are published as patches; counts the patches per (ven_name, event_id) since
+        # the event was last published in full
+        self._publish_deltas = False
+        self._delta_snapshot_every = DEFAULT_DELTA_SNAPSHOT_EVERY
+        self._deltas_since_snapshot: Dict[Tuple[str, str], int] = {}
+        # with a publish window, received events are coalesced into one publish per VEN on the aggregate topic; the
+        # publish messages of the batch that is being recorded are collected per ven_name
+        self.publish_queue = None
+        self._publish_event_topics = True
+        self._event_batch: Optional[Dict[str, List[Dict]]] = None
+        self._ven_states: Dict[str, str] = {}
+        # the configuration each running client was built from, and the future of its run() coroutine
+        self._ven_configs: Dict[str, Dict] = {}
+        self._ven_client_futures: Dict[str, Future] = {}
+        # durable copy of the received events, opened from the 'event_store' configuration
+        self._event_store = None
+
+        # the openleadr clients run on one asyncio loop in a dedicated thread; results that must be handled by
+        # the agent, e.g. publishing to the message bus, are handed back to the gevent hub through the dispatcher
+        self._dispatcher = GeventDispatcher()
+        self._loop_thread = AsyncioLoopThread(self._dispatcher)
+        # keep-alive connections and SSL contexts shared by all VEN clients; created from the first configuration
+        self._connection_pool = None
+        # device points that back the configured reports, and the device topics subscribed to for them with the names
+        # of the VENs that use them
+        self.telemetry = TelemetryBuffer()
+        self._device_topics: Dict[str, Set[str]] = {}
+        # decides whether each VEN opts in to or out of its events, keyed by ven_name
+        self.decision_engines: Dict[str, DecisionEngine] = {}
+        # how long each VEN that defers its opt decisions waits for a response, keyed by ven_name, and the events that
+        # are waiting for one
+        self._opt_response_timeouts: Dict[str, float] = {}
+        self.opt_responses = PendingOptResponses()
+        # latencies and counts of the VEN's hot paths, served on the '/<identity>/metrics' web endpoint
+        self.metrics = VenMetrics()
+        # reports added through add_report_capability, keyed by ven_name; they are offered again whenever the VEN's
+        # client is rebuilt
+        self._report_capabilities: Dict[str, List[Dict]] = defaultdict(list)
+
+        # logs the payloads of received and published events; can be turned off at runtime through set_event_logging
+        self._event_log = PayloadLogger(_log)
+        self._log_settings = None
 
         # SubSystem/ConfigStore
         self.vip.config.set_default("config", self.default_config)
@@ -86,119 +184,767 @@ class OpenADRVenAgent(Agent):
             pattern="config",
         )
 
+    @property
+    def ven_client(self) -> "OpenADRClientInterface":
+        """The client of the first configured VEN."""
+        return self.ven_clients[self._default_ven_name()]
+
     def _configure_ven_client(self, config_name: str, action: str,
                               contents: Dict) -> None:
-        """Initializes the agent's configuration, creates and starts VolttronOpenADRClient.
+        """Initializes the agent's configuration, creates and starts a VolttronOpenADRClient for every configured VEN.
+
+        On an update, VENs that are no longer configured are stopped, new VENs are started and VENs whose
+        configuration changed are reconfigured; see _configure_single_ven_client. The configuration is validated before
+        anything is changed, so an invalid configuration is logged and leaves the running VENs as they are.
 
         :param config_name:
         :param action: the action
         :param contents: the configuration used to update the agent's configuration
         """
-        config = self.default_config.copy()
-        config.update(contents)
-
         _log.info(f"config_name: {config_name}, action: {action}")
-        _log.info(f"Configuring VEN client with: \n {pformat(config)} ")
+        contents = {**self.default_config, **contents}
+        try:
+            config = VenConfig.from_dict(contents, check_required=False)
+            ven_configs = resolve_ven_configs(contents)
+        except Exception as e:
+            _log.error(f"Ignoring the invalid configuration {config_name}: {e}")
+            return
+
+        self._configure_event_logging(config)
+        self._publish_deltas = config.publish_deltas
+        self._delta_snapshot_every = config.delta_snapshot_every
+        self._configure_publish_queue(config)
+
+        for ven_name in list(self.ven_clients):
+            if ven_name not in ven_configs:
+                _log.info(f"VEN {ven_name} is no longer configured; stopping it.")
+                self._remove_ven_client(ven_name)
+
+        if not self._loop_thread.is_running():
+            self._loop_thread.start()
+        self._configure_event_store(config, ven_configs)
+        self._configure_connection_pool(config)
+        for position, (ven_name, ven_config) in enumerate(ven_configs.items()):
+            # with adaptive polling, the VENs take turns polling: the first polls are spread over one poll interval
+            self._configure_single_ven_client(ven_name, ven_config, poll_phase=position / len(ven_configs))
+
+    def _configure_single_ven_client(self, ven_name: str, config: Dict, poll_phase: float = 0.0) -> None:
+        """Creates and starts the client of one VEN.
+
+        If the VEN is already running, its new configuration is compared with the one its client was built from. If
+        only keys in RECONFIGURABLE_KEYS changed, the running client is updated in place; otherwise the running client
+        is stopped before a new one is started.
+
+        :param ven_name: The name of the VEN
+        :param config: The configuration of the VEN
+        :param poll_phase: The offset of the VEN's first adaptive poll, as a fraction of the poll interval
+        """
+        current = self._ven_configs.get(ven_name)
+        if current is not None:
+            changed = {
+                key
+                for key in config.keys() | current.keys()
+                if config.get(key) != current.get(key)
+            }
+            if not changed:
+                _log.info(f"Configuration of VEN {ven_name} has not changed; keeping the running VEN client.")
+                return
+            if changed.issubset(RECONFIGURABLE_KEYS):
+                _log.info(f"Updating the running client of VEN {ven_name} with: {sorted(changed)}")
+                self._loop_thread.call(self.ven_clients[ven_name].update_settings, config)
+                self._configure_decision_engine(ven_name, config)
+                self._ven_configs[ven_name] = config
+                self.metrics.reconfigurations.labels(ven_name, "updated").inc()
+                return
+            _log.info(f"Restarting the client of VEN {ven_name} because these keys changed: {sorted(changed)}")
+            self._stop_ven_client(ven_name)
+            self.metrics.reconfigurations.labels(ven_name, "restarted").inc()
+        else:
+            self.metrics.reconfigurations.labels(ven_name, "new").inc()
+
+        _log.info("Configuring VEN client with: \n %s", LazyFormat(config.to_dict, self._event_log.payload_limit))
+
+        from openadr_ven.volttron_openadr_client import VolttronOpenADRClient
 
-        self.ven_client = VolttronOpenADRClient.build_client(config)
+        # build the client on the loop thread so that any asyncio primitives it creates belong to that loop
+        ven_client = self._loop_thread.call(
+            partial(VolttronOpenADRClient.build_client, config, connection_pool=self._connection_pool,
+                    metrics=self.metrics, poll_phase=poll_phase))
+        self.ven_clients[ven_name] = ven_client
+        self._ven_configs[ven_name] = config
+        self._configure_decision_engine(ven_name, config)
 
         # Add event handling capability to the client
         # if you want to add more handlers on a specific event, you must create a coroutine in this class
-        # and then add it as the second input for 'self.ven_client.add_handler(<some event>, <coroutine>)'
-        self.ven_client.add_handler("on_event", self.handle_event)
+        # and then add it as the second input for 'ven_client.add_handler(<some event>, <coroutine>)'
+        ven_client.add_handler("on_event", partial(self.handle_event, ven_name=ven_name))
+        ven_client.add_handler("on_update_event", partial(self.handle_event, ven_name=ven_name))
+        ven_client.set_state_listener(
+            partial(self._dispatcher.dispatch, partial(self._set_ven_state, ven_name)))
+        self._set_ven_state(ven_name, ven_client.get_state())
+        # reports must be added before the client registers with the VTN
+        for report in config.get(REPORTS) or []:
+            self._add_report(ven_name, parse_report_config(report))
+        for report in self._report_capabilities[ven_name]:
+            self._add_report(ven_name, report)
+
+        # config store callbacks are only delivered once the agent's core has started, so the client can start
+        # registering with the VTN right away
+        _log.info(f"Starting VEN client {ven_name}...")
+        self._start_ven_client(ven_name)
+
+    def _configure_decision_engine(self, ven_name: str, config: Dict) -> None:
+        """Compiles the opt rules of a VEN, subscribes to the topics of their headroom points and sets whether the
+        VEN defers its opt decisions to other agents."""
+        engine = DecisionEngine(config.get(OPT_RULES),
+                                config.get(OPT_DEFAULT) or DEFAULT_OPT_DEFAULT,
+                                float(config.get(OPT_LATENCY_BUDGET, DEFAULT_OPT_LATENCY_BUDGET)),
+                                self.telemetry)
+        for topic in engine.topics:
+            self._subscribe_device_topic(ven_name, topic)
+        self.decision_engines[ven_name] = engine
+        if config.get(DEFER_OPT_RESPONSES):
+            self._opt_response_timeouts[ven_name] = float(
+                config.get(OPT_RESPONSE_TIMEOUT, DEFAULT_OPT_RESPONSE_TIMEOUT))
+        else:
+            self._opt_response_timeouts.pop(ven_name, None)
+
+    def _configure_event_logging(self, config: Dict) -> None:
+        """Applies the event logging settings of the configuration if they changed, so that settings made through
+        set_event_logging are kept across updates of other keys."""
+        log_settings = (bool(config.get(LOG_EVENT_DETAILS, DEFAULT_LOG_EVENT_DETAILS)),
+                        int(config.get(LOG_PAYLOAD_LIMIT, DEFAULT_LOG_PAYLOAD_LIMIT)))
+        if log_settings != self._log_settings:
+            self._event_log.enabled, self._event_log.payload_limit = self._log_settings = log_settings
+
+    def _configure_publish_queue(self, config: Dict) -> None:
+        """Creates the publish queue from the agent's configuration, or removes it if 'publish_window' is not set.
+
+        Events that the previous queue still holds are handed on for publishing; puts that wait for room in it are
+        released once those events have been published.
+        """
+        self._publish_event_topics = bool(config.get(PUBLISH_EVENT_TOPICS, True))
+        window = config.get(PUBLISH_WINDOW)
+        max_depth = int(config.get(PUBLISH_QUEUE_SIZE, DEFAULT_PUBLISH_QUEUE_SIZE))
+        current = self.publish_queue
+        if current is not None:
+            if window and current.window == float(window) and current.max_depth == max_depth:
+                return
+            self._loop_thread.call(current.flush)
+        self.publish_queue = PublishQueue(self._flush_publish_queue, float(window), max_depth) if window else None
+
+    def _configure_event_store(self, config: Dict, ven_configs: Dict[str, Dict]) -> None:
+        """Opens the event store, replacing it if its path changed, and republishes the unexpired events it holds for
+        the configured VENs before their clients start."""
+        path = config.get(EVENT_STORE)
+        store = self._event_store
+        if store is not None:
+            if store.path == path:
+                return
+            store.close()
+            self._event_store = None
+        if not path:
+            return
+        started = time.perf_counter()
+        store = self._event_store = EventStore(path)
+        now = get_aware_utc_now()
+        store.delete_expired(now)
+        stored = [(ven_name, event) for ven_name, event in store.load_unexpired(now) if ven_name in ven_configs]
+        restored = self._loop_thread.call(self._index_events, stored)
+        for ven_name, event in restored:
+            self._record_event(event, ven_name)
+        _log.info(f"Restored {len(restored)} events from {path} in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+    def _index_events(self, events: List[Tuple[str, OpenADREvent]]) -> List[Tuple[str, OpenADREvent]]:
+        """Record events in the event indexes of their VENs; runs on the loop thread, like handle_event.
+
+        :return: The (ven_name, event) pairs of the events that were new or changed
+        """
+        return [(ven_name, event) for ven_name, event in events if self.event_indexes[ven_name].update(event)]
+
+    def _configure_connection_pool(self, config: Dict) -> None:
+        """Creates the connection pool shared by the VEN clients, replacing it if its settings changed.
+
+        Changing the pool settings changes the configuration of every VEN, so all clients are restarted on the new
+        pool; they are stopped here before the old pool is closed.
+        """
+        pool_size = config.get(POOL_SIZE) or DEFAULT_POOL_SIZE
+        keepalive_timeout = config.get(KEEPALIVE_TIMEOUT) or DEFAULT_KEEPALIVE_TIMEOUT
+        pool = self._connection_pool
+        if pool is not None:
+            if (pool.pool_size, pool.keepalive_timeout) == (pool_size, keepalive_timeout):
+                return
+            for ven_name in list(self._ven_client_futures):
+                self._stop_ven_client(ven_name)
+            self._loop_thread.wait(pool.close())
+        from openadr_ven.connection_pool import ConnectionPool
+
+        # SSL contexts and certificates are kept across pools, so that only the connections are opened again
+        self._connection_pool = ConnectionPool(pool_size=pool_size, keepalive_timeout=keepalive_timeout,
+                                               tls_cache=pool.tls_cache if pool is not None else None)
+
+    def _add_report(self, ven_name: str, report: Dict) -> tuple:
+        """Offers a report that is answered from the publishes of a device point.
+
+        Reports with an aggregation read a running aggregate of the samples received since the last reading; other
+        reports return the buffered samples of the whole reporting window.
+
+        :return: A tuple consisting of the report_specifier_id and the r_id of the report
+        """
+        ven_client = self.ven_clients[ven_name]
+        topic, point = report[TOPIC], report[POINT]
+        if report[AGGREGATION]:
+            add_report = ven_client.add_report
+            aggregate = self.telemetry.add_aggregate(topic, point, report[AGGREGATION],
+                                                     key=(ven_name, report[REPORT_NAME], report[RESOURCE_ID]))
+            callback = aggregate.report
+        else:
+            add_report = ven_client.add_telemetry_report
+            self.telemetry.add_series(topic, point, report[BUFFER_SIZE])
+            callback = partial(self.telemetry.samples, topic, point)
+        callback = timed(self.metrics.report_callback_seconds.labels(ven_name, report[RESOURCE_ID]), callback)
+        self._subscribe_device_topic(ven_name, topic)
+        report_specifier_id, r_id = self._loop_thread.call(
+            partial(
+                add_report,
+                callback=callback,
+                report_name=report[REPORT_NAME],
+                resource_id=report[RESOURCE_ID],
+                measurement=report[MEASUREMENT],
+                unit=report[UNIT],
+                min_sampling_interval=timedelta(seconds=report[MIN_SAMPLING_INTERVAL]),
+                max_sampling_interval=timedelta(seconds=report[MAX_SAMPLING_INTERVAL]),
+            ))
+        _log.info(f"Reporting {topic}/{point} as {report[RESOURCE_ID]}: "
+                  f"report_specifier_id: {report_specifier_id}, r_id: {r_id}")
+        return report_specifier_id, r_id
+
+    def _subscribe_device_topic(self, ven_name: str, topic: str) -> None:
+        if topic not in self._device_topics:
+            self.vip.pubsub.subscribe(peer="pubsub", prefix=topic, callback=self._on_device_publish)
+            self._device_topics[topic] = set()
+        self._device_topics[topic].add(ven_name)
+
+    def _unsubscribe_device_topics(self, ven_name: str) -> None:
+        """Unsubscribes from the device topics that no other VEN uses anymore and drops their buffered points."""
+        for topic, ven_names in list(self._device_topics.items()):
+            ven_names.discard(ven_name)
+            if ven_names:
+                continue
+            del self._device_topics[topic]
+            self.vip.pubsub.unsubscribe(peer="pubsub", prefix=topic, callback=self._on_device_publish)
+            self.telemetry.remove_topic(topic)
+
+    def _on_device_publish(self, peer, sender, bus, topic, headers_, message) -> None:
+        timestamp = headers_.get(headers.TIMESTAMP)
+        timestamp = parse_timestamp_string(timestamp) if timestamp else get_aware_utc_now()
+        self.telemetry.record(topic, message, timestamp)
+
+    def _start_ven_client(self, ven_name: str) -> None:
+        future = self._loop_thread.submit(self.ven_clients[ven_name].run())
+        future.add_done_callback(partial(self._on_ven_client_done, ven_name))
+        self._ven_client_futures[ven_name] = future
+
+    def _stop_ven_client(self, ven_name: str) -> None:
+        """Stop a running VEN client: cancel its run() coroutine if it is still registering, then shut down its
+        scheduled polls and reports and close its HTTP session."""
+        future = self._ven_client_futures.pop(ven_name, None)
+        if future is None:
+            return
+        future.cancel()
+        try:
+            self._loop_thread.wait(self.ven_clients[ven_name].stop(), timeout=10)
+        except Exception as e:
+            _log.warning(f"VEN client {ven_name} did not stop cleanly: {e}")
+
+    def _remove_ven_client(self, ven_name: str) -> None:
+        self._stop_ven_client(ven_name)
+        self.ven_clients.pop(ven_name, None)
+        self._ven_configs.pop(ven_name, None)
+        self._ven_states.pop(ven_name, None)
+        self._loop_thread.call(self.event_indexes.pop, ven_name, None)
+        self.signal_indexes.pop(ven_name, None)
+        self.signal_scheduler.remove(ven_name)
+        self.event_sweeper.remove(ven_name)
+        self.decision_engines.pop(ven_name, None)
+        self._opt_response_timeouts.pop(ven_name, None)
+        for key in [key for key in self._deltas_since_snapshot if key[0] == ven_name]:
+            del self._deltas_since_snapshot[key]
+        self._report_capabilities.pop(ven_name, None)
+        self._unsubscribe_device_topics(ven_name)
+
+    def _set_ven_state(self, ven_name: str, state: str) -> None:
+        """Record the readiness state of a VEN client and publish it on the status topic."""
+        self._ven_states[ven_name] = state
+        _log.info(f"VEN client {ven_name} is {state}")
+        self.vip.pubsub.publish(
+            peer="pubsub",
+            topic=f"{OPENADR_STATUS}/{ven_name}",
+            headers={headers.TIMESTAMP: format_timestamp(get_aware_utc_now())},
+            message={
+                "ven_name": ven_name,
+                "state": state
+            },
+        )
+
+    def _on_ven_client_done(self, ven_name: str, future: Future) -> None:
+        if future.cancelled():
+            _log.debug(f"VEN client {ven_name} was cancelled before it finished starting.")
+        elif future.exception() is not None:
+            _log.error(f"VEN client {ven_name} stopped with an error: {future.exception()}")
+
+    @Core.receiver("onstart")
+    def onstart(self, sender, **kwargs) -> None:
+        try:
+            self.vip.web.register_endpoint(f"/{self.core.identity}/metrics", self._serve_metrics, "raw")
+        except Exception as e:
+            _log.warning(f"Metrics are not served over HTTP because the web endpoint could not be registered: {e}")
+
+    def _serve_metrics(self, env: Dict, data) -> List:
+        """Answer a scrape of the metrics web endpoint in the Prometheus text exposition format."""
+        return ["200 OK",
+                base64.b64encode(self.metrics.render().encode("utf-8")).decode("ascii"),
+                [("Content-Type", "text/plain; version=0.0.4; charset=utf-8")]]
+
+    @Core.receiver("onstop")
+    def onstop(self, sender, **kwargs) -> None:
+        self.signal_scheduler.stop()
+        self.event_sweeper.stop()
+        for ven_name in list(self._ven_client_futures):
+            self._stop_ven_client(ven_name)
+        if self._connection_pool is not None and self._loop_thread.is_running():
+            self._loop_thread.wait(self._connection_pool.close())
+        self._loop_thread.stop()
+        self._dispatcher.close()
+        if self._event_store is not None:
+            self._event_store.close()
+            self._event_store = None
+
+    @RPC.export
+    def get_status(self, ven_name: str = None) -> Dict:
+        """Return the readiness state of a VEN client.
+
+        The state is one of 'configured', 'registering', 'registered', 'polling', 'failed' or 'stopped'; it is also
+        published on 'openadr/status/<ven_name>' whenever it changes.
+
+        :param ven_name: The name of the VEN; defaults to the first configured VEN
+        :return: A dict with the VEN name and its current state
+        """
+        ven_name = ven_name or self._default_ven_name()
+        if ven_name not in self._ven_states:
+            raise KeyError(f"Unknown VEN {ven_name}")
+        return {"ven_name": ven_name, "state": self._ven_states[ven_name]}
+
+    @RPC.export
+    def list_vens(self) -> List[Dict]:
+        """Return the readiness state of every configured VEN client.
+
+        :return: A list of dicts with the VEN name and its current state
+        """
+        return [{"ven_name": ven_name, "state": state} for ven_name, state in self._ven_states.items()]
+
+    @RPC.export
+    def get_connection_metrics(self) -> Dict:
+        """Return statistics of the connection pool shared by the VEN clients: the number of connections created and
+        reused, the number of TLS handshakes, the reuse ratio and the number of SSL contexts loaded. For the VENs that
+        verify the signatures of VTN messages, 'signature_cache' holds the hits, misses, hit rate and size of their
+        certificate cache by VEN name.
+
+        :return: A dict of connection statistics
+        """
+        metrics = self._connection_pool.get_metrics() if self._connection_pool is not None else {}
+        signature_caches = {ven_name: ven_client.get_signature_cache_stats()
+                            for ven_name, ven_client in self.ven_clients.items()}
+        signature_caches = {ven_name: stats for ven_name, stats in signature_caches.items() if stats is not None}
+        if signature_caches:
+            metrics["signature_cache"] = signature_caches
+        return metrics
+
+    @RPC.export
+    def get_metrics(self) -> Dict:
+        """Return a snapshot of the VEN's metrics: the count, sum and mean of the poll, registration, event publish,
+        parse_event and report callback latencies in seconds, and the counts of received events, failed polls and
+        reconfigurations. The same metrics are served for Prometheus on the '/<identity>/metrics' web endpoint.
+
+        :return: A dict keyed by metric name, then by the comma-separated label values, e.g. the VEN name
+        """
+        return self.metrics.snapshot()
+
+    @RPC.export
+    def get_active_events(self, ven_name: str = None) -> List[Dict]:
+        """Return the events that are active now and not cancelled.
+
+        :param ven_name: The name of the VEN; defaults to the first configured VEN
+        :return: The events as they are published on 'openadr/event/<event_id>/<ven_name>', oldest start first
+        """
+        return self.signal_indexes[ven_name or self._default_ven_name()].active_events(get_aware_utc_now())
+
+    @RPC.export
+    def get_events_between(self, start: str, end: str, ven_name: str = None) -> List[Dict]:
+        """Return the events whose active period overlaps a time window, including cancelled events.
+
+        :param start: The start of the time window, as an ISO 8601 timestamp; timestamps without a time zone are UTC
+        :param end: The end of the time window, as an ISO 8601 timestamp
+        :param ven_name: The name of the VEN; defaults to the first configured VEN
+        :return: The events as they are published on 'openadr/event/<event_id>/<ven_name>', oldest start first
+        """
+        return self.signal_indexes[ven_name or self._default_ven_name()].events_between(
+            _parse_time(start), _parse_time(end))
 
-        _log.info("Starting OpenADRVen agent...")
-        gevent.spawn_later(3, self._start_asyncio_loop)
+    @RPC.export
+    def get_signal_value_at(self, timestamp: str = None, signal_name: str = None, ven_name: str = None) -> List[Dict]:
+        """Return the values of the event signals at a point in time.
+
+        :param timestamp: The point in time, as an ISO 8601 timestamp; defaults to now
+        :param signal_name: Only return the values of this signal, e.g. 'simple' or 'ELECTRICITY_PRICE'
+        :param ven_name: The name of the VEN; defaults to the first configured VEN
+        :return: One dict per signal interval that contains the point in time, with the event_id, signal_name,
+            signal_type, signal_id, value, uid, dtstart and duration of the interval
+        """
+        timestamp = _parse_time(timestamp) if timestamp else get_aware_utc_now()
+        return self.signal_indexes[ven_name or self._default_ven_name()].signal_values_at(timestamp, signal_name)
+
+    @RPC.export
+    def get_decision_metrics(self, ven_name: str = None) -> Dict:
+        """Return statistics of a VEN's opt decisions: the number of decisions per outcome, how often the default
+        decided and the latency budget ran out, the slowest decision, and per rule the number of evaluations and
+        matches and the mean and slowest evaluation time.
 
-    def _start_asyncio_loop(self) -> None:
-        loop = asyncio.get_event_loop()
-        loop.create_task(self.ven_client.run())
-        loop.run_forever()
+        :param ven_name: The name of the VEN; defaults to the first configured VEN
+        :return: A dict of decision statistics
+        """
+        engine = self.decision_engines.get(ven_name or self._default_ven_name())
+        return engine.get_metrics() if engine is not None else {}
+
+    @RPC.export
+    def respond_to_event(self, event_id: str, opt: str, correlation_id: str = None, ven_name: str = None) -> bool:
+        """Respond to an event that waits for an opt decision.
+
+        With 'defer_opt_responses' set, new and changed events are published with a 'correlation_id' header and the
+        VEN waits up to 'opt_response_timeout' seconds for a response before the decision of its opt rules applies.
+
+        :param event_id: The event to respond to
+        :param opt: 'optIn' or 'optOut'
+        :param correlation_id: The correlation id of the publish to respond to; defaults to every publish of the event
+            that waits for a response
+        :param ven_name: The name of the VEN that received the event; defaults to any VEN
+        :return: Whether an event was waiting for the response
+        """
+        if opt not in OPT_ACTIONS:
+            raise ValueError(f"opt must be one of {OPT_ACTIONS}.")
+        responded = self.opt_responses.resolve(opt, correlation_id=correlation_id, ven_name=ven_name,
+                                               event_id=event_id)
+        if not responded:
+            _log.warning(f"Event {event_id} is not waiting for an opt response; ignoring {opt}.")
+        return bool(responded)
+
+    @RPC.export
+    def publish_event_snapshots(self, event_id: str = None, ven_name: str = None) -> int:
+        """Publish the current version of events in full on 'openadr/event/<event_id>/<ven_name>', e.g. for a
+        subscriber of the delta topic that starts after the events were received.
+
+        :param event_id: The event to publish; defaults to all events of the VEN that have not ended
+        :param ven_name: The name of the VEN; defaults to the first configured VEN
+        :return: The number of published events
+        """
+        ven_name = ven_name or self._default_ven_name()
+        events = [event for event in self.signal_indexes[ven_name].events()
+                  if event_id in (None, event.get_event_id())]
+        for event in events:
+            self.publish_event(event, ven_name)
+        return len(events)
+
+    @RPC.export
+    def set_event_logging(self, enabled: bool, payload_limit: int = None) -> Dict:
+        """Turn the logging of event payloads on or off without restarting the agent.
+
+        This method is remotely accessible by other agents through Volttron's feature Remote Procedure Call (RPC).
+
+        :param enabled: Whether the payloads of received and published events are logged
+        :param payload_limit: The number of characters logged per payload; 0 logs whole payloads. Unchanged if None
+        :return: The event logging settings
+        """
+        self._event_log.enabled = bool(enabled)
+        if payload_limit is not None:
+            self._event_log.payload_limit = int(payload_limit)
+        _log.info(f"Event payload logging is {'on' if self._event_log.enabled else 'off'}")
+        return {LOG_EVENT_DETAILS: self._event_log.enabled, LOG_PAYLOAD_LIMIT: self._event_log.payload_limit}
 
     # ***************** Methods for Servicing VTN Requests ********************
 
-    async def handle_event(self, event: Event) -> OpenADROpt:
+    async def handle_event(self, event: "Event", ven_name: str = None) -> "OpenADROpt":
         """Publish event to the Volttron message bus. This coroutine will be called when there is an event to be handled.
 
         :param event: The event sent from a VTN
-        :return: Message to VTN to opt in to the event.
+        :param ven_name: The name of the VEN that received the event; defaults to the first configured VEN
+        :return: Message to VTN to opt in to or out of the event, as decided by the VEN's opt rules or, if the VEN
+            defers its opt decisions, by the response of another agent; see respond_to_event
         """
+        from openadr_ven.volttron_openadr_client import OpenADROpt
+
+        received = time.perf_counter()
+        ven_name = ven_name or self._default_ven_name()
         openadr_event = OpenADREvent(event)
-        try:
-            _log.info(
-                f"Received event. Processing event now...\n Event signal:\n {pformat(openadr_event.get_event_signals())}"
-            )
-        except IndexError as e:
+        engine = self.decision_engines.get(ven_name)
+        opt = engine.decide(openadr_event) if engine is not None else OpenADROpt.OPT_IN
+        if not self.event_indexes[ven_name].update(openadr_event):
             _log.debug(
-                f"Event signals is empty. {e} \n Showing whole event: {pformat(openadr_event)}"
+                f"Event {openadr_event.get_event_id()} has not changed since it was last published; skipping."
             )
-            pass
+            return opt
+        self.metrics.events_received.labels(ven_name).inc()
+        if self._event_store is not None:
+            self._event_store.save(ven_name, openadr_event)
+
+        self._event_log.detail(logging.INFO, "Received event %s for VEN %s. Event signals:",
+                               openadr_event.signal_payloads, openadr_event.get_event_id(),
+                               ven_name)
+
+        correlation_id = None
+        timeout = self._opt_response_timeouts.get(ven_name)
+        if timeout is not None and not self._is_test_event(openadr_event):
+            correlation_id = uuid.uuid4().hex
+            self.opt_responses.add(correlation_id, ven_name, openadr_event.get_event_id())
+
+        # this coroutine runs on the asyncio loop thread; publishing has to happen on the gevent hub
+        if self.publish_queue is not None:
+            await self.publish_queue.put((openadr_event, ven_name, correlation_id, received))
+        else:
+            self._dispatcher.dispatch(self._record_event, openadr_event, ven_name, correlation_id, received)
+
+        if correlation_id is not None:
+            # openleadr handles the events of a message concurrently, see VolttronOpenADRClient, so other events do
+            # not wait for this response
+            opt = await self.opt_responses.wait(correlation_id, opt, timeout)
+        _log.info("Responding %s to event %s of VEN %s", opt, openadr_event.get_event_id(), ven_name)
+        return opt
 
-        self.publish_event(openadr_event)
+    def _flush_publish_queue(self, batch: List[Tuple], done: Callable[[], None]) -> None:
+        self._dispatcher.dispatch(self._record_events, batch, done)
 
-        return OpenADROpt.OPT_IN
+    def _record_events(self, batch: List[Tuple], done: Callable[[], None] = None) -> None:
+        """Records a batch of events coalesced by the publish queue, and publishes the messages of each VEN as one list
+        on 'openadr/batch/<ven_name>'. Each entry of the list holds the topic the message belongs to, the
+        message and, if the VEN waits for an opt response, the correlation_id.
+
+        :param batch: The (event, ven_name, correlation_id, received) tuples of the events, in the order received
+        :param done: Called once the batch has been published, to release its room in the publish queue
+        """
+        self._event_batch = defaultdict(list)
+        try:
+            for event, ven_name, correlation_id, received in batch:
+                try:
+                    self._record_event(event, ven_name, correlation_id, received)
+                except Exception as e:
+                    _log.exception(f"Error while recording event {event.get_event_id()} of VEN {ven_name}: {e}")
+            batches, self._event_batch = self._event_batch, None
+            event_headers = self._event_headers()
+            for ven_name, messages in batches.items():
+                self.vip.pubsub.publish(
+                    peer="pubsub",
+                    topic=f"{OPENADR_EVENT_BATCH}/{ven_name}",
+                    headers=event_headers,
+                    message=messages,
+                )
+        finally:
+            self._event_batch = None
+            if done is not None:
+                done()
+
+    def _record_event(self, event: OpenADREvent, ven_name: str, correlation_id: str = None,
+                      received: float = None) -> None:
+        """Indexes a new or changed event for the event query RPCs and publishes it, as a patch against its previous
+        version in delta mode.
+
+        :param received: The time.perf_counter() at which the event was received, if it came from the VTN
+        """
+        signal_index = self.signal_indexes[ven_name]
+        previous = signal_index.get(event.get_event_id())
+        signal_index.update(event)
+        if self._publish_deltas and previous is not None:
+            self.publish_event_delta(event, previous, ven_name, correlation_id)
+        else:
+            self.publish_event(event, ven_name, correlation_id)
+        if received is not None:
+            self.metrics.event_publish_seconds.labels(ven_name).observe(time.perf_counter() - received)
+        self.signal_scheduler.update(ven_name, event)
+        self.event_sweeper.update(ven_name, event)
+
+    def _evict_event(self, ven_name: str, event: OpenADREvent) -> None:
+        """Drop an event whose active period has ended from the indexes; see EventSweeper. Cancelled events are only
+        dropped then, so that the event query RPCs report them until their end."""
+        event_id = event.get_event_id()
+        signal_index = self.signal_indexes.get(ven_name)
+        if signal_index is not None:
+            signal_index.remove(event_id)
+        self._deltas_since_snapshot.pop((ven_name, event_id), None)
+        # the event index belongs to the loop thread; a version received in the meantime stays in it
+        self._loop_thread.call_soon(self._discard_indexed_event, ven_name, event)
+
+    def _discard_indexed_event(self, ven_name: str, event: OpenADREvent) -> None:
+        event_index = self.event_indexes.get(ven_name)
+        if event_index is not None:
+            event_index.discard(event.get_event_id(), event)
 
     @RPC.export
     def add_report_capability(
         self,
-        callback: Callable,
-        report_name: OpenADRReportName,
         resource_id: str,
-        measurement: OpenADRMeasurements,
+        measurement: "OpenADRMeasurements",
+        topic: str,
+        point: str = None,
+        aggregation: str = DEFAULT_AGGREGATION,
+        report_name: "OpenADRReportName" = DEFAULT_REPORT_NAME,
+        unit: str = None,
+        min_sampling_interval: float = DEFAULT_MIN_SAMPLING_INTERVAL,
+        max_sampling_interval: float = DEFAULT_MAX_SAMPLING_INTERVAL,
+        ven_name: str = None,
     ) -> tuple:
-        """Add a new reporting capability to the client.
+        """Add a new reporting capability to the client, whose values come from a device point on the message bus.
+
+        The VEN subscribes to the topic and keeps a running aggregate of the point's values; every time the VTN samples
+        the report, it reads the aggregate of the values received since the previous sample. The capability survives
+        reconfiguration of the VEN, but not a restart of the agent; reports that must always be offered belong in the
+        'reports' configuration.
 
         This method is remotely accessible by other agents through Volttron's feature Remote Procedure Call (RPC);
         for reference on RPC, see https://volttron.readthedocs.io/en/develop/platform-features/message-bus/vip/vip-json-rpc.html?highlight=remote%20procedure%20call
 
-        :param callback: A callback or coroutine that will fetch the value for a specific report. This callback will be passed the report_id and the r_id of the requested value.
-        :param report_name: An OpenADR name for this report
         :param resource_id: A specific name for this resource within this report.
         :param measurement: The quantity that is being measured
+        :param topic: The topic that the values are published on, e.g. 'devices/campus/building/meter1/all' or a single point topic such as 'devices/campus/building/meter1/Power'
+        :param point: The name of the point in an 'all' publish; defaults to the last segment of the topic
+        :param aggregation: How the values received between two samples are combined: 'last', 'mean', 'min', 'max' or 'sum'
+        :param report_name: An OpenADR name for this report
+        :param unit: The unit of the values
+        :param min_sampling_interval: The shortest sampling interval that the VEN offers, in seconds
+        :param max_sampling_interval: The longest sampling interval that the VEN offers, in seconds
+        :param ven_name: The name of the VEN that offers the report; defaults to the first configured VEN
         :return: Returns a tuple consisting of a report_specifier_id (str) and an r_id (str) an identifier for OpenADR messages
         """
-        report_specifier_id, r_id = self.ven_client.add_report(
-            callback=callback,
-            report_name=report_name,
-            resource_id=resource_id,
-            measurement=measurement,
-        )
-        _log.info(
-            f"Output from add_report: report_specifier_id: {report_specifier_id}, r_id: {r_id}"
-        )
+        ven_name = ven_name or self._default_ven_name()
+        topic = topic.rstrip("/")
+        report = parse_report_config({
+            REPORT_NAME: report_name,
+            RESOURCE_ID: resource_id,
+            MEASUREMENT: measurement,
+            UNIT: unit,
+            TOPIC: topic,
+            POINT: point or topic.rsplit("/", 1)[-1],
+            MIN_SAMPLING_INTERVAL: min_sampling_interval,
+            MAX_SAMPLING_INTERVAL: max_sampling_interval,
+            AGGREGATION: aggregation,
+        })
+        report_specifier_id, r_id = self._add_report(ven_name, report)
+        self._report_capabilities[ven_name].append(report)
         return report_specifier_id, r_id
 
     # ***************** VOLTTRON Pub/Sub Requests ********************
-    def publish_event(self, event: OpenADREvent) -> None:
+    def publish_event(self, event: OpenADREvent, ven_name: str = None, correlation_id: str = None) -> None:
         """Publish an event to the Volttron message bus. When an event is created/updated, it is published to the VOLTTRON bus with a topic that includes 'openadr/event_update'.
 
         :param event: The Event received from the VTN
+        :param ven_name: The name of the VEN that received the event; defaults to the first configured VEN
+        :param correlation_id: Set if the VEN waits for an opt response to the event; published as a header
         """
-        # OADR rule 6: If testEvent is present and != "false", handle the event as a test event.
-        try:
-            if event.isTestEvent():
-                _log.debug("Suppressing publication of test event")
+        if self._is_test_event(event):
+            return
+        ven_name = ven_name or self._default_ven_name()
+        self._deltas_since_snapshot.pop((ven_name, event.get_event_id()), None)
+        started = time.perf_counter()
+        message = event.parse_event()
+        self.metrics.parse_event_seconds.observe(time.perf_counter() - started)
+        self._event_log.detail(logging.DEBUG, "Publishing real/non-test event %s", message, event.get_event_id())
+        self._publish_event_message(f"{OPENADR_EVENT}/{event.get_event_id()}/{ven_name}", message, ven_name,
+                                    correlation_id)
+
+    def publish_event_delta(self, event: OpenADREvent, previous: OpenADREvent, ven_name: str,
+                            correlation_id: str = None) -> None:
+        """Publish a modified event as a JSON Patch against the version that was published before, on
+        'openadr/delta/<event_id>/<ven_name>'. Every 'delta_snapshot_every' patches, the event is published in
+        full instead, so that subscribers that missed a patch catch up.
+
+        The message holds the event_id, the modification_number of the event and of the version the patch applies
+        to, and the patch; see openadr_ven.event_delta.apply_patch.
+
+        :param event: The modified event
+        :param previous: The version of the event that was published before
+        :param ven_name: The name of the VEN that received the event
+        :param correlation_id: Set if the VEN waits for an opt response to the event; published as a header
+        """
+        key = (ven_name, event.get_event_id())
+        deltas = self._deltas_since_snapshot.get(key, 0)
+        if deltas >= self._delta_snapshot_every:
+            self.publish_event(event, ven_name, correlation_id)
+            return
+        if self._is_test_event(event):
+            return
+        patch = diff(previous.parse_event(), event.parse_event())
+        self._event_log.detail(logging.DEBUG, "Publishing patch of event %s", patch, event.get_event_id())
+        self._publish_event_message(f"{OPENADR_EVENT_DELTA}/{event.get_event_id()}/{ven_name}", {
+            "event_id": event.get_event_id(),
+            "modification_number": event.descriptor.get("modification_number"),
+            "base_modification_number": previous.descriptor.get("modification_number"),
+            "patch": patch,
+        }, ven_name, correlation_id)
+        self._deltas_since_snapshot[key] = deltas + 1
+
+    def _publish_event_message(self, topic: str, message: Dict, ven_name: str, correlation_id: str = None) -> None:
+        """Publish an event or a patch of an event on its own topic or, while a batch of events is being recorded, add
+        it to the VEN's batch and publish it on its own topic only if 'publish_event_topics' is set."""
+        if self._event_batch is not None:
+            entry = {"topic": topic, "message": message}
+            if correlation_id is not None:
+                entry[CORRELATION_ID] = correlation_id
+            self._event_batch[ven_name].append(entry)
+            if not self._publish_event_topics:
                 return
-        except KeyError as e:
-            _log.debug(f"Key error: {e}")
-            pass
-        _log.debug(
-            f"Publishing real/non-test event \n {pformat(event.parse_event())}"
+        self.vip.pubsub.publish(
+            peer="pubsub",
+            topic=topic,
+            headers=self._event_headers(correlation_id),
+            message=message,
         )
+
+    def _publish_transition(self, topic: str, message: Dict) -> None:
+        """Publish a start or end of a signal interval, or a change of an event's status; see SignalScheduler and
+        EventSweeper."""
         self.vip.pubsub.publish(
             peer="pubsub",
-            topic=
-            f"{OPENADR_EVENT}/{event.get_event_id()}/{self.ven_client.get_ven_name()}",
+            topic=topic,
             headers={headers.TIMESTAMP: format_timestamp(get_aware_utc_now())},
-            message=event.parse_event(),
+            message=message,
         )
 
-        return
-
     # ***************** Helper methods ********************
+    @staticmethod
+    def _event_headers(correlation_id: str = None) -> Dict:
+        event_headers = {headers.TIMESTAMP: format_timestamp(get_aware_utc_now())}
+        if correlation_id is not None:
+            event_headers[CORRELATION_ID] = correlation_id
+        return event_headers
+
+    @staticmethod
+    def _is_test_event(event: OpenADREvent) -> bool:
+        # OADR rule 6: If testEvent is present and != "false", handle the event as a test event.
+        try:
+            if event.isTestEvent():
+                _log.debug("Suppressing publication of test event")
+                return True
+        except KeyError as e:
+            _log.debug(f"Key error: {e}")
+        return False
+
+    def _schedule(self, deadline: datetime, callback: Callable[[], None]):
+        return self.core.schedule(deadline, callback)
+
     def _parse_config(self, config_path: str) -> Dict:
         """Parses the OpenADR agent's configuration file.
 
+        The configuration describes either a single VEN through its top-level keys, or many VENs through a 'vens'
+        list; in the latter case every entry of the list is a VEN configuration whose missing keys default to the
+        top-level keys.
+
         :param config_path: The path to the configuration file
         :return: The configuration
         """
@@ -213,60 +959,30 @@ class OpenADRVenAgent(Agent):
 
         if not config:
             raise Exception("Configuration cannot be empty.")
+        return parse_config(config)
 
-        req_keys_actual = {k: "" for k in REQUIRED_KEYS}
-        for required_key in REQUIRED_KEYS:
-            key_actual = config.get(required_key)
-            self._check_required_key(required_key, key_actual)
-            req_keys_actual[required_key] = key_actual
-
-        # optional configurations
-        cert = config.get(CERT)
-        if cert:
-            cert = str(Path(cert).expanduser().resolve(strict=True))
-        key = config.get(KEY)
-        if key:
-            key = str(Path(key).expanduser().resolve(strict=True))
-        ca_file = config.get(CA_FILE)
-        if ca_file:
-            ca_file = str(Path(ca_file).expanduser().resolve(strict=True))
-        debug = config.get(DEBUG)
-        ven_name = config.get(VEN_NAME)
-        vtn_url = config.get(VTN_URL)
-        passphrase = config.get(PASSPHRASE)
-        vtn_fingerprint = config.get(VTN_FINGERPRINT)
-        show_fingerprint = bool(config.get(SHOW_FINGERPRINT, True))
-        ven_id = config.get(VEN_ID)
-        disable_signature = bool(config.get(DISABLE_SIGNATURE))
-
-        return {
-            VEN_NAME: ven_name,
-            VTN_URL: vtn_url,
-            DEBUG: debug,
-            CERT: cert,
-            KEY: key,
-            PASSPHRASE: passphrase,
-            VTN_FINGERPRINT: vtn_fingerprint,
-            SHOW_FINGERPRINT: show_fingerprint,
-            CA_FILE: ca_file,
-            VEN_ID: ven_id,
-            DISABLE_SIGNATURE: disable_signature,
-        }
-
-    def _check_required_key(self, required_key: str, key_actual: str) -> None:
-        """Checks if the given key and its value are required by this agent
-
-        :param required_key: the key that is being checked
-        :param key_actual: the key value being checked
-        :raises KeyError:
-        """
-        if required_key == VEN_NAME and not key_actual:
-            raise KeyError(f"{VEN_NAME} is required.")
-        elif required_key == VTN_URL and not key_actual:
-            raise KeyError(
-                f"{VTN_URL} is required. Ensure {VTN_URL} is given a URL to the VTN."
-            )
-        return
+    def _default_ven_name(self) -> str:
+        if self.ven_clients:
+            return next(iter(self.ven_clients))
+        return next(iter(resolve_ven_configs(self.default_config)))
+
+
+def _parse_time(value) -> datetime:
+    if not isinstance(value, datetime):
+        value = parse_timestamp_string(value)
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def preload_client() -> threading.Thread:
+    """Imports the client stack on a background thread, so that it is loaded by the time the first VEN client is built
+    while the agent connects to the platform.
+
+    :return: The thread that imports the client stack
+    """
+    thread = threading.Thread(target=importlib.import_module, args=(CLIENT_MODULE,), name="openadr-ven-import",
+                              daemon=True)
+    thread.start()
+    return thread
 
 
 def main():
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+from openadr_ven.constants import (VEN_NAME, VTN_URL, DEBUG, CERT, KEY, PASSPHRASE, VTN_FINGERPRINT,
+                                   SIGNATURE_CACHE_SIZE, SHOW_FINGERPRINT, CA_FILE, VEN_ID, DISABLE_SIGNATURE,
+                                   POOL_SIZE, KEEPALIVE_TIMEOUT, REPORTS, LOG_EVENT_DETAILS, LOG_PAYLOAD_LIMIT,
+                                   EVENT_STORE, PUBLISH_DELTAS, DELTA_SNAPSHOT_EVERY, OPT_RULES, OPT_DEFAULT,
+                                   OPT_LATENCY_BUDGET, ADAPTIVE_POLLING, POLL_INTERVAL, ACTIVE_POLL_INTERVAL,
+                                   MAX_POLL_INTERVAL, POLL_JITTER, DEFER_OPT_RESPONSES, OPT_RESPONSE_TIMEOUT,
+                                   PUBLISH_WINDOW, PUBLISH_QUEUE_SIZE, PUBLISH_EVENT_TOPICS, REQUIRED_KEYS, VENS,
+                                   DEFAULT_SIGNATURE_CACHE_SIZE, DEFAULT_POOL_SIZE, DEFAULT_KEEPALIVE_TIMEOUT,
+                                   DEFAULT_LOG_EVENT_DETAILS, DEFAULT_LOG_PAYLOAD_LIMIT,
+                                   DEFAULT_DELTA_SNAPSHOT_EVERY, DEFAULT_OPT_DEFAULT, DEFAULT_OPT_LATENCY_BUDGET,
+                                   DEFAULT_POLL_JITTER, DEFAULT_OPT_RESPONSE_TIMEOUT, DEFAULT_PUBLISH_QUEUE_SIZE)
+from openadr_ven.decision import DecisionEngine
+from openadr_ven.poll_controller import AdaptivePollController
+from openadr_ven.publish_queue import PublishQueue
+from openadr_ven.reporting import TelemetryBuffer, parse_report_config
+
+import logging
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VenConfig(Mapping):
+    """The validated configuration of a VEN.
+
+    The fields are named after the configuration keys, and the configuration is also a read-only mapping of those keys,
+    so it can be used wherever a configuration dict is read. Create it with from_dict, which validates the values once.
+    """
+
+    ven_name: Optional[str] = None
+    vtn_url: Optional[str] = None
+    debug: bool = False
+    cert_path: Optional[str] = None
+    key_path: Optional[str] = None
+    passphrase: Optional[str] = field(default=None, repr=False)
+    vtn_fingerprint: Optional[str] = None
+    signature_cache_size: int = DEFAULT_SIGNATURE_CACHE_SIZE
+    show_fingerprint: bool = True
+    ca_file: Optional[str] = None
+    ven_id: Optional[str] = None
+    disable_signature: bool = False
+    pool_size: int = DEFAULT_POOL_SIZE
+    keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT
+    reports: Tuple[Dict, ...] = ()
+    log_event_details: bool = DEFAULT_LOG_EVENT_DETAILS
+    log_payload_limit: int = DEFAULT_LOG_PAYLOAD_LIMIT
+    event_store: Optional[str] = None
+    publish_deltas: bool = False
+    delta_snapshot_every: int = DEFAULT_DELTA_SNAPSHOT_EVERY
+    opt_rules: Tuple[Dict, ...] = ()
+    opt_default: str = DEFAULT_OPT_DEFAULT
+    opt_latency_budget: float = DEFAULT_OPT_LATENCY_BUDGET
+    adaptive_polling: bool = False
+    poll_interval: Optional[float] = None
+    active_poll_interval: Optional[float] = None
+    max_poll_interval: Optional[float] = None
+    poll_jitter: float = DEFAULT_POLL_JITTER
+    defer_opt_responses: bool = False
+    opt_response_timeout: float = DEFAULT_OPT_RESPONSE_TIMEOUT
+    publish_window: Optional[float] = None
+    publish_queue_size: int = DEFAULT_PUBLISH_QUEUE_SIZE
+    publish_event_topics: bool = True
+
+    @classmethod
+    def from_dict(cls, config: Dict, check_required: bool = True) -> "VenConfig":
+        """Validates the configuration of a VEN and fills in the defaults.
+
+        :param config: The configuration of the VEN
+        :param check_required: Whether to check that the required keys are present
+        :return: The validated configuration
+        :raises KeyError: if a required key is missing
+        :raises ValueError: if a value is invalid
+        :raises FileNotFoundError: if the certificate, key or CA file does not exist
+        """
+        if check_required:
+            for required_key in REQUIRED_KEYS:
+                if not config.get(required_key):
+                    raise KeyError(f"{required_key} is required.")
+        unknown = config.keys() - _FIELD_NAMES - {VENS}
+        if unknown:
+            _log.warning(f"Ignoring unknown configuration keys: {sorted(unknown)}")
+
+        vtn_url = _optional(config, VTN_URL, str)
+        if vtn_url and urlparse(vtn_url).scheme not in ("http", "https"):
+            raise ValueError(f"{VTN_URL} must be an http or https URL.")
+        event_store = _optional(config, EVENT_STORE, str)
+        return cls(
+            ven_name=_optional(config, VEN_NAME, str),
+            vtn_url=vtn_url,
+            debug=_flag(config, DEBUG, False),
+            cert_path=_path(config, CERT),
+            key_path=_path(config, KEY),
+            passphrase=_optional(config, PASSPHRASE, str),
+            vtn_fingerprint=_optional(config, VTN_FINGERPRINT, str),
+            signature_cache_size=_number(config, SIGNATURE_CACHE_SIZE, int, DEFAULT_SIGNATURE_CACHE_SIZE),
+            show_fingerprint=_flag(config, SHOW_FINGERPRINT, True),
+            ca_file=_path(config, CA_FILE),
+            ven_id=_optional(config, VEN_ID, str),
+            disable_signature=_flag(config, DISABLE_SIGNATURE, False),
+            pool_size=_number(config, POOL_SIZE, int, DEFAULT_POOL_SIZE),
+            keepalive_timeout=_number(config, KEEPALIVE_TIMEOUT, float, DEFAULT_KEEPALIVE_TIMEOUT),
+            reports=tuple(parse_report_config(report) for report in _list(config, REPORTS)),
+            log_event_details=_flag(config, LOG_EVENT_DETAILS, DEFAULT_LOG_EVENT_DETAILS),
+            log_payload_limit=_number(config, LOG_PAYLOAD_LIMIT, int, DEFAULT_LOG_PAYLOAD_LIMIT),
+            event_store=str(Path(event_store).expanduser()) if event_store else None,
+            publish_deltas=_flag(config, PUBLISH_DELTAS, False),
+            delta_snapshot_every=_number(config, DELTA_SNAPSHOT_EVERY, int, DEFAULT_DELTA_SNAPSHOT_EVERY),
+            opt_rules=tuple(_list(config, OPT_RULES)),
+            opt_default=config.get(OPT_DEFAULT) or DEFAULT_OPT_DEFAULT,
+            opt_latency_budget=_number(config, OPT_LATENCY_BUDGET, float, DEFAULT_OPT_LATENCY_BUDGET),
+            adaptive_polling=_flag(config, ADAPTIVE_POLLING, False),
+            poll_interval=_number(config, POLL_INTERVAL, float),
+            active_poll_interval=_number(config, ACTIVE_POLL_INTERVAL, float),
+            max_poll_interval=_number(config, MAX_POLL_INTERVAL, float),
+            poll_jitter=_number(config, POLL_JITTER, float, DEFAULT_POLL_JITTER),
+            defer_opt_responses=_flag(config, DEFER_OPT_RESPONSES, False),
+            opt_response_timeout=_number(config, OPT_RESPONSE_TIMEOUT, float, DEFAULT_OPT_RESPONSE_TIMEOUT),
+            publish_window=_number(config, PUBLISH_WINDOW, float),
+            publish_queue_size=_number(config, PUBLISH_QUEUE_SIZE, int, DEFAULT_PUBLISH_QUEUE_SIZE),
+            publish_event_topics=_flag(config, PUBLISH_EVENT_TOPICS, True),
+        )
+
+    def __post_init__(self) -> None:
+        for key in (SIGNATURE_CACHE_SIZE, POOL_SIZE, DELTA_SNAPSHOT_EVERY):
+            if self[key] < 1:
+                raise ValueError(f"{key} must be at least 1.")
+        for key in (KEEPALIVE_TIMEOUT, OPT_LATENCY_BUDGET, OPT_RESPONSE_TIMEOUT):
+            if self[key] <= 0:
+                raise ValueError(f"{key} must be positive.")
+        if self.log_payload_limit < 0:
+            raise ValueError(f"{LOG_PAYLOAD_LIMIT} must not be negative.")
+        # the components that the settings configure check the rest; without a poll_interval, the poll intervals are
+        # checked against the VTN's interval after registering
+        if self.poll_interval is not None:
+            AdaptivePollController(self.poll_interval, self.active_poll_interval, self.max_poll_interval,
+                                   self.poll_jitter)
+        if self.publish_window is not None:
+            PublishQueue(_no_flush, self.publish_window, self.publish_queue_size)
+        DecisionEngine(list(self.opt_rules), self.opt_default, self.opt_latency_budget, TelemetryBuffer())
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_FIELD_NAMES)
+
+    def __len__(self) -> int:
+        return len(_FIELD_NAMES)
+
+    def to_dict(self) -> Dict:
+        """Return the configuration as a dict of JSON-compatible values, e.g. to save it in the config store."""
+        return {name: _to_plain(getattr(self, name)) for name in _FIELD_NAMES}
+
+
+_FIELD_NAMES = frozenset(f.name for f in fields(VenConfig))
+
+
+def parse_config(config: Dict) -> Dict:
+    """Validates the agent's configuration.
+
+    The configuration describes either a single VEN through its top-level keys, or many VENs through a 'vens' list; in
+    the latter case every entry of the list is a VEN configuration whose missing keys default to the top-level keys.
+
+    :param config: The agent's configuration
+    :return: The validated configuration with the defaults filled in, as a dict that can be saved in the config store
+    """
+    if VENS not in config:
+        return VenConfig.from_dict(config).to_dict()
+
+    defaults = {k: v for k, v in config.items() if k != VENS}
+    parsed = VenConfig.from_dict(defaults, check_required=False).to_dict()
+    parsed[VENS] = []
+    for entry, ven_config in zip(config[VENS], resolve_ven_configs(config).values()):
+        # keep only the keys of the entry so that top-level defaults can still be updated through the config store
+        ven_config = ven_config.to_dict()
+        parsed[VENS].append({k: ven_config[k] for k in entry if k in ven_config})
+    return parsed
+
+
+def resolve_ven_configs(config: Dict) -> Dict[str, VenConfig]:
+    """Expands the agent's configuration into the validated configuration of every VEN.
+
+    :param config: The agent's configuration
+    :return: The configuration of every VEN, keyed by ven_name
+    """
+    ven_entries = config.get(VENS)
+    if ven_entries is None:
+        ven_entries = [{}]
+    elif not isinstance(ven_entries, list) or not ven_entries:
+        raise ValueError(f"{VENS} must be a non-empty list of VEN configurations.")
+    defaults = {k: v for k, v in config.items() if k != VENS}
+    ven_configs = {}
+    for entry in ven_entries:
+        ven_config = VenConfig.from_dict({**defaults, **entry})
+        if ven_config.ven_name in ven_configs:
+            raise KeyError(f"{VEN_NAME} {ven_config.ven_name} is configured more than once.")
+        ven_configs[ven_config.ven_name] = ven_config
+    return ven_configs
+
+
+def resolve_path(path: str) -> str:
+    """Return the absolute path of an existing file.
+
+    Paths are resolved on every configuration, so that a certificate rotated by swapping a symlink is picked up and a
+    file that was removed is reported; TlsCache only reads the files again when they change.
+    """
+    return str(Path(path).expanduser().resolve(strict=True))
+
+
+def _no_flush(batch, done) -> None:
+    pass
+
+
+def _optional(config: Dict, key: str, cls: type) -> Any:
+    value = config.get(key)
+    if value is not None and not isinstance(value, cls):
+        raise ValueError(f"{key} must be a {cls.__name__}.")
+    return value
+
+
+_FALSE_STRINGS = frozenset(("false", "0", "no", "off", ""))
+
+
+def _flag(config: Dict, key: str, default: bool) -> bool:
+    value = config.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    # earlier versions accepted any value through bool(); such configurations keep working, with a warning
+    flag = value.strip().lower() not in _FALSE_STRINGS if isinstance(value, str) else bool(value)
+    _log.warning(f"{key} should be true or false; reading {value!r} as {str(flag).lower()} is deprecated.")
+    return flag
+
+
+def _number(config: Dict, key: str, cls: type, default=None):
+    value = config.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        raise ValueError(f"{key} must be a number.")
+    try:
+        return cls(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number.") from None
+
+
+def _path(config: Dict, key: str) -> Optional[str]:
+    value = _optional(config, key, str)
+    return resolve_path(value) if value else None
+
+
+def _list(config: Dict, key: str) -> list:
+    value = config.get(key) or []
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f"{key} must be a list.")
+    return value
+
+
+def _to_plain(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _to_plain(v) for k, v in value.items()}
+    return value
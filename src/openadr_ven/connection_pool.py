@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import aiohttp
+import collections
+import os
+import ssl
+
+# the headers openleadr sets on its own client session
+_HEADERS = {'content-type': 'application/xml'}
+
+
+class _ConnectionStats:
+
+    def __init__(self) -> None:
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.tls_handshakes = 0
+
+    async def on_request_start(self, session, context: SimpleNamespace, params) -> None:
+        context.is_tls = params.url.scheme == "https"
+
+    async def on_connection_create_end(self, session, context: SimpleNamespace, params) -> None:
+        self.connections_created += 1
+        if getattr(context, "is_tls", False):
+            self.tls_handshakes += 1
+
+    async def on_connection_reuseconn(self, session, context: SimpleNamespace, params) -> None:
+        self.connections_reused += 1
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self.on_request_start)
+        trace_config.on_connection_create_end.append(self.on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self.on_connection_reuseconn)
+        return trace_config
+
+
+def _file_stamp(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    if not path:
+        return None
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+class TlsCache:
+    """Caches the TLS material of VEN clients: the certificate and key files they read, the private keys parsed for
+    signing and the SSL contexts of their connections.
+
+    Entries are keyed by the paths and the modification time and size of the files, so a file that changes on disk is
+    loaded again. The cache outlives connection pools and clients, so that reconfigurations that replace the pool or
+    rebuild a client do not read unchanged certificates from disk again. Must be used from the thread that runs the
+    clients' event loop.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple, Tuple[Tuple, Any]] = {}
+        # the number of times each kind of material was loaded, e.g. loads["ssl_context"]
+        self.loads = collections.Counter()
+
+    def read(self, path: str) -> bytes:
+        """Return the contents of a certificate or key file."""
+        return self._get(("file", path), (path,), lambda: _read_file(path))
+
+    def private_key(self, path: str, passphrase: str = None):
+        """Return the private key of a PEM file, parsed for signing."""
+        from openadr_ven.signature import load_private_key
+
+        return self._get(("private_key", path, passphrase), (path,),
+                         lambda: load_private_key(self.read(path), passphrase))
+
+    def ssl_context(self,
+                    cert: str,
+                    key: str,
+                    passphrase: str = None,
+                    ca_file: str = None,
+                    check_hostname: bool = True) -> ssl.SSLContext:
+        """Return the SSL context for the given TLS material."""
+
+        def load():
+            # mirrors the context that openleadr builds for each client session
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            context.load_verify_locations(ca_file)
+            context.load_cert_chain(cert, key, passphrase)
+            context.check_hostname = check_hostname
+            return context
+
+        return self._get(("ssl_context", cert, key, passphrase, ca_file, check_hostname), (cert, key, ca_file), load)
+
+    def _get(self, key: Tuple, paths: Iterable[str], load: Callable[[], Any]) -> Any:
+        stamps = tuple(_file_stamp(path) for path in paths)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == stamps:
+            return entry[1]
+        value = load()
+        self._entries[key] = (stamps, value)
+        self.loads[key[0]] += 1
+        return value
+
+
+class ConnectionPool:
+    """A pool of keep-alive HTTP connections to VTNs that is shared by VEN clients.
+
+    Clients that use the same TLS material share one connector, so polls and reports reuse open connections instead
+    of performing a new TLS handshake each time. SSL contexts are loaded once per distinct certificate, key and CA
+    file through the TLS cache and reused by every client that needs them. Must be used from the thread that runs the
+    clients' event loop.
+
+    :param pool_size: The maximum number of open connections per connector
+    :param keepalive_timeout: How long an idle connection is kept open, in seconds
+    :param tls_cache: The TLS cache of a previous pool whose SSL contexts are reused; a new one by default
+    """
+
+    def __init__(self, pool_size: int = 10, keepalive_timeout: float = 60, tls_cache: TlsCache = None) -> None:
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.tls_cache = tls_cache if tls_cache is not None else TlsCache()
+        self._connectors: Dict[Optional[Tuple], aiohttp.TCPConnector] = {}
+        self._stats = _ConnectionStats()
+
+    def ssl_context(self,
+                    cert: str,
+                    key: str,
+                    passphrase: str = None,
+                    ca_file: str = None,
+                    check_hostname: bool = True) -> ssl.SSLContext:
+        """Return the SSL context for the given TLS material, loading it from disk only the first time."""
+        return self.tls_cache.ssl_context(cert, key, passphrase, ca_file, check_hostname)
+
+    def session(self,
+                cert: str = None,
+                key: str = None,
+                passphrase: str = None,
+                ca_file: str = None,
+                check_hostname: bool = True) -> aiohttp.ClientSession:
+        """Create a client session that borrows connections from the pool.
+
+        Closing the session does not close the pooled connections.
+        """
+        ssl_key = (cert, key, passphrase, ca_file, check_hostname) if cert else None
+        connector = self._connectors.get(ssl_key)
+        if connector is None or connector.closed:
+            kwargs = {}
+            if ssl_key is not None:
+                kwargs["ssl"] = self.ssl_context(*ssl_key)
+            connector = aiohttp.TCPConnector(limit=self.pool_size,
+                                             keepalive_timeout=self.keepalive_timeout,
+                                             **kwargs)
+            self._connectors[ssl_key] = connector
+        return aiohttp.ClientSession(connector=connector,
+                                     connector_owner=False,
+                                     headers=_HEADERS,
+                                     trace_configs=[self._stats.trace_config()])
+
+    def get_metrics(self) -> Dict:
+        """Return the number of connections created and reused, TLS handshakes performed and the reuse ratio."""
+        stats = self._stats
+        requests = stats.connections_created + stats.connections_reused
+        return {
+            "connections_created": stats.connections_created,
+            "connections_reused": stats.connections_reused,
+            "tls_handshakes": stats.tls_handshakes,
+            "reuse_ratio": stats.connections_reused / requests if requests else 0.0,
+            "ssl_contexts_loaded": self.tls_cache.loads["ssl_context"],
+        }
+
+    async def close(self) -> None:
+        for connector in self._connectors.values():
+            await connector.close()
+        self._connectors.clear()
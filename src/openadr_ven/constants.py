@@ -33,6 +33,106 @@ SHOW_FINGERPRINT = "show_fingerprint"
 CA_FILE = "ca_file"
 VEN_ID = "ven_id"
 DISABLE_SIGNATURE = "disable_signature"
+# settings of the keep-alive connection pool shared by all VEN clients of the agent
+POOL_SIZE = "pool_size"
+KEEPALIVE_TIMEOUT = "keepalive_timeout"
+# optional list of reports offered to the VTN, each answered from buffered device publishes
+REPORTS = "reports"
+REPORT_NAME = "report_name"
+RESOURCE_ID = "resource_id"
+MEASUREMENT = "measurement"
+UNIT = "unit"
+TOPIC = "topic"
+POINT = "point"
+MIN_SAMPLING_INTERVAL = "min_sampling_interval"
+MAX_SAMPLING_INTERVAL = "max_sampling_interval"
+BUFFER_SIZE = "buffer_size"
+# optional; reports with an aggregation are answered from a running aggregate of the samples received since the last
+# reading instead of from the buffered samples
+AGGREGATION = "aggregation"
+AGGREGATIONS = ["last", "mean", "min", "max", "sum"]
+REQUIRED_REPORT_KEYS = [RESOURCE_ID, MEASUREMENT, TOPIC, POINT]
+# whether the payloads of received and published events are logged, and the number of characters logged per payload
+LOG_EVENT_DETAILS = "log_event_details"
+LOG_PAYLOAD_LIMIT = "log_payload_limit"
+# optional path of the database in which received events are kept, so that they can be republished after a restart
+EVENT_STORE = "event_store"
+# whether modified events are published as patches against their last published version, and after how many
+# consecutive patches an event is published in full again
+PUBLISH_DELTAS = "publish_deltas"
+DELTA_SNAPSHOT_EVERY = "delta_snapshot_every"
+# optional window in seconds within which received events are coalesced into one publish per VEN on the aggregate
+# topic, the maximum number of events that are queued or being published, and whether every event is also published on
+# its own topic
+PUBLISH_WINDOW = "publish_window"
+PUBLISH_QUEUE_SIZE = "publish_queue_size"
+PUBLISH_EVENT_TOPICS = "publish_event_topics"
+# optional rules that decide whether the VEN opts in to or out of an event, the decision when no rule matches, and
+# the time allowed for a decision in seconds
+OPT_RULES = "opt_rules"
+OPT_DEFAULT = "opt_default"
+OPT_LATENCY_BUDGET = "opt_latency_budget"
+RULE_NAME = "name"
+RULE_ACTION = "action"
+SIGNAL_NAME = "signal_name"
+SIGNAL_TYPE = "signal_type"
+MIN_VALUE = "min_value"
+MAX_VALUE = "max_value"
+START_TIME = "start_time"
+END_TIME = "end_time"
+MIN_HEADROOM = "min_headroom"
+MAX_HEADROOM = "max_headroom"
+OPT_ACTIONS = ["optIn", "optOut"]
+# whether events are published with a correlation id and the VEN waits for other agents to respond with the opt
+# decision, and how long it waits in seconds before the decision of the opt rules applies
+DEFER_OPT_RESPONSES = "defer_opt_responses"
+OPT_RESPONSE_TIMEOUT = "opt_response_timeout"
+# whether the VEN paces its own polls instead of polling on the VTN's fixed schedule, and the poll intervals in
+# seconds: 'poll_interval' while idle (defaults to the VTN's requested interval), 'active_poll_interval' while events
+# are active or pending, and 'max_poll_interval' as the cap of the backoff when idle or failing; plus the share by
+# which every delay is jittered
+ADAPTIVE_POLLING = "adaptive_polling"
+POLL_INTERVAL = "poll_interval"
+ACTIVE_POLL_INTERVAL = "active_poll_interval"
+MAX_POLL_INTERVAL = "max_poll_interval"
+POLL_JITTER = "poll_jitter"
+# the number of parsed VTN certificates that are kept, so that a certificate is parsed and checked against the
+# fingerprint once rather than for every message; only used with a vtn_fingerprint
+SIGNATURE_CACHE_SIZE = "signature_cache_size"
 REQUIRED_KEYS = [VEN_NAME, VTN_URL]
+# values of these keys are never logged
+SECRET_KEYS = [PASSPHRASE]
+# optional list of VEN configurations; keys missing from an entry default to the top-level keys
+VENS = "vens"
+# keys that can be changed on a running client; changing any other key restarts the client
+RECONFIGURABLE_KEYS = [DEBUG, SHOW_FINGERPRINT, LOG_EVENT_DETAILS, LOG_PAYLOAD_LIMIT, EVENT_STORE,
+                       PUBLISH_DELTAS, DELTA_SNAPSHOT_EVERY, OPT_RULES, OPT_DEFAULT, OPT_LATENCY_BUDGET,
+                       DEFER_OPT_RESPONSES, OPT_RESPONSE_TIMEOUT, POLL_INTERVAL, ACTIVE_POLL_INTERVAL,
+                       MAX_POLL_INTERVAL, POLL_JITTER, PUBLISH_WINDOW, PUBLISH_QUEUE_SIZE, PUBLISH_EVENT_TOPICS]
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+DEFAULT_REPORT_NAME = "TELEMETRY_USAGE"
+DEFAULT_MIN_SAMPLING_INTERVAL = 10
+DEFAULT_MAX_SAMPLING_INTERVAL = 3600
+DEFAULT_BUFFER_SIZE = 360
+DEFAULT_AGGREGATION = "last"
+DEFAULT_LOG_EVENT_DETAILS = True
+DEFAULT_LOG_PAYLOAD_LIMIT = 4096
+DEFAULT_DELTA_SNAPSHOT_EVERY = 10
+DEFAULT_OPT_DEFAULT = "optIn"
+DEFAULT_OPT_LATENCY_BUDGET = 0.05
+DEFAULT_OPT_RESPONSE_TIMEOUT = 5
+DEFAULT_POLL_JITTER = 0.1
+DEFAULT_PUBLISH_QUEUE_SIZE = 1000
+DEFAULT_SIGNATURE_CACHE_SIZE = 8
 
 OPENADR_EVENT = "openadr/event"
+OPENADR_STATUS = "openadr/status"
+OPENADR_SIGNAL = "openadr/signal"
+# pubsub subscriptions match topics by prefix, so messages that are not event payloads are published outside of
+# OPENADR_EVENT
+OPENADR_EVENT_DELTA = "openadr/delta"
+OPENADR_EVENT_BATCH = "openadr/batch"
+# header of event publishes that await an opt response
+CORRELATION_ID = "correlation_id"
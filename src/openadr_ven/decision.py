@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import time as time_of_day
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from openadr_ven.constants import (RULE_NAME, RULE_ACTION, SIGNAL_NAME,
+                                   SIGNAL_TYPE, MIN_VALUE, MAX_VALUE,
+                                   START_TIME, END_TIME, TOPIC, POINT,
+                                   MIN_HEADROOM, MAX_HEADROOM, OPT_ACTIONS)
+from openadr_ven.reporting import TelemetryBuffer
+from openadr_ven.openadr_event import OpenADREvent
+
+import logging
+import time
+
+_log = logging.getLogger(__name__)
+
+
+class _Rule(NamedTuple):
+    name: str
+    action: str
+    conditions: List[Callable[[OpenADREvent], bool]]
+    # the topic of the headroom point, if the rule has a headroom condition
+    topic: Optional[str]
+
+
+class _RuleTiming:
+    __slots__ = ("evaluations", "matches", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        self.evaluations = 0
+        self.matches = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+
+def _parse_time_of_day(value: str) -> int:
+    parsed = time_of_day.fromisoformat(value)
+    return parsed.hour * 60 + parsed.minute
+
+
+def compile_rule(rule: Dict, index: int, telemetry: TelemetryBuffer) -> _Rule:
+    """Validates an opt rule and compiles its conditions into predicates over an event.
+
+    A rule matches an event if all its conditions hold:
+
+    * 'signal_name' and 'signal_type' select the event's signals; 'min_value' and 'max_value' bound the highest
+      interval value of the selected signals
+    * 'start_time' and 'end_time' ('HH:MM', local time) bound the time of day at which the event starts; a window may
+      wrap around midnight
+    * 'min_headroom' and 'max_headroom' bound the latest value of 'point' published on 'topic'; the rule does not match
+      while no value has been received
+
+    :param rule: The rule configuration
+    :param index: The position of the rule; names unnamed rules
+    :param telemetry: The buffer that keeps the latest headroom values
+    :raises ValueError: if the rule is invalid
+    """
+    action = rule.get(RULE_ACTION)
+    if action not in OPT_ACTIONS:
+        raise ValueError(f"{RULE_ACTION} of an opt rule must be one of {OPT_ACTIONS}.")
+    conditions = []
+
+    signal_name, signal_type = rule.get(SIGNAL_NAME), rule.get(SIGNAL_TYPE)
+    min_value, max_value = rule.get(MIN_VALUE), rule.get(MAX_VALUE)
+    if signal_name is not None or signal_type is not None or min_value is not None or max_value is not None:
+        low = float("-inf") if min_value is None else float(min_value)
+        high = float("inf") if max_value is None else float(max_value)
+
+        def signal_condition(event: OpenADREvent) -> bool:
+            peak = None
+            for signal in event.signals:
+                if signal_name is not None and signal.signal_name != signal_name:
+                    continue
+                if signal_type is not None and signal.signal_type != signal_type:
+                    continue
+                for value in signal.payload_values():
+                    if isinstance(value, (int, float)) and (peak is None or value > peak):
+                        peak = value
+            return peak is not None and low <= peak <= high
+
+        conditions.append(signal_condition)
+
+    start_time, end_time = rule.get(START_TIME), rule.get(END_TIME)
+    if start_time is not None or end_time is not None:
+        if start_time is None or end_time is None:
+            raise ValueError(f"{START_TIME} and {END_TIME} of an opt rule must be given together.")
+        start_minute, end_minute = _parse_time_of_day(start_time), _parse_time_of_day(end_time)
+
+        def time_condition(event: OpenADREvent) -> bool:
+            dtstart = event.time_span()[0]
+            if dtstart is None:
+                return False
+            local = dtstart.astimezone()
+            minute = local.hour * 60 + local.minute
+            if start_minute <= end_minute:
+                return start_minute <= minute < end_minute
+            return minute >= start_minute or minute < end_minute
+
+        conditions.append(time_condition)
+
+    topic = None
+    min_headroom, max_headroom = rule.get(MIN_HEADROOM), rule.get(MAX_HEADROOM)
+    if min_headroom is not None or max_headroom is not None:
+        topic, point = rule.get(TOPIC), rule.get(POINT)
+        if not topic or not point:
+            raise ValueError(f"{TOPIC} and {POINT} are required for headroom conditions of an opt rule.")
+        topic = topic.rstrip("/")
+        low = float("-inf") if min_headroom is None else float(min_headroom)
+        high = float("inf") if max_headroom is None else float(max_headroom)
+        telemetry.add_series(topic, point, 1)
+
+        def headroom_condition(event: OpenADREvent) -> bool:
+            last = telemetry.last(topic, point)
+            return last is not None and low <= last[1] <= high
+
+        conditions.append(headroom_condition)
+
+    return _Rule(rule.get(RULE_NAME) or f"rule{index}", action, conditions, topic)
+
+
+class DecisionEngine:
+    """Decides whether the VEN opts in to or out of an event by evaluating rules in order; the first rule whose
+    conditions all match decides, and the default decides if no rule matches.
+
+    Rules are compiled once, when the engine is created. Evaluation stops when the latency budget runs out, in which
+    case the default decides too. The time spent in every rule is recorded; see get_metrics.
+
+    :param rules: The rule configurations; see compile_rule
+    :param default: The decision when no rule matches or the budget runs out, 'optIn' or 'optOut'
+    :param latency_budget: The time allowed for a decision, in seconds
+    :param telemetry: The buffer that keeps the latest headroom values
+    """
+
+    def __init__(self, rules: List[Dict], default: str, latency_budget: float, telemetry: TelemetryBuffer) -> None:
+        if default not in OPT_ACTIONS:
+            raise ValueError(f"The default opt decision must be one of {OPT_ACTIONS}.")
+        self.default = default
+        self.latency_budget = latency_budget
+        self._rules = [compile_rule(rule, i, telemetry) for i, rule in enumerate(rules or [])]
+        if len({rule.name for rule in self._rules}) < len(self._rules):
+            raise ValueError(f"The {RULE_NAME}s of opt rules must be unique.")
+        # the topics of the headroom points, which must be recorded in the telemetry buffer
+        self.topics = sorted({rule.topic for rule in self._rules if rule.topic})
+        self._timings = {rule.name: _RuleTiming() for rule in self._rules}
+        self._decisions = {action: 0 for action in OPT_ACTIONS}
+        self._defaults_used = 0
+        self._budget_exceeded = 0
+        self._max_ns = 0
+
+    def decide(self, event: OpenADREvent) -> str:
+        """Return 'optIn' or 'optOut' for an event."""
+        started = time.perf_counter_ns()
+        deadline = started + int(self.latency_budget * 1e9)
+        decision = None
+        now = started
+        for rule in self._rules:
+            if now > deadline:
+                self._budget_exceeded += 1
+                _log.warning(f"Opt decision for event {event.get_event_id()} exceeded the latency budget; "
+                             f"using the default {self.default}")
+                break
+            matched = all(condition(event) for condition in rule.conditions)
+            finished = time.perf_counter_ns()
+            timing = self._timings[rule.name]
+            timing.evaluations += 1
+            timing.total_ns += finished - now
+            timing.max_ns = max(timing.max_ns, finished - now)
+            now = finished
+            if matched:
+                timing.matches += 1
+                decision = rule.action
+                break
+        if decision is None:
+            decision = self.default
+            self._defaults_used += 1
+        self._decisions[decision] += 1
+        self._max_ns = max(self._max_ns, time.perf_counter_ns() - started)
+        return decision
+
+    def get_metrics(self) -> Dict:
+        """Return the number of decisions per outcome, how often the default decided and the budget ran out, the
+        slowest decision, and the evaluations, matches and mean and slowest evaluation time of every rule."""
+        return {
+            "decisions": dict(self._decisions),
+            "defaults_used": self._defaults_used,
+            "budget_exceeded": self._budget_exceeded,
+            "latency_budget_ms": self.latency_budget * 1e3,
+            "max_latency_ms": self._max_ns / 1e6,
+            "rules": [{
+                "name": name,
+                "evaluations": timing.evaluations,
+                "matches": timing.matches,
+                "mean_us": timing.total_ns / timing.evaluations / 1e3 if timing.evaluations else 0.0,
+                "max_us": timing.max_ns / 1e3,
+            } for name, timing in self._timings.items()],
+        }
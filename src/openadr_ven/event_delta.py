@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from copy import deepcopy
+from typing import Any, Dict, List
+
+
+def _escape(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[Dict]:
+    """Return a JSON Patch (RFC 6902) of 'add', 'remove' and 'replace' operations that turns one parsed event payload
+    into another.
+
+    Dicts are compared key by key and lists index by index, so a change to one interval of a large event yields a
+    single operation. Elements that are added to or removed from the end of a list yield one operation each.
+
+    :param old: The payload that was published last
+    :param new: The new payload
+    :param path: The JSON Pointer of the compared values within the payload
+    :return: The list of operations; empty if the payloads are equal
+    """
+    if old.__class__ is dict and new.__class__ is dict:
+        patch = []
+        for key in old:
+            if key not in new:
+                patch.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            if key in old:
+                patch.extend(diff(old[key], value, f"{path}/{_escape(key)}"))
+            else:
+                patch.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+        return patch
+    if old.__class__ is list and new.__class__ is list:
+        patch = []
+        for i in range(min(len(old), len(new))):
+            patch.extend(diff(old[i], new[i], f"{path}/{i}"))
+        for i in range(len(old), len(new)):
+            patch.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+        for i in range(len(old) - 1, len(new) - 1, -1):
+            patch.append({"op": "remove", "path": f"{path}/{i}"})
+        return patch
+    # 1 == 1.0 == True, but they are published differently
+    if old != new or old.__class__ is not new.__class__:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply_patch(document: Any, patch: List[Dict]) -> Any:
+    """Apply a patch made by diff to a copy of a payload; subscribers of the delta topic can use it to keep their copy
+    of an event up to date.
+
+    :return: The patched copy
+    """
+    document = deepcopy(document)
+    for operation in patch:
+        tokens = [_unescape(token) for token in operation["path"].split("/")[1:]]
+        if not tokens:
+            document = deepcopy(operation["value"])
+            continue
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = int(tokens[-1]) if isinstance(parent, list) else tokens[-1]
+        if operation["op"] == "remove":
+            del parent[last]
+        elif operation["op"] == "add" and isinstance(parent, list):
+            parent.insert(last, deepcopy(operation["value"]))
+        else:
+            parent[last] = deepcopy(operation["value"])
+    return document
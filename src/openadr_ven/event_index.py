@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+
+from openadr_ven.openadr_event import OpenADREvent
+
+
+class _IndexEntry(NamedTuple):
+    modification_number: int
+    content_hash: str
+    end_time: Optional[datetime]
+
+
+class EventIndex:
+    """In-memory index of the events that have been published, keyed by event_id.
+
+    The VTN re-sends the same events on every poll; the index records the modification number and a hash of the parsed
+    content of each published event so that unchanged copies can be skipped. The owner of the index discards events
+    once their active period has ended, see EventSweeper; when the index is full, the events that end first are
+    evicted.
+
+    :param max_events: The maximum number of events held in the index
+    """
+
+    def __init__(self, max_events: int = 1000) -> None:
+        self.max_events = max_events
+        self._entries: Dict[str, _IndexEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._entries
+
+    def update(self, event: OpenADREvent) -> bool:
+        """Record the event and report whether it differs from the copy that was last recorded.
+
+        :param event: The event received from the VTN
+        :return: True if the event is new or has changed, False if it is an unchanged copy
+        """
+        event_id = event.get_event_id()
+        modification_number = event.descriptor.get("modification_number")
+        content_hash = event.content_hash()
+        entry = self._entries.get(event_id)
+        if entry is not None and entry.modification_number == modification_number \
+                and entry.content_hash == content_hash:
+            return False
+
+        self._entries[event_id] = _IndexEntry(modification_number, content_hash, event.end_time)
+        self._enforce_bound()
+        return True
+
+    def discard(self, event_id: str, event: OpenADREvent = None) -> None:
+        """Remove an event from the index.
+
+        :param event: If given, the event is only removed while the index still holds this version of it, so that a
+            newer version recorded in the meantime is kept
+        """
+        entry = self._entries.get(event_id)
+        if entry is None:
+            return
+        if event is not None and (entry.modification_number != event.descriptor.get("modification_number")
+                                  or entry.content_hash != event.content_hash()):
+            return
+        del self._entries[event_id]
+
+    def _enforce_bound(self) -> None:
+        # the index only overflows when the VTN sends more events than it was sized for; evict the event that ends
+        # first, or, if only open-ended events are left, the one that was recorded first
+        while len(self._entries) > self.max_events:
+            entries = self._entries
+            del entries[min(entries, key=lambda event_id: (entries[event_id].end_time is None,
+                                                           entries[event_id].end_time or 0))]
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from volttron.utils import jsonapi
+
+from openadr_ven.openadr_event import OpenADREvent
+
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ven_name TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    modification_number INTEGER,
+    status TEXT,
+    start_time REAL,
+    end_time REAL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (ven_name, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_end_time ON events (end_time);
+CREATE INDEX IF NOT EXISTS events_start_time ON events (start_time);
+CREATE INDEX IF NOT EXISTS events_status ON events (status, start_time);
+"""
+
+
+class EventStore:
+    """Durable store of the events received by the VEN, kept in an SQLite database in write-ahead logging mode.
+
+    Every new or changed event is written with its parsed payload, so that unexpired events can be restored and
+    republished as soon as the agent restarts, without waiting for the VEN to register and poll again. Events are
+    indexed by the start and end of their active period and by status. Events without an end, i.e. open-ended events
+    or events without an active period, are treated as never expiring.
+
+    The store may be used from several threads.
+
+    :param path: The path of the database file; ':memory:' keeps the store in memory
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # in WAL mode, a NORMAL sync keeps the database consistent and only risks the latest writes on power loss
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(_SCHEMA)
+
+    def save(self, ven_name: str, event: OpenADREvent) -> None:
+        """Insert or replace an event."""
+        descriptor = event.descriptor
+        start_time, end_time = event.time_span()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ven_name, event.get_event_id(), descriptor.get("modification_number"),
+                 descriptor.get("event_status"), _timestamp(start_time), _timestamp(end_time),
+                 jsonapi.dumps(event.parse_event())))
+
+    def load_unexpired(self, now: datetime) -> List[Tuple[str, OpenADREvent]]:
+        """Return the (ven_name, event) pairs of the events whose active period has not ended, oldest start first."""
+        return self._select("WHERE end_time IS NULL OR end_time > ? ORDER BY start_time", (now.timestamp(),))
+
+    def query(self,
+              start: datetime = None,
+              end: datetime = None,
+              status: str = None,
+              ven_name: str = None) -> List[Tuple[str, OpenADREvent]]:
+        """Return the (ven_name, event) pairs of the events that are active at some point between two dates, oldest
+        start first.
+
+        :param start: The start of the time window; unbounded if None
+        :param end: The end of the time window; unbounded if None
+        :param status: Only return events with this event_status, e.g. 'far', 'near', 'active' or 'cancelled'
+        :param ven_name: Only return events of this VEN
+        """
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("(end_time IS NULL OR end_time > ?)")
+            params.append(start.timestamp())
+        if end is not None:
+            conditions.append("(start_time IS NULL OR start_time < ?)")
+            params.append(end.timestamp())
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if ven_name is not None:
+            conditions.append("ven_name = ?")
+            params.append(ven_name)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        return self._select(f"{where}ORDER BY start_time", tuple(params))
+
+    def delete_expired(self, now: datetime) -> int:
+        """Delete the events whose active period ended before now.
+
+        :return: The number of deleted events
+        """
+        with self._lock:
+            return self._connection.execute("DELETE FROM events WHERE end_time <= ?", (now.timestamp(),)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _select(self, clause: str, params: tuple) -> List[Tuple[str, OpenADREvent]]:
+        with self._lock:
+            rows = self._connection.execute(f"SELECT ven_name, payload FROM events {clause}", params).fetchall()
+        return [(ven_name, OpenADREvent.from_payload(jsonapi.loads(payload))) for ven_name, payload in rows]
+
+
+def _timestamp(dt: Optional[datetime]) -> Optional[float]:
+    return None if dt is None else dt.timestamp()
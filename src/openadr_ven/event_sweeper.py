@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from volttron.utils import format_timestamp, get_aware_utc_now
+
+from openadr_ven.constants import OPENADR_EVENT
+from openadr_ven.openadr_event import EventStatus, OpenADREvent
+
+import heapq
+
+
+class EventSweeper:
+    """Publishes the status of events as it changes, and forgets events once they have ended, from a single timer.
+
+    An event is 'pending' until its active period starts, 'active' during it, and 'completed' once it has ended or
+    'cancelled' as soon as the VTN cancels it; see OpenADREvent.status. The status that an event has when it is first
+    seen goes with its publish on 'openadr/event/...'; every later change is published on
+    'openadr/event/<event_id>/<ven_name>/status'.
+
+    The next transition of every event, its start or its end, is kept in one heap, and only the earliest one is
+    scheduled with the timer, so that tens of thousands of events share a single timer. When an event is modified,
+    the transition of the previous version is dropped. Events are handed to on_finished once their active period has
+    ended, so that their owner can evict them, and forgotten; a cancelled event is held until then too, as queries
+    over its active period still report it. The sweeper is the only timer that expires events.
+
+    :param publish: Called with the topic and the message of every status change
+    :param schedule: Called with a deadline and a callback to set the timer; returns an object with a cancel() method
+    :param on_finished: Called with the ven_name and the event once the active period of the event has ended, or
+        once it was cancelled if it has no end
+    :param clock: Returns the current time
+    """
+
+    def __init__(self,
+                 publish: Callable[[str, Dict], None],
+                 schedule: Callable[[datetime, Callable[[], None]], Any],
+                 on_finished: Optional[Callable[[str, OpenADREvent], None]] = None,
+                 clock: Callable[[], datetime] = get_aware_utc_now) -> None:
+        self._publish = publish
+        self._schedule = schedule
+        self._on_finished = on_finished
+        self._clock = clock
+        # (time, sequence, key, version); entries of replaced versions are skipped lazily
+        self._heap: List[Tuple[datetime, int, Tuple[str, str], int]] = []
+        self._sequence = 0
+        # per (ven_name, event_id): the current version, the event and the last status published for it
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._events: Dict[Tuple[str, str], OpenADREvent] = {}
+        self._statuses: Dict[Tuple[str, str], str] = {}
+        self._timer = None
+        self._timer_deadline = None
+
+    def __len__(self) -> int:
+        """The number of events that have not ended yet."""
+        return len(self._versions)
+
+    def status(self, ven_name: str, event_id: str) -> Optional[str]:
+        """Return the status of an event as of its last transition, or None if the event is not tracked."""
+        return self._statuses.get((ven_name, event_id))
+
+    def update(self, ven_name: str, event: OpenADREvent) -> None:
+        """Track a new or modified event, publishing its status right away if it changed since the previous version."""
+        key = (ven_name, event.get_event_id())
+        self._sequence += 1
+        self._versions[key] = self._sequence
+        self._events[key] = event
+        self._advance(key, self._clock())
+        self._reschedule()
+
+    def remove(self, ven_name: str, event_id: str = None) -> None:
+        """Forget an event, or all events of a VEN, without publishing anything."""
+        for key in [k for k in self._versions if k[0] == ven_name and event_id in (None, k[1])]:
+            self._forget(key)
+        self._reschedule()
+
+    def run_due(self) -> int:
+        """Publish the status changes whose time has come and set the timer for the next one.
+
+        :return: The number of events whose transition was due
+        """
+        self._timer = self._timer_deadline = None
+        now = self._clock()
+        due = 0
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, version = heapq.heappop(self._heap)
+            if self._versions.get(key) != version:
+                continue
+            self._advance(key, now)
+            due += 1
+        self._reschedule()
+        return due
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._timer_deadline = None
+
+    def _advance(self, key: Tuple[str, str], now: datetime) -> None:
+        """Publish the status of an event if it changed, then either push its next transition or forget it."""
+        event = self._events[key]
+        status = event.status(now)
+        previous = self._statuses.get(key)
+        self._statuses[key] = status
+        if previous is not None and status != previous and not event.descriptor.get("test_event"):
+            self._publish(f"{OPENADR_EVENT}/{key[1]}/{key[0]}/status", _message(event, status, previous))
+        start, end = event.time_span()
+        if status == EventStatus.COMPLETED or (status == EventStatus.CANCELLED and (end is None or end <= now)):
+            self._forget(key)
+            if self._on_finished is not None:
+                self._on_finished(key[0], event)
+            return
+        # a cancelled event is kept until its end; an active event without an end runs until it is modified or cancelled
+        deadline = start if status == EventStatus.PENDING else end
+        if deadline is not None:
+            self._sequence += 1
+            heapq.heappush(self._heap, (deadline, self._sequence, key, self._versions[key]))
+
+    def _forget(self, key: Tuple[str, str]) -> None:
+        del self._versions[key]
+        del self._events[key]
+        self._statuses.pop(key, None)
+
+    def _reschedule(self) -> None:
+        heap = self._heap
+        # modifications leave the transitions of previous versions behind; drop them once they outnumber the events
+        if len(heap) > 2 * len(self._versions) + 64:
+            heap[:] = [entry for entry in heap if self._versions.get(entry[2]) == entry[3]]
+            heapq.heapify(heap)
+        while heap and self._versions.get(heap[0][2]) != heap[0][3]:
+            heapq.heappop(heap)
+        deadline = heap[0][0] if heap else None
+        if deadline == self._timer_deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._timer_deadline = deadline
+        if deadline is not None:
+            self._timer = self._schedule(deadline, self.run_due)
+
+
+def _message(event: OpenADREvent, status: str, previous: Optional[str]) -> Dict:
+    start, end = event.time_span()
+    return {
+        "event_id": event.get_event_id(),
+        "modification_number": event.descriptor.get("modification_number"),
+        "status": status,
+        "previous_status": previous,
+        "dtstart": format_timestamp(start) if start is not None else None,
+        "end": format_timestamp(end) if end is not None else None,
+    }
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from typing import Any, Callable, Iterable, List, Union
+
+from openadr_ven.constants import SECRET_KEYS, DEFAULT_LOG_PAYLOAD_LIMIT
+
+import logging
+
+REDACTED = "<redacted>"
+
+
+class _Elided:
+    """Stands in for the members of a payload that were left out so that formatting it stays cheap."""
+
+    def __repr__(self) -> str:
+        return "..."
+
+
+ELIDED = _Elided()
+
+
+def redact(payload: Any, secret_keys: Iterable[str] = SECRET_KEYS) -> Any:
+    """Return a copy of a payload in which the values of secret keys, at any depth, are replaced by REDACTED."""
+    if isinstance(payload, dict):
+        return {
+            k: REDACTED if k in secret_keys and v is not None else redact(v, secret_keys)
+            for k, v in payload.items()
+        }
+    if isinstance(payload, (list, tuple)):
+        return [redact(v, secret_keys) for v in payload]
+    return payload
+
+
+def _redact_bounded(payload: Any, budget: List[int], secret_keys: Iterable[str] = SECRET_KEYS) -> Any:
+    """Like redact, but copies at most budget[0] members of the payload, in order, and puts ELIDED in place of the
+    rest; every member is formatted as at least one character, so a payload truncated to that many characters needs
+    no more."""
+    budget[0] -= 1
+    if isinstance(payload, dict):
+        copy = {}
+        for k, v in payload.items():
+            if budget[0] <= 0:
+                copy[ELIDED] = ELIDED
+                break
+            copy[k] = REDACTED if k in secret_keys and v is not None else _redact_bounded(v, budget, secret_keys)
+        return copy
+    if isinstance(payload, (list, tuple)):
+        copy = []
+        for v in payload:
+            if budget[0] <= 0:
+                copy.append(ELIDED)
+                break
+            copy.append(_redact_bounded(v, budget, secret_keys))
+        return copy
+    return payload
+
+
+class LazyFormat:
+    """A log argument that pretty-prints a redacted payload only when the log record is emitted.
+
+    Pass it as an argument of a %-style logging call; if the record is discarded, the payload is never formatted. With
+    a max_length, only as much of the payload is copied and formatted as can show within that many characters, so
+    that logging an event with thousands of intervals costs no more than logging a small one.
+
+    :param payload: The payload, or a callable without arguments that returns it
+    :param max_length: The number of characters kept of the formatted payload; 0 keeps everything
+    """
+
+    __slots__ = ("_payload", "_max_length")
+
+    def __init__(self, payload: Union[Any, Callable[[], Any]], max_length: int = DEFAULT_LOG_PAYLOAD_LIMIT) -> None:
+        self._payload = payload
+        self._max_length = max_length
+
+    def __str__(self) -> str:
+        # pprint is only imported once a payload is logged, which most agents never do
+        from pprint import pformat
+        payload = self._payload() if callable(self._payload) else self._payload
+        if not self._max_length:
+            return pformat(redact(payload))
+        # members are shown in the order they were copied in, so that the elided ones come last
+        budget = [self._max_length]
+        text = pformat(_redact_bounded(payload, budget), sort_dicts=False)
+        if len(text) > self._max_length:
+            rest = "truncated" if budget[0] <= 0 else f"{len(text) - self._max_length} more characters"
+            text = f"{text[:self._max_length]}... ({rest})"
+        return text
+
+
+class PayloadLogger:
+    """Logs messages with payload details on the agent's hot paths.
+
+    A detail costs a level check when its level is disabled or when details are turned off; otherwise the payload is
+    formatted lazily through LazyFormat. Details can be turned on and off at runtime.
+
+    :param logger: The logger that the records are sent to
+    :param enabled: Whether payload details are logged
+    :param payload_limit: The number of characters logged per payload; 0 logs whole payloads
+    """
+
+    def __init__(self,
+                 logger: logging.Logger,
+                 enabled: bool = True,
+                 payload_limit: int = DEFAULT_LOG_PAYLOAD_LIMIT) -> None:
+        self.logger = logger
+        self.enabled = enabled
+        self.payload_limit = payload_limit
+
+    def detail(self, level: int, msg: str, payload: Union[Any, Callable[[], Any]], *args) -> None:
+        """Log a %-style message followed by a payload.
+
+        :param level: The logging level
+        :param msg: The message; its arguments are passed in args
+        :param payload: The payload, or a callable without arguments that returns it
+        """
+        if self.enabled and self.logger.isEnabledFor(level):
+            self.logger.log(level, f"{msg}\n %s", *args, LazyFormat(payload, self.payload_limit))
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from concurrent.futures import Future
+from typing import Any, Callable, Coroutine
+
+from gevent.event import AsyncResult
+
+import asyncio
+import collections
+import gevent
+import logging
+import threading
+
+_log = logging.getLogger(__name__)
+
+
+class GeventDispatcher:
+    """Hands callables from other OS threads to the gevent hub of the thread that created the dispatcher.
+
+    Callables are queued and the hub is woken through a gevent async watcher, which is safe to signal from any thread.
+    Queued callables run in order on a single greenlet. Callables dispatched from the gevent thread itself run
+    immediately. Once the dispatcher is closed, dispatching from another thread raises RuntimeError, since the
+    callable would never run.
+    """
+
+    def __init__(self) -> None:
+        self._thread_id = threading.get_ident()
+        self._pending = collections.deque()
+        self._draining = False
+        self._closed = False
+        self._watcher = gevent.get_hub().loop.async_(ref=False)
+        self._watcher.start(self._on_wakeup)
+
+    def dispatch(self, fn: Callable, *args) -> None:
+        if threading.get_ident() == self._thread_id:
+            fn(*args)
+            return
+        if self._closed:
+            raise RuntimeError("The dispatcher is closed")
+        self._pending.append((fn, args))
+        self._watcher.send()
+
+    def close(self) -> None:
+        self._closed = True
+        self._watcher.close()
+
+    def _on_wakeup(self) -> None:
+        if not self._draining:
+            self._draining = True
+            gevent.spawn(self._drain)
+
+    def _drain(self) -> None:
+        try:
+            while self._pending:
+                fn, args = self._pending.popleft()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    _log.exception(f"Error while running {fn} on the gevent hub: {e}")
+        finally:
+            self._draining = False
+
+
+class AsyncioLoopThread:
+    """Runs an asyncio event loop on a dedicated OS thread so that long polls and TLS handshakes never block the
+    gevent hub that services the agent's RPC, config store and pubsub subsystems.
+
+    The thread can be started again after it was stopped, with a new event loop; objects bound to the previous loop,
+    such as clients and their sessions, have to be created again.
+
+    :param dispatcher: The dispatcher used to hand results back to the gevent side
+    :param name: The name of the thread
+    """
+
+    def __init__(self, dispatcher: GeventDispatcher, name: str = "openadr-ven-asyncio") -> None:
+        self.dispatcher = dispatcher
+        self.loop = asyncio.new_event_loop()
+        self._name = name
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        if self._thread.ident is not None:
+            # a thread can only run once; a stopped loop thread starts over with a new loop
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    def in_loop_thread(self) -> bool:
+        return threading.get_ident() == self._thread.ident
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop from any thread.
+
+        :param coro: The coroutine to run
+        :return: A concurrent.futures.Future for the result of the coroutine
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, fn: Callable, *args) -> None:
+        """Run a plain callable on the loop thread without waiting for it; callables run in the order they are passed.
+
+        The callable runs inline if the loop thread has not been started yet or if it is called from the loop thread.
+        """
+        if not self.is_running() or self.in_loop_thread():
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+    def call(self, fn: Callable, *args, timeout: float = 30) -> Any:
+        """Run a plain callable on the loop thread and cooperatively wait for its result from the gevent thread.
+
+        The callable runs inline if the loop thread has not been started yet or if it is called from the loop thread.
+
+        :param fn: The callable
+        :param timeout: How long to wait for the result, in seconds
+        :return: The result of the callable
+        """
+        if not self.is_running() or self.in_loop_thread():
+            return fn(*args)
+
+        result = AsyncResult()
+
+        def _run():
+            try:
+                value = fn(*args)
+            except BaseException as e:
+                self.dispatcher.dispatch(result.set_exception, e)
+            else:
+                self.dispatcher.dispatch(result.set, value)
+
+        self.loop.call_soon_threadsafe(_run)
+        return result.get(timeout=timeout)
+
+    def wait(self, coro: Coroutine, timeout: float = 30) -> Any:
+        """Run a coroutine on the loop and cooperatively wait for its result from the gevent thread.
+
+        :param coro: The coroutine to run
+        :param timeout: How long to wait for the result, in seconds
+        :return: The result of the coroutine
+        """
+        result = AsyncResult()
+
+        def _done(future: Future):
+            if future.cancelled():
+                self.dispatcher.dispatch(result.set_exception, asyncio.CancelledError())
+            elif future.exception() is not None:
+                self.dispatcher.dispatch(result.set_exception, future.exception())
+            else:
+                self.dispatcher.dispatch(result.set, future.result())
+
+        self.submit(coro).add_done_callback(_done)
+        return result.get(timeout=timeout)
+
+    def stop(self, timeout: float = 5) -> None:
+        """Stop the loop, cancel the tasks that are still pending and cooperatively wait for the thread to finish.
+
+        The thread is joined from gevent's thread pool, so that other greenlets keep running while the loop winds down.
+        """
+        if self.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            gevent.get_hub().threadpool.apply(self._thread.join, (timeout, ))
+            if self._thread.is_alive():
+                _log.warning(f"The asyncio loop thread did not stop within {timeout} seconds.")
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
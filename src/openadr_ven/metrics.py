@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import threading
+import time
+
+# upper bounds, in seconds, of the buckets of the latency histograms
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+
+
+# Values are updated without locking to keep the hot paths cheap, so each labelled value must only be updated from one
+# thread, e.g. the asyncio loop thread or the gevent hub; other threads can read them at any time.
+class _CounterValue:
+    __slots__ = ("value", )
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        # one count per bucket plus one for values above the last bound; made cumulative when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Return the value of the metric for a combination of label values, creating it on first use."""
+        value = self._values.get(values)
+        if value is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} has the labels {self.labelnames}")
+            with self._lock:
+                value = self._values.setdefault(values, self._new_value())
+        return value
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def _label_string(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    """A count that only goes up, e.g. of handled events."""
+    kind = "counter"
+
+    def _new_value(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._label_string(values)} {_format(value.value)}"
+                for values, value in list(self._values.items())]
+
+    def snapshot(self) -> Dict:
+        return {",".join(values): value.value for values, value in list(self._values.items())}
+
+
+class Histogram(_Metric):
+    """Counts observations, e.g. latencies, in buckets with fixed upper bounds."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = []
+        for values, value in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"), ), value.counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_format(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_string(values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_string(values)} {_format(value.sum)}")
+            lines.append(f"{self.name}_count{self._label_string(values)} {value.count}")
+        return lines
+
+    def snapshot(self) -> Dict:
+        return {
+            ",".join(values): {
+                "count": value.count,
+                "sum": value.sum,
+                "mean": value.sum / value.count if value.count else 0.0,
+            }
+            for values, value in list(self._values.items())
+        }
+
+
+class MetricsRegistry:
+    """A set of counters and histograms that is rendered in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict:
+        """Return the current values of all metrics, keyed by metric name and comma-separated label values."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+
+class VenMetrics(MetricsRegistry):
+    """The metrics of the VEN agent and its clients."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.poll_seconds = self.histogram("openadr_ven_poll_seconds",
+                                           "Round-trip time of polls of the VTN, including the handling of the "
+                                           "response", ["ven_name"])
+        self.poll_errors = self.counter("openadr_ven_poll_errors_total", "Polls that failed or raised an error",
+                                        ["ven_name"])
+        self.registration_seconds = self.histogram("openadr_ven_registration_seconds",
+                                                   "Time taken to register with the VTN", ["ven_name"])
+        self.events_received = self.counter("openadr_ven_events_received_total",
+                                            "New and changed events received from the VTN", ["ven_name"])
+        self.event_publish_seconds = self.histogram("openadr_ven_event_publish_seconds",
+                                                    "Time from the receipt of an event to its publish on the "
+                                                    "message bus", ["ven_name"])
+        self.parse_event_seconds = self.histogram("openadr_ven_parse_event_seconds",
+                                                  "Time taken to convert an event into its published payload")
+        self.report_callback_seconds = self.histogram("openadr_ven_report_callback_seconds",
+                                                      "Time taken by report callbacks", ["ven_name", "resource_id"])
+        self.reconfigurations = self.counter("openadr_ven_reconfigurations_total",
+                                             "VEN client configurations, by how they were applied: 'new', "
+                                             "'updated' in place or 'restarted'", ["ven_name", "kind"])
+        self.signature_verifications = self.counter("openadr_ven_signature_verifications_total",
+                                                    "Signed VTN messages, by whether their signature and replay "
+                                                    "protection were 'verified' or 'rejected'",
+                                                    ["ven_name", "result"])
+
+
+def timed(histogram_value: _HistogramValue, fn: Callable) -> Callable:
+    """Wrap a callable so that the duration of every call is observed by a histogram.
+
+    The wrapper reports the signature of the callable, which openleadr inspects to check report callbacks.
+    """
+
+    @wraps(fn)
+    def _timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            histogram_value.observe(time.perf_counter() - started)
+
+    return _timed
+
+
+def _format(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,526 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from volttron.utils import format_timestamp, jsonapi, parse_timestamp_string
+
+from array import array
+from dataclasses import fields, is_dataclass
+from datetime import timedelta, datetime, date, time, timezone
+from itertools import repeat
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import hashlib
+import sys
+
+if TYPE_CHECKING:
+    from openleadr.objects import Event
+
+
+def _identity(x):
+    return x
+
+
+def _to_str(x):
+    return str(x)
+
+
+def _to_int(x):
+    return int(x)
+
+
+def _to_float(x):
+    return float(x)
+
+
+def _timedelta_to_primitive(x):
+    return int(x.total_seconds())
+
+
+def _datetime_to_primitive(x):
+    # datetime.isoformat produces the same string as format_timestamp, only faster, unless the UTC offset has a
+    # seconds component (which format_timestamp truncates) or the year has fewer than four digits
+    offset = x.utcoffset()
+    if x.year >= 1000 and (offset is None or not offset.seconds % 60 and not offset.microseconds):
+        return x.isoformat(timespec="microseconds")
+    return format_timestamp(x)
+
+
+def _isoformat(x):
+    return x.isoformat()
+
+
+def _timezone_to_primitive(x):
+    return int(x.utcoffset(None).total_seconds())
+
+
+def _unknown_to_primitive(x):
+    # objects that cannot otherwise be serialized are published as null
+    return None
+
+
+def _key_to_primitive(key):
+    # mirrors how the json module coerces non-string dictionary keys
+    if isinstance(key, str):
+        return key if key.__class__ is str else str(key)
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, (int, float)):
+        return str(key)
+    return str(_to_primitive(key))
+
+
+def _dict_to_primitive(x):
+    # _to_primitive is inlined in the two container converters below because they dominate the cost on events with
+    # many intervals
+    get_converter = _CONVERTERS.get
+    result = {}
+    for k, v in x.items():
+        converter = get_converter(v.__class__) or _resolve_converter(v.__class__)
+        result[k if k.__class__ is str else _key_to_primitive(k)] = converter(v)
+    return result
+
+
+def _sequence_to_primitive(x):
+    get_converter = _CONVERTERS.get
+    return [(get_converter(v.__class__) or _resolve_converter(v.__class__))(v) for v in x]
+
+
+def _dataclass_to_primitive(x):
+    return {f.name: _to_primitive(getattr(x, f.name)) for f in fields(x)}
+
+
+# Converters keyed by the exact class of the value; classes that are not listed here are resolved once through
+# _resolve_converter and then cached, so every later value of that class is dispatched with a single dict lookup.
+_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    str: _identity,
+    int: _identity,
+    float: _identity,
+    bool: _identity,
+    type(None): _identity,
+    dict: _dict_to_primitive,
+    list: _sequence_to_primitive,
+    tuple: _sequence_to_primitive,
+    datetime: _datetime_to_primitive,
+    date: _isoformat,
+    time: _isoformat,
+    timedelta: _timedelta_to_primitive,
+    timezone: _timezone_to_primitive,
+}
+
+
+def _resolve_converter(cls: type) -> Callable[[Any], Any]:
+    # the order of these checks matters: bool is a subclass of int and datetime is a subclass of date
+    if issubclass(cls, str):
+        converter = _to_str
+    elif issubclass(cls, bool):
+        converter = _identity
+    elif issubclass(cls, int):
+        converter = _to_int
+    elif issubclass(cls, float):
+        converter = _to_float
+    elif issubclass(cls, dict):
+        converter = _dict_to_primitive
+    elif issubclass(cls, (list, tuple)):
+        converter = _sequence_to_primitive
+    elif issubclass(cls, timedelta):
+        converter = _timedelta_to_primitive
+    elif issubclass(cls, datetime):
+        converter = _datetime_to_primitive
+    elif issubclass(cls, (date, time)):
+        converter = _isoformat
+    elif issubclass(cls, timezone):
+        converter = _timezone_to_primitive
+    elif is_dataclass(cls):
+        converter = _dataclass_to_primitive
+    else:
+        converter = _unknown_to_primitive
+    _CONVERTERS[cls] = converter
+    return converter
+
+
+def _to_primitive(obj: Any) -> Any:
+    """Recursively convert an object into JSON-compatible python primitives in a single pass.
+
+    :param obj: The object to convert, e.g. an Event or any of its members
+    :return: The converted object
+    """
+    converter = _CONVERTERS.get(obj.__class__)
+    if converter is None:
+        converter = _resolve_converter(obj.__class__)
+    return converter(obj)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_COMPACT_INTERVAL_KEYS = frozenset(("dtstart", "duration", "uid", "signal_payload"))
+
+
+def as_datetime(value) -> Optional[datetime]:
+    """Return a date of an event as a datetime; parsed payloads hold dates as strings."""
+    if isinstance(value, str):
+        return parse_timestamp_string(value)
+    return value if isinstance(value, datetime) else None
+
+
+def as_timedelta(value) -> Optional[timedelta]:
+    """Return a duration of an event as a timedelta; parsed payloads hold durations as seconds."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return timedelta(seconds=value)
+    return value if isinstance(value, timedelta) else None
+
+
+def _intern(x):
+    # strings of converted events are interned, so that the signal names, types and units and the other strings that
+    # every event repeats are held once
+    if x.__class__ is str:
+        return sys.intern(x)
+    if x.__class__ is dict:
+        return {sys.intern(k): _intern(v) for k, v in x.items()}
+    if x.__class__ is list:
+        return [_intern(v) for v in x]
+    return x
+
+
+def _start_column(values: List) -> Optional[Tuple[timezone, array]]:
+    # dates must share a fixed UTC offset, and dates of parsed payloads must format back to the same string
+    tz = None
+    starts = array("q")
+    for value in values:
+        if value.__class__ is str:
+            parsed = datetime.fromisoformat(value)
+            if _datetime_to_primitive(parsed) != value:
+                return None
+            value = parsed
+        elif value.__class__ is not datetime:
+            return None
+        if tz is None:
+            tz = value.tzinfo
+            if tz.__class__ is not timezone:
+                return None
+        elif value.tzinfo != tz:
+            return None
+        starts.append((value - _EPOCH) // _MICROSECOND)
+    return tz, starts
+
+
+def _duration_column(values: List) -> Optional[array]:
+    durations = array("q")
+    for value in values:
+        if value.__class__ is timedelta:
+            durations.append(value // _MICROSECOND)
+        elif value.__class__ is int:
+            durations.append(value * 1000000)
+        else:
+            return None
+    return durations
+
+
+def _number_column(values: List) -> Optional[array]:
+    cls = values[0].__class__
+    if cls is not float and cls is not int or any(value.__class__ is not cls for value in values):
+        return None
+    return array("d" if cls is float else "q", values)
+
+
+def _uid_column(values: List):
+    if all(value.__class__ is int for value in values):
+        return array("q", values)
+    if all(value.__class__ is str for value in values):
+        return tuple(sys.intern(value) for value in values)
+    return None
+
+
+class CompactSignal:
+    """A signal of an event whose intervals are held in arrays rather than as one dict per interval.
+
+    Interval starts are held as microseconds since the epoch together with the UTC offset of the signal, durations as
+    microseconds, uids as integers and payloads as doubles or integers. The other members of the signal are kept as
+    primitives with interned strings. Intervals that do not fit the arrays, e.g. because their payloads mix types or
+    they carry other members, are kept as primitives instead.
+
+    :param signal: A signal of an event received from the VTN, or of its parsed payload
+    """
+
+    __slots__ = ("signal_name", "signal_type", "signal_id", "_fields", "_keys", "_tz", "_starts", "_durations",
+                 "_uids", "_payloads", "_intervals")
+
+    def __init__(self, signal: Dict) -> None:
+        fields = {}
+        for key, value in signal.items():
+            fields[_key_to_primitive(key)] = None if key == "intervals" else _to_primitive(value)
+        self._fields = _intern(fields)
+        self.signal_name = self._fields.get("signal_name")
+        self.signal_type = self._fields.get("signal_type")
+        self.signal_id = self._fields.get("signal_id")
+        self._keys = self._tz = self._starts = self._durations = self._uids = self._payloads = None
+        self._intervals = None
+        intervals = signal.get("intervals")
+        if intervals.__class__ not in (list, tuple):
+            if "intervals" in signal:
+                self._fields["intervals"] = _intern(_to_primitive(intervals))
+        elif not self._compact(intervals):
+            self._intervals = tuple(_intern(_to_primitive(intervals)))
+
+    def _compact(self, intervals: List) -> bool:
+        if not intervals or intervals[0].__class__ is not dict:
+            return False
+        keys = tuple(intervals[0])
+        if not keys or not _COMPACT_INTERVAL_KEYS.issuperset(keys):
+            return False
+        columns = {key: [] for key in keys}
+        for interval in intervals:
+            if interval.__class__ is not dict or interval.keys() != columns.keys():
+                return False
+            for key, value in interval.items():
+                columns[key].append(value)
+        try:
+            if "dtstart" in columns:
+                start_column = _start_column(columns["dtstart"])
+                if start_column is None:
+                    return False
+                self._tz, self._starts = start_column
+            if "duration" in columns:
+                self._durations = _duration_column(columns["duration"])
+                if self._durations is None:
+                    return False
+            if "uid" in columns:
+                self._uids = _uid_column(columns["uid"])
+                if self._uids is None:
+                    return False
+            if "signal_payload" in columns:
+                self._payloads = _number_column(columns["signal_payload"])
+                if self._payloads is None:
+                    return False
+        except (ValueError, OverflowError):
+            self._tz = self._starts = self._durations = self._uids = self._payloads = None
+            return False
+        self._keys = tuple(sys.intern(key) for key in keys)
+        return True
+
+    def __len__(self) -> int:
+        if self._intervals is not None:
+            return len(self._intervals)
+        if self._keys is None:
+            return 0
+        return len(next(column for column in (self._starts, self._durations, self._uids, self._payloads)
+                        if column is not None))
+
+    def intervals(self) -> Iterator[Tuple[Optional[datetime], Optional[timedelta], Any, Any]]:
+        """Yield the dtstart, duration, uid and signal_payload of every interval; members that an interval does not
+        have are None."""
+        if self._keys is None:
+            for interval in self._intervals or ():
+                interval = interval if isinstance(interval, dict) else {}
+                yield (as_datetime(interval.get("dtstart")), as_timedelta(interval.get("duration")),
+                       interval.get("uid"), interval.get("signal_payload"))
+            return
+        size = len(self)
+        epoch = _EPOCH.astimezone(self._tz) if self._starts is not None else None
+        starts = (epoch + timedelta(microseconds=us) for us in self._starts) if epoch is not None \
+            else repeat(None, size)
+        durations = (timedelta(microseconds=us) for us in self._durations) if self._durations is not None \
+            else repeat(None, size)
+        uids = self._uids if self._uids is not None else repeat(None, size)
+        payloads = self._payloads if self._payloads is not None else repeat(None, size)
+        yield from zip(starts, durations, uids, payloads)
+
+    def interval(self, position: int) -> Tuple[Optional[datetime], Optional[timedelta], Any, Any]:
+        """Return the dtstart, duration, uid and signal_payload of the interval at a position, as intervals() does."""
+        if self._keys is None:
+            interval = self._intervals[position]
+            interval = interval if isinstance(interval, dict) else {}
+            return (as_datetime(interval.get("dtstart")), as_timedelta(interval.get("duration")),
+                    interval.get("uid"), interval.get("signal_payload"))
+        return (
+            _EPOCH.astimezone(self._tz) + timedelta(microseconds=self._starts[position])
+            if self._starts is not None else None,
+            timedelta(microseconds=self._durations[position]) if self._durations is not None else None,
+            self._uids[position] if self._uids is not None else None,
+            self._payloads[position] if self._payloads is not None else None,
+        )
+
+    def payload_values(self) -> Iterable:
+        """Return the signal_payload of every interval."""
+        if self._keys is None:
+            return [interval.get("signal_payload") for interval in self._intervals or () if isinstance(interval, dict)]
+        return self._payloads if self._payloads is not None else ()
+
+    def to_payload(self) -> Dict:
+        """Return the signal as JSON-compatible python primitives, as it is published."""
+        payload = _to_primitive(self._fields)
+        if self._keys is not None:
+            payload["intervals"] = self._interval_payloads()
+        elif self._intervals is not None:
+            payload["intervals"] = _to_primitive(self._intervals)
+        return payload
+
+    def _interval_payloads(self) -> List[Dict]:
+        columns = []
+        for key in self._keys:
+            if key == "dtstart":
+                epoch = _EPOCH.astimezone(self._tz)
+                columns.append([_datetime_to_primitive(epoch + timedelta(microseconds=us)) for us in self._starts])
+            elif key == "duration":
+                columns.append([int(us / 1000000) for us in self._durations])
+            elif key == "uid":
+                columns.append(self._uids)
+            else:
+                columns.append(self._payloads)
+        keys = self._keys
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+    def _update_hash(self, digest) -> None:
+        digest.update(jsonapi.dumps(self._fields, sort_keys=True).encode("utf-8"))
+        if self._keys is None:
+            digest.update(jsonapi.dumps(self._intervals, sort_keys=True).encode("utf-8"))
+            return
+        offset = self._tz.utcoffset(None) // _MICROSECOND if self._tz is not None else None
+        digest.update(repr((self._keys, offset)).encode("utf-8"))
+        for column in (self._starts, self._durations, self._uids, self._payloads):
+            if isinstance(column, array):
+                digest.update(column.typecode.encode("utf-8"))
+                digest.update(column.tobytes())
+            elif column is not None:
+                digest.update(jsonapi.dumps(column).encode("utf-8"))
+
+
+class EventStatus:
+    """Statuses of an event over its lifetime, as the agent derives them from its active period; see
+    OpenADREvent.status."""
+    PENDING = "pending"
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+
+class OpenADREvent:
+    """An event received from the VTN, converted once into a compact representation.
+
+    The signals of the event are held as CompactSignals and its other members as primitives with interned strings, so
+    that neither the openleadr event nor a parsed copy of it has to be kept. The payload that is published is rebuilt
+    from this representation when it is needed.
+
+    :param event: The event sent from a VTN
+    """
+
+    __slots__ = ("_fields", "_signals", "_start", "_end")
+
+    def __init__(self, event: "Event"):
+        if event.__class__ is not dict:
+            event = _to_primitive(event)
+        fields = {}
+        signals = None
+        for key, value in event.items():
+            if key == "event_signals" and value.__class__ in (list, tuple):
+                value = [signal if signal.__class__ is dict else _to_primitive(signal) for signal in value]
+                if all(signal.__class__ is dict for signal in value):
+                    fields[key] = None
+                    signals = tuple(CompactSignal(signal) for signal in value)
+                    continue
+            fields[_key_to_primitive(key)] = _to_primitive(value)
+        self._fields = _intern(fields)
+        self._signals = signals
+
+        active_period = event.get("active_period")
+        active_period = active_period if isinstance(active_period, dict) else {}
+        self._start = as_datetime(active_period.get("dtstart"))
+        duration = as_timedelta(active_period.get("duration"))
+        self._end = self._start + duration if self._start is not None and duration else None
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "OpenADREvent":
+        """Recreate an event from its parsed payload, e.g. one read back from the event store."""
+        return cls(payload)
+
+    @property
+    def descriptor(self) -> Dict:
+        """The event_descriptor of the event, as primitives; must be treated as read-only."""
+        return self._fields.get("event_descriptor") or {}
+
+    @property
+    def active_period(self) -> Dict:
+        """The active_period of the event, as primitives; must be treated as read-only."""
+        return self._fields.get("active_period") or {}
+
+    @property
+    def signals(self) -> Tuple[CompactSignal, ...]:
+        return self._signals or ()
+
+    def time_span(self) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Return the start and end of the active period; the end is None for events with a zero duration."""
+        return self._start, self._end
+
+    @property
+    def end_time(self) -> Optional[datetime]:
+        """The end of the active period; None for events with a zero duration, which run until they are cancelled."""
+        return self._end
+
+    def status(self, now: datetime) -> str:
+        """Return the EventStatus of the event at a point in time: 'cancelled' once the VTN cancelled it, otherwise
+        'pending' before its active period, 'active' during it and 'completed' after it."""
+        if self.descriptor.get("event_status") == EventStatus.CANCELLED:
+            return EventStatus.CANCELLED
+        if self._start is not None and now < self._start:
+            return EventStatus.PENDING
+        if self._end is not None and now >= self._end:
+            return EventStatus.COMPLETED
+        return EventStatus.ACTIVE
+
+    def get_event_signals(self):
+        return self._signals[0].to_payload()
+
+    def signal_payloads(self) -> Optional[List[Dict]]:
+        """Return the event_signals of the event, as they are published."""
+        if self._signals is None:
+            return self._fields.get("event_signals")
+        return [signal.to_payload() for signal in self._signals]
+
+    def isTestEvent(self):
+        return self._fields["event_descriptor"]["test_event"]
+
+    def parse_event(self) -> Dict:
+        """Parse event so that it properly displays on message bus.
+
+        The payload is rebuilt on every call, so that it does not have to be held for as long as the event.
+
+        :return: A deserialized Event that is converted into a python object
+        """
+        payload = _to_primitive(self._fields)
+        if self._signals is not None:
+            payload["event_signals"] = [signal.to_payload() for signal in self._signals]
+        return payload
+
+    def content_hash(self) -> str:
+        """Return a hash of the content of the event, which changes whenever its parsed payload does."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(jsonapi.dumps(self._fields, sort_keys=True).encode("utf-8"))
+        for signal in self.signals:
+            signal._update_hash(digest)
+        return digest.hexdigest()
+
+    def get_event_id(self) -> str:
+        return self._fields['event_descriptor']['event_id']
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from typing import Dict, List, NamedTuple, Optional
+
+import asyncio
+import threading
+
+
+class _PendingResponse(NamedTuple):
+    ven_name: str
+    event_id: str
+    future: asyncio.Future
+
+
+class PendingOptResponses:
+    """Opt decisions that wait for a response from a downstream agent, keyed by correlation id.
+
+    A decision is added and awaited on the asyncio loop that handles the event; responses may be resolved from any
+    thread, e.g. from an RPC on the gevent hub, and are handed to the loop through call_soon_threadsafe.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[str, _PendingResponse] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, correlation_id: str, ven_name: str, event_id: str) -> None:
+        """Start waiting for the response to an event; must be called from the loop that awaits the response, before
+        the event is published, so that no response is missed."""
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._pending[correlation_id] = _PendingResponse(ven_name, event_id, future)
+
+    async def wait(self, correlation_id: str, default: str, timeout: float) -> str:
+        """Wait for the response to an event.
+
+        :param correlation_id: The correlation id the event was published with
+        :param default: The decision if no response arrives in time
+        :param timeout: How long to wait for the response, in seconds
+        :return: The response, or the default
+        """
+        with self._lock:
+            pending = self._pending.get(correlation_id)
+        if pending is None:
+            return default
+        try:
+            return await asyncio.wait_for(pending.future, timeout)
+        except asyncio.TimeoutError:
+            return default
+        finally:
+            with self._lock:
+                self._pending.pop(correlation_id, None)
+
+    def resolve(self, opt: str, correlation_id: str = None, ven_name: str = None, event_id: str = None) -> List[str]:
+        """Respond to the events that wait for a response, selected by correlation id or by VEN and event id.
+
+        :return: The correlation ids of the responded events
+        """
+        with self._lock:
+            if correlation_id is not None:
+                pending = self._pending.get(correlation_id)
+                matched = {correlation_id: pending} if pending is not None else {}
+            else:
+                matched = {key: pending for key, pending in self._pending.items()
+                           if pending.event_id == event_id and ven_name in (None, pending.ven_name)}
+        for pending in matched.values():
+            pending.future.get_loop().call_soon_threadsafe(_set_result, pending.future, opt)
+        return list(matched)
+
+    def pending(self, ven_name: Optional[str] = None) -> List[Dict]:
+        """Return the correlation id, VEN name and event id of every event that waits for a response."""
+        with self._lock:
+            return [{"correlation_id": key, "ven_name": pending.ven_name, "event_id": pending.event_id}
+                    for key, pending in self._pending.items() if ven_name in (None, pending.ven_name)]
+
+
+def _set_result(future: asyncio.Future, result: str) -> None:
+    # the wait may have timed out while the response was on its way
+    if not future.done():
+        future.set_result(result)
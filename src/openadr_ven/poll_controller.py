@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from typing import Optional
+
+import random
+
+# outcomes of a poll cycle
+POLL_EMPTY = "empty"
+POLL_EVENTS = "events"
+POLL_ERROR = "error"
+
+# growth of the poll interval per consecutive idle poll and per consecutive failed poll
+IDLE_BACKOFF = 1.5
+ERROR_BACKOFF = 2.0
+
+
+class AdaptivePollController:
+    """Decides how long a VEN waits before its next poll of the VTN.
+
+    While the VEN has active or pending events, or the last poll delivered events, it polls every
+    'active_poll_interval'. While it is idle, the interval grows from 'poll_interval' by IDLE_BACKOFF per poll, and
+    after failed polls it grows exponentially by ERROR_BACKOFF per failure; both are capped at 'max_poll_interval'.
+    Every delay is jittered so that VENs drift apart instead of polling in lockstep, and the first poll is offset by a
+    fraction of the interval, the phase, so that VENs hosted together take turns.
+
+    :param poll_interval: The poll interval in seconds while idle, before backing off
+    :param active_poll_interval: The poll interval in seconds while events are active or pending; defaults to half the
+        poll interval
+    :param max_poll_interval: The longest poll interval in seconds; defaults to four times the poll interval
+    :param jitter: The share by which every delay is randomly lengthened or shortened
+    :param phase: The offset of the first poll, as a fraction of the poll interval
+    :param seed: The seed of the jitter, e.g. for tests
+    """
+
+    def __init__(self,
+                 poll_interval: float,
+                 active_poll_interval: Optional[float] = None,
+                 max_poll_interval: Optional[float] = None,
+                 jitter: float = 0.1,
+                 phase: float = 0.0,
+                 seed: Optional[int] = None) -> None:
+        self._random = random.Random(seed)
+        self.phase = phase
+        self._idle_polls = 0
+        self._failures = 0
+        self.configure(poll_interval, active_poll_interval, max_poll_interval, jitter)
+
+    def configure(self,
+                  poll_interval: float,
+                  active_poll_interval: Optional[float] = None,
+                  max_poll_interval: Optional[float] = None,
+                  jitter: float = 0.1) -> None:
+        """Change the intervals; takes effect from the next delay."""
+        if poll_interval <= 0:
+            raise ValueError("poll_interval must be positive.")
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter must be at least 0 and less than 1.")
+        self.poll_interval = float(poll_interval)
+        self.active_poll_interval = float(active_poll_interval or poll_interval / 2)
+        self.max_poll_interval = float(max_poll_interval or poll_interval * 4)
+        if not 0 < self.active_poll_interval <= self.poll_interval <= self.max_poll_interval:
+            raise ValueError("The poll intervals must satisfy 0 < active_poll_interval <= poll_interval <= "
+                             "max_poll_interval.")
+        self.jitter = jitter
+
+    def first_delay(self) -> float:
+        return self.phase * self.poll_interval
+
+    def next_delay(self, outcome: str, active: bool = False) -> float:
+        """Return the delay in seconds until the next poll.
+
+        :param outcome: The outcome of the last poll: POLL_EMPTY, POLL_EVENTS or POLL_ERROR
+        :param active: Whether the VEN has active or pending events
+        """
+        # the counts stop growing once the delay reaches max_poll_interval, so that the backoff never overflows
+        if outcome == POLL_ERROR:
+            delay = self.poll_interval * ERROR_BACKOFF ** (self._failures + 1)
+            if delay < self.max_poll_interval:
+                self._failures += 1
+            delay = min(self.max_poll_interval, delay)
+            # keep at least half of the backoff, so that failing VENs never retry sooner than that
+            return self._random.uniform(delay / 2, delay)
+        self._failures = 0
+        if active or outcome == POLL_EVENTS:
+            self._idle_polls = 0
+            delay = self.active_poll_interval
+        else:
+            delay = self.poll_interval * IDLE_BACKOFF ** self._idle_polls
+            if delay < self.max_poll_interval:
+                self._idle_polls += 1
+            delay = min(self.max_poll_interval, delay)
+        return delay * self._random.uniform(1 - self.jitter, 1 + self.jitter)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from typing import Any, Callable, Deque, List
+
+import asyncio
+import collections
+import logging
+
+_log = logging.getLogger(__name__)
+
+
+class PublishQueue:
+    """Coalesces the items put within a short window into batches, on the asyncio loop of the VEN clients.
+
+    The first item put into an empty queue opens a window; when the window closes, every item put in the meantime is
+    handed to flush as one batch. The queue is bounded: it holds at most max_depth items that are either waiting for
+    their window to close or being published, and put waits for room once it is full, so that a burst of events slows
+    down their handlers instead of growing the queue. A full queue is flushed without waiting for its window to close.
+
+    All methods except done_threadsafe must be called on the loop.
+
+    :param flush: Called with a batch and a callable that must be called, from any thread, once the batch has been
+        published; if flush raises, the batch is dropped and its room is released at once
+    :param window: How long items are coalesced, in seconds
+    :param max_depth: The maximum number of items queued or being published
+    """
+
+    def __init__(self, flush: Callable[[List, Callable[[], None]], None], window: float, max_depth: int) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        if max_depth < 1:
+            raise ValueError("max_depth must be at least 1")
+        self.window = window
+        self.max_depth = max_depth
+        self._flush = flush
+        self._loop = None
+        self._pending: List = []
+        self._depth = 0
+        self._timer = None
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+
+    def __len__(self) -> int:
+        return self._depth
+
+    async def put(self, item: Any) -> None:
+        """Queue an item, waiting for room while the queue is full."""
+        loop = self._loop = asyncio.get_running_loop()
+        while self._depth >= self.max_depth:
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            await waiter
+        self._depth += 1
+        self._pending.append(item)
+        if self._depth >= self.max_depth:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+
+    def flush(self) -> None:
+        """Hand the queued items to flush as one batch without waiting for the window to close."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            self._flush(batch, lambda: self.done_threadsafe(len(batch)))
+        except Exception as e:
+            # the batch never reaches the publisher, so nothing else would release its room
+            _log.exception(f"Dropped a batch of {len(batch)} events that could not be handed over for publishing: {e}")
+            self.done(len(batch))
+
+    def done(self, count: int) -> None:
+        """Release the room of count published items and wake up the puts that wait for room."""
+        self._depth -= count
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def done_threadsafe(self, count: int) -> None:
+        self._loop.call_soon_threadsafe(self.done, count)
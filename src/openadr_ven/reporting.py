@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from openadr_ven.constants import (REPORT_NAME, RESOURCE_ID, MEASUREMENT, UNIT,
+                                   TOPIC, POINT, MIN_SAMPLING_INTERVAL,
+                                   MAX_SAMPLING_INTERVAL, BUFFER_SIZE,
+                                   AGGREGATION, AGGREGATIONS,
+                                   REQUIRED_REPORT_KEYS, DEFAULT_REPORT_NAME,
+                                   DEFAULT_MIN_SAMPLING_INTERVAL,
+                                   DEFAULT_MAX_SAMPLING_INTERVAL,
+                                   DEFAULT_BUFFER_SIZE)
+
+import threading
+
+
+class RingBuffer:
+    """A fixed-size buffer of (timestamp, value) samples backed by two arrays of doubles.
+
+    Once the buffer is full, every new sample overwrites the oldest one, so memory per series stays constant. Samples
+    must be appended in timestamp order; samples older than the newest one are dropped. Appending and reading are
+    safe from different threads.
+
+    :param capacity: The number of samples kept
+    """
+
+    __slots__ = ("capacity", "_timestamps", "_values", "_next", "_count", "_lock")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._timestamps = array("d", [0.0]) * capacity
+        self._values = array("d", [0.0]) * capacity
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: float) -> bool:
+        """Append a sample.
+
+        :return: False if the sample was dropped because it is older than the newest sample
+        """
+        with self._lock:
+            if self._count and timestamp < self._timestamps[self._next - 1]:
+                return False
+            self._timestamps[self._next] = timestamp
+            self._values[self._next] = value
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            return True
+
+    def last(self) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            if not self._count:
+                return None
+            return self._timestamps[self._next - 1], self._values[self._next - 1]
+
+    def window(self, start: float, end: float) -> Tuple[array, array]:
+        """Return the timestamps and values of the samples with start <= timestamp <= end, oldest first."""
+        with self._lock:
+            if self._count < self.capacity:
+                timestamps = self._timestamps[:self._count]
+                values = self._values[:self._count]
+            else:
+                timestamps = self._timestamps[self._next:] + self._timestamps[:self._next]
+                values = self._values[self._next:] + self._values[:self._next]
+        lo = bisect_left(timestamps, start)
+        hi = bisect_right(timestamps, end)
+        return timestamps[lo:hi], values[lo:hi]
+
+
+class AggregateValue:
+    """A running aggregate of the samples of a series received since it was last read.
+
+    Adding a sample and reading the aggregate are both O(1), so openleadr's report callbacks never scan buffered
+    samples. Adding and reading are safe from different threads.
+
+    :param aggregation: One of AGGREGATIONS
+    """
+
+    __slots__ = ("aggregation", "_last", "_sum", "_count", "_min", "_max", "_lock")
+
+    def __init__(self, aggregation: str) -> None:
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"{AGGREGATION} must be one of {AGGREGATIONS}.")
+        self.aggregation = aggregation
+        self._last = None
+        self._reset()
+        self._lock = threading.Lock()
+
+    def _reset(self) -> None:
+        self._sum = 0.0
+        self._count = 0
+        self._min = float("inf")
+        self._max = float("-inf")
+
+    def add(self, value: float) -> None:
+        with self._lock:
+            self._last = value
+            self._sum += value
+            self._count += 1
+            if value < self._min:
+                self._min = value
+            if value > self._max:
+                self._max = value
+
+    def read(self) -> Optional[float]:
+        """Return the aggregate of the samples added since the previous read and start a new window.
+
+        If no sample was added since the previous read, the last value is carried forward, except for 'sum', which is
+        0.0. Returns None until the first sample has been added.
+        """
+        with self._lock:
+            if self._last is None:
+                return None
+            if not self._count:
+                return 0.0 if self.aggregation == "sum" else self._last
+            if self.aggregation == "last":
+                value = self._last
+            elif self.aggregation == "mean":
+                value = self._sum / self._count
+            elif self.aggregation == "min":
+                value = self._min
+            elif self.aggregation == "max":
+                value = self._max
+            else:
+                value = self._sum
+            self._reset()
+            return value
+
+    def report(self):
+        """Read the aggregate as an openleadr report callback in the 'incremental' data collection mode: a value, or
+        an empty list of samples while nothing has been received."""
+        value = self.read()
+        return [] if value is None else value
+
+
+def parse_report_config(report: Dict) -> Dict:
+    """Validates the configuration of a report and fills in the defaults.
+
+    :param report: The configuration of a report
+    :return: The parsed configuration
+    :raises KeyError: if a required key is missing
+    """
+    for required_key in REQUIRED_REPORT_KEYS:
+        if not report.get(required_key):
+            raise KeyError(f"{required_key} is required for every report.")
+    min_sampling_interval = float(report.get(MIN_SAMPLING_INTERVAL, DEFAULT_MIN_SAMPLING_INTERVAL))
+    max_sampling_interval = float(report.get(MAX_SAMPLING_INTERVAL, DEFAULT_MAX_SAMPLING_INTERVAL))
+    if not 0 < min_sampling_interval <= max_sampling_interval:
+        raise ValueError(f"{MIN_SAMPLING_INTERVAL} must be positive and at most {MAX_SAMPLING_INTERVAL}.")
+    aggregation = report.get(AGGREGATION)
+    if aggregation is not None and aggregation not in AGGREGATIONS:
+        raise ValueError(f"{AGGREGATION} must be one of {AGGREGATIONS}.")
+    return {
+        REPORT_NAME: report.get(REPORT_NAME, DEFAULT_REPORT_NAME),
+        RESOURCE_ID: report[RESOURCE_ID],
+        MEASUREMENT: report[MEASUREMENT],
+        UNIT: report.get(UNIT),
+        TOPIC: report[TOPIC].rstrip("/"),
+        POINT: report[POINT],
+        MIN_SAMPLING_INTERVAL: min_sampling_interval,
+        MAX_SAMPLING_INTERVAL: max_sampling_interval,
+        BUFFER_SIZE: int(report.get(BUFFER_SIZE, DEFAULT_BUFFER_SIZE)),
+        AGGREGATION: aggregation,
+    }
+
+
+class TelemetryBuffer:
+    """Buffers the device points that back the VEN's reports, one ring buffer per (topic, point) series.
+
+    Device publishes are recorded as they arrive on the message bus, and openleadr's report requests are answered from
+    the buffers: a single callback per report description returns every sample of the reporting window at once.
+    Series can also feed running aggregates, which answer reports with a single value in O(1).
+    """
+
+    def __init__(self) -> None:
+        self._series: Dict[Tuple[str, str], RingBuffer] = {}
+        self._aggregates: Dict[Tuple[str, str], Dict[Hashable, AggregateValue]] = {}
+        self._points_by_topic: Dict[str, List[str]] = {}
+
+    def topics(self) -> List[str]:
+        return list(self._points_by_topic)
+
+    def add_series(self, topic: str, point: str, capacity: int) -> RingBuffer:
+        """Start buffering a point published on a topic; an existing series is kept and grown if needed."""
+        series = self._series.get((topic, point))
+        if series is not None and series.capacity >= capacity:
+            return series
+        new_series = RingBuffer(capacity)
+        if series is not None:
+            timestamps, values = series.window(float("-inf"), float("inf"))
+            for timestamp, value in zip(timestamps, values):
+                new_series.append(timestamp, value)
+        self._add_point(topic, point)
+        self._series[(topic, point)] = new_series
+        return new_series
+
+    def add_aggregate(self, topic: str, point: str, aggregation: str, key: Hashable) -> AggregateValue:
+        """Start aggregating a point published on a topic.
+
+        Every report reads its own aggregate, identified by a key; adding an aggregate with a key that is already
+        used returns the existing one, so a report offered again by a rebuilt client keeps its window.
+        """
+        aggregates = self._aggregates.setdefault((topic, point), {})
+        aggregate = aggregates.get(key)
+        if aggregate is None or aggregate.aggregation != aggregation:
+            aggregate = aggregates[key] = AggregateValue(aggregation)
+        self._add_point(topic, point)
+        return aggregate
+
+    def remove_topic(self, topic: str) -> None:
+        """Stop buffering and aggregating the points published on a topic."""
+        for point in self._points_by_topic.pop(topic, ()):
+            self._series.pop((topic, point), None)
+            self._aggregates.pop((topic, point), None)
+
+    def _add_point(self, topic: str, point: str) -> None:
+        points = self._points_by_topic.setdefault(topic, [])
+        if point not in points:
+            points.append(point)
+
+    def record(self, topic: str, message: Any, timestamp: datetime) -> int:
+        """Record the buffered points of a device publish.
+
+        Handles both the 'all' publishes of the platform driver, whose message is a [values, metadata] pair with a
+        dict of point values, and single point publishes, whose message is a [value, metadata] pair.
+
+        :return: The number of samples recorded
+        """
+        points = self._points_by_topic.get(topic)
+        if not points:
+            return 0
+        values = message[0] if isinstance(message, list) and message else message
+        ts = timestamp.timestamp()
+        recorded = 0
+        for point in points:
+            value = values.get(point) if isinstance(values, dict) else values
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            value = float(value)
+            series = self._series.get((topic, point))
+            if series is not None and not series.append(ts, value):
+                continue
+            for aggregate in self._aggregates.get((topic, point), {}).values():
+                aggregate.add(value)
+            recorded += 1
+        return recorded
+
+    def last(self, topic: str, point: str) -> Optional[Tuple[float, float]]:
+        """Return the timestamp and value of the latest sample of a series, or None."""
+        series = self._series.get((topic, point))
+        return None if series is None else series.last()
+
+    def samples(self, topic: str, point: str, date_from: datetime, date_to: datetime,
+                sampling_interval: timedelta) -> List[Tuple[datetime, float]]:
+        """Return the buffered samples of a series between two dates, keeping the last sample of every sampling
+        interval.
+
+        This matches the callback signature that openleadr uses for reports in the 'full' data collection mode.
+        """
+        series = self._series.get((topic, point))
+        if series is None:
+            return []
+        start = date_from.timestamp()
+        timestamps, values = series.window(start, date_to.timestamp())
+        interval = sampling_interval.total_seconds()
+        result = []
+        last_bucket = None
+        for timestamp, value in zip(timestamps, values):
+            bucket = int((timestamp - start) // interval) if interval > 0 else timestamp
+            sample = (datetime.fromtimestamp(timestamp, timezone.utc), value)
+            if bucket == last_bucket:
+                result[-1] = sample
+            else:
+                result.append(sample)
+                last_bucket = bucket
+        return result
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from volttron.utils import format_timestamp
+
+from openadr_ven.openadr_event import OpenADREvent
+
+_INFINITY = float("inf")
+
+
+class IntervalIndex:
+    """A sorted index of [start, end) intervals, grouped by key.
+
+    Intervals are kept sorted by start, together with the length of the longest bounded interval, so that the
+    intervals overlapping a time window are found by bisecting the window widened by that length; open-ended
+    intervals are kept aside and always checked. Removing a key rebuilds the index, which suits intervals that are
+    queried far more often than they change.
+    """
+
+    def __init__(self) -> None:
+        # (start, end, sequence, key, item) tuples sorted by start; the sequence keeps items from being compared
+        self._intervals: List[Tuple[float, float, int, Hashable, Any]] = []
+        self._starts: List[float] = []
+        self._open_ended: List[Tuple[float, int, Hashable, Any]] = []
+        self._max_length = 0.0
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._intervals) + len(self._open_ended)
+
+    def add(self, key: Hashable, start: float, end: Optional[float], item: Any) -> None:
+        """Add an interval; an end of None makes it open-ended."""
+        self._sequence += 1
+        if end is None:
+            self._open_ended.append((start, self._sequence, key, item))
+            return
+        position = bisect_right(self._starts, start)
+        self._starts.insert(position, start)
+        self._intervals.insert(position, (start, end, self._sequence, key, item))
+        self._max_length = max(self._max_length, end - start)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove every interval added with a key."""
+        self._intervals = [interval for interval in self._intervals if interval[3] != key]
+        self._starts = [interval[0] for interval in self._intervals]
+        self._open_ended = [interval for interval in self._open_ended if interval[2] != key]
+        self._max_length = max((end - start for start, end, *_ in self._intervals), default=0.0)
+
+    def overlapping(self, start: float, end: float) -> List[Any]:
+        """Return the items of the intervals that overlap [start, end), ordered by start."""
+        lo = bisect_left(self._starts, start - self._max_length)
+        hi = bisect_left(self._starts, end)
+        matches = [(s, seq, item) for s, e, seq, _, item in self._intervals[lo:hi] if e > start]
+        matches.extend((s, seq, item) for s, seq, _, item in self._open_ended if s < end)
+        return [item for *_, item in sorted(matches, key=lambda match: match[:2])]
+
+    def containing(self, timestamp: float) -> List[Any]:
+        """Return the items of the intervals that contain a point in time, ordered by start."""
+        lo = bisect_left(self._starts, timestamp - self._max_length)
+        hi = bisect_right(self._starts, timestamp)
+        matches = [(s, seq, item) for s, e, seq, _, item in self._intervals[lo:hi] if e > timestamp]
+        matches.extend((s, seq, item) for s, seq, _, item in self._open_ended if s <= timestamp)
+        return [item for *_, item in sorted(matches, key=lambda match: match[:2])]
+
+
+def _signal_intervals(event: OpenADREvent) -> Iterator[Tuple[datetime, Optional[datetime], Tuple]]:
+    # yields the start and end of every signal interval with an (event_id, signal, position, start) reference to it;
+    # the start is only held for intervals without a dtstart of their own, as it is found in the signal otherwise
+    start = event.time_span()[0]
+    if start is None:
+        return
+    event_id = event.get_event_id()
+    for signal in event.signals:
+        cursor = start
+        for position, (dtstart, duration, _, _) in enumerate(signal.intervals()):
+            interval_start = dtstart or cursor
+            interval_end = interval_start + duration if duration else None
+            yield interval_start, interval_end, (event_id, signal, position, None if dtstart else interval_start)
+            if interval_end is None:
+                break
+            cursor = interval_end
+
+
+def _interval_value(interval: Tuple) -> Dict:
+    event_id, signal, position, start = interval
+    dtstart, duration, uid, value = signal.interval(position)
+    return {
+        "event_id": event_id,
+        "signal_name": signal.signal_name,
+        "signal_type": signal.signal_type,
+        "signal_id": signal.signal_id,
+        "value": value,
+        "uid": uid,
+        "dtstart": format_timestamp(dtstart or start),
+        "duration": int(duration.total_seconds()) if duration else 0,
+    }
+
+
+def expand_signal_intervals(event: OpenADREvent) -> List[Tuple[datetime, Optional[datetime], Dict]]:
+    """Return the start, end and value of every signal interval of an event, signal by signal.
+
+    Intervals run back to back from the start of the active period unless they carry their own dtstart. The end of an
+    interval with a zero duration is None. The value is a dict with the event_id, signal_name, signal_type, signal_id,
+    value, uid, dtstart and duration of the interval.
+    """
+    return [(start, end, _interval_value(interval)) for start, end, interval in _signal_intervals(event)]
+
+
+class SignalIndex:
+    """Index of the events of a VEN by their active period, and of their signal intervals by time.
+
+    The index holds the compact events and refers to their signals for the values of the intervals; query results
+    are built from them when they are requested. Values of cancelled events are not reported. Events stay in the index
+    until they are removed; the agent removes them once their active period has ended, see EventSweeper.
+    """
+
+    def __init__(self) -> None:
+        self._events: Dict[str, OpenADREvent] = {}
+        self._periods = IntervalIndex()
+        self._intervals = IntervalIndex()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._events
+
+    def get(self, event_id: str) -> Optional[OpenADREvent]:
+        return self._events.get(event_id)
+
+    def events(self) -> List[OpenADREvent]:
+        return list(self._events.values())
+
+    def update(self, event: OpenADREvent) -> None:
+        """Index an event, replacing the previous version of the event."""
+        event_id = event.get_event_id()
+        self.remove(event_id)
+        self._events[event_id] = event
+        start, end = event.time_span()
+        if start is None:
+            return
+        self._periods.add(event_id, start.timestamp(), _timestamp(end), event)
+        if event.descriptor.get("event_status") == "cancelled":
+            return
+        for interval_start, interval_end, interval in _signal_intervals(event):
+            self._intervals.add(event_id, interval_start.timestamp(), _timestamp(interval_end), interval)
+
+    def remove(self, event_id: str) -> None:
+        if self._events.pop(event_id, None) is not None:
+            self._periods.remove(event_id)
+            self._intervals.remove(event_id)
+
+    def events_between(self, start: datetime, end: datetime) -> List[Dict]:
+        """Return the parsed payloads of the events whose active period overlaps [start, end), oldest start first."""
+        return [event.parse_event() for event in self._periods.overlapping(start.timestamp(), end.timestamp())]
+
+    def active_events(self, now: datetime) -> List[Dict]:
+        """Return the parsed payloads of the events that are active at a point in time and not cancelled."""
+        return [
+            event.parse_event() for event in self._periods.containing(now.timestamp())
+            if event.descriptor.get("event_status") != "cancelled"
+        ]
+
+    def signal_values_at(self, timestamp: datetime, signal_name: str = None) -> List[Dict]:
+        """Return the signal intervals that contain a point in time, optionally only those of one signal.
+
+        :return: One dict per interval with the event_id, signal_name, signal_type, signal_id, value, uid, dtstart
+            and duration of the interval
+        """
+        intervals = self._intervals.containing(timestamp.timestamp())
+        return [_interval_value(interval) for interval in intervals
+                if signal_name is None or interval[1].signal_name == signal_name]
+
+
+def _timestamp(dt: Optional[datetime]) -> Optional[float]:
+    return None if dt is None else dt.timestamp()
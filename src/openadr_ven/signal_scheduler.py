@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from volttron.utils import format_timestamp, get_aware_utc_now
+
+from openadr_ven.constants import OPENADR_SIGNAL
+from openadr_ven.signal_index import expand_signal_intervals
+from openadr_ven.openadr_event import OpenADREvent, as_timedelta
+
+import heapq
+import random
+
+RAMP_UP = "ramp_up"
+START = "start"
+END = "end"
+
+
+class SignalScheduler:
+    """Publishes the signal intervals of events when they start and end, from a single timer.
+
+    Every event is expanded into the transitions of its signals: a 'start' message when an interval starts, an 'end'
+    message when the last interval of a run ends, and a 'ramp_up' message ahead of the first interval if the event
+    has a ramp-up period. When an event allows a randomized start ('tolerance.tolerate.startafter'), all its
+    transitions are shifted by a random offset within that window; the offset is derived from the VEN name and the
+    event id, so it stays the same when the event is modified. Transitions are published on
+    'openadr/signal/<ven_name>/<signal_name>'.
+
+    The transitions of all events are kept in one heap, and only the earliest one is scheduled with the timer. When an
+    event is modified or cancelled, the transitions of the previous version are dropped, and signals whose current
+    state differs from what was last published for the event are published right away.
+
+    :param publish: Called with the topic and the message of every transition
+    :param schedule: Called with a deadline and a callback to set the timer; returns an object with a cancel() method
+    :param clock: Returns the current time
+    """
+
+    def __init__(self,
+                 publish: Callable[[str, Dict], None],
+                 schedule: Callable[[datetime, Callable[[], None]], Any],
+                 clock: Callable[[], datetime] = get_aware_utc_now) -> None:
+        self._publish = publish
+        self._schedule = schedule
+        self._clock = clock
+        # (time, sequence, key, version, signal_name, message); entries of replaced versions are skipped lazily
+        self._heap: List[Tuple[float, int, Tuple[str, str], int, str, Dict]] = []
+        self._sequence = 0
+        # per (ven_name, event_id): the current version, the number of its transitions still pending, and the last
+        # message published per signal
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._pending: Dict[Tuple[str, str], int] = {}
+        self._published: Dict[Tuple[str, str], Dict[str, Dict]] = {}
+        self._timer = None
+        self._timer_deadline = None
+
+    def __len__(self) -> int:
+        """The number of transitions still to be published."""
+        return sum(self._pending.values())
+
+    def update(self, ven_name: str, event: OpenADREvent) -> None:
+        """Schedule the transitions of a new or modified event, replacing those of its previous version."""
+        key = (ven_name, event.get_event_id())
+        self._sequence += 1
+        version = self._versions[key] = self._sequence
+        now = self._clock().timestamp()
+
+        current: Dict[str, Tuple[float, Dict]] = {}
+        pending = 0
+        for when, signal_name, message in self._transitions(ven_name, event):
+            if when <= now:
+                if signal_name not in current or current[signal_name][0] <= when:
+                    current[signal_name] = (when, message)
+                continue
+            self._sequence += 1
+            heapq.heappush(self._heap, (when, self._sequence, key, version, signal_name, message))
+            pending += 1
+
+        # bring the signals up to date: publish the interval in progress, or end a signal that no longer runs
+        published = self._published.setdefault(key, {})
+        for signal_name in list(published) + [name for name in current if name not in published]:
+            message = current.get(signal_name, (None, None))[1]
+            last = published.get(signal_name)
+            if message is None:
+                if last is None or last["state"] == END:
+                    continue
+                message = {**last, "state": END, "value": None}
+            elif last is None and message["state"] == END:
+                continue
+            if last is None or _transition(last) != _transition(message):
+                self._fire(key, signal_name, message)
+
+        self._set_pending(key, pending)
+        self._reschedule()
+
+    def remove(self, ven_name: str, event_id: str = None) -> None:
+        """Drop the pending transitions of an event, or of all events of a VEN, without publishing anything."""
+        for key in [k for k in self._versions if k[0] == ven_name and event_id in (None, k[1])]:
+            del self._versions[key]
+            self._pending.pop(key, None)
+            self._published.pop(key, None)
+        self._reschedule()
+
+    def run_due(self) -> int:
+        """Publish the transitions whose time has come and set the timer for the next one.
+
+        :return: The number of published transitions
+        """
+        self._timer = self._timer_deadline = None
+        now = self._clock().timestamp()
+        fired = 0
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, version, signal_name, message = heapq.heappop(self._heap)
+            if self._versions.get(key) != version:
+                continue
+            self._fire(key, signal_name, message)
+            self._set_pending(key, self._pending[key] - 1)
+            fired += 1
+        self._reschedule()
+        return fired
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._timer_deadline = None
+
+    def _fire(self, key: Tuple[str, str], signal_name: str, message: Dict) -> None:
+        self._published[key][signal_name] = message
+        self._publish(f"{OPENADR_SIGNAL}/{key[0]}/{signal_name}", message)
+
+    def _set_pending(self, key: Tuple[str, str], pending: int) -> None:
+        self._pending[key] = pending
+        # forget an event once all its transitions are published and none of its signals is still running
+        if not pending and all(m["state"] == END for m in self._published.get(key, {}).values()):
+            del self._versions[key]
+            del self._pending[key]
+            self._published.pop(key, None)
+
+    def _reschedule(self) -> None:
+        heap = self._heap
+        while heap and self._versions.get(heap[0][2]) != heap[0][3]:
+            heapq.heappop(heap)
+        deadline = heap[0][0] if heap else None
+        if deadline == self._timer_deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._timer_deadline = deadline
+        if deadline is not None:
+            self._timer = self._schedule(datetime.fromtimestamp(deadline, timezone.utc), self.run_due)
+
+    @staticmethod
+    def _transitions(ven_name: str, event: OpenADREvent) -> List[Tuple[float, str, Dict]]:
+        descriptor = event.descriptor
+        if descriptor.get("event_status") == "cancelled" or descriptor.get("test_event"):
+            return []
+        active_period = event.active_period
+        offset = timedelta(0)
+        start_after = as_timedelta(_start_after(active_period))
+        if start_after:
+            rng = random.Random(f"{ven_name}/{event.get_event_id()}")
+            offset = timedelta(seconds=rng.uniform(0, start_after.total_seconds()))
+        ramp_up = as_timedelta(active_period.get("ramp_up") or active_period.get("ramp_up_period"))
+
+        transitions = []
+        intervals = expand_signal_intervals(event)
+        for i, (start, end, value) in enumerate(intervals):
+            signal_name = value["signal_name"]
+            start += offset
+            message = {
+                "event_id": value["event_id"],
+                "signal_id": value["signal_id"],
+                "signal_type": value["signal_type"],
+                "state": START,
+                "value": value["value"],
+                "uid": value["uid"],
+                "dtstart": format_timestamp(start),
+                "duration": value["duration"],
+            }
+            previous = intervals[i - 1] if i else None
+            if ramp_up and (previous is None or previous[2]["signal_name"] != signal_name):
+                transitions.append(((start - ramp_up).timestamp(), signal_name, {**message, "state": RAMP_UP}))
+            transitions.append((start.timestamp(), signal_name, message))
+            following = intervals[i + 1] if i + 1 < len(intervals) else None
+            # a run of back to back intervals only ends after its last interval
+            if end is not None and (following is None or following[2]["signal_name"] != signal_name
+                                    or following[0] != end):
+                transitions.append(((end + offset).timestamp(), signal_name, {**message, "state": END, "value": None}))
+        return transitions
+
+
+def _start_after(active_period: Dict) -> Optional[Any]:
+    tolerance = active_period.get("tolerance") or {}
+    return (tolerance.get("tolerate") or tolerance).get("startafter")
+
+
+def _transition(message: Dict) -> Tuple:
+    return message["state"], message["uid"], message["value"]
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+from OpenSSL.crypto import FILETYPE_PEM, X509, load_certificate
+from openleadr import errors, utils
+from openleadr.messaging import VERIFIER, _verify_replay_protect
+
+from openadr_ven.constants import DEFAULT_SIGNATURE_CACHE_SIZE
+
+
+def load_private_key(key: bytes, passphrase: Optional[str] = None):
+    """Parse a PEM-encoded private key once, so that messages can be signed without parsing it again."""
+    return load_pem_private_key(key, password=utils.ensure_bytes(passphrase) if passphrase else None)
+
+
+class SignatureVerifier:
+    """Verifies the XML signatures of the messages received from a VTN, as openleadr does, with the certificates that
+    the messages are signed with parsed and checked against the VTN's fingerprint once, and kept in a bounded LRU cache.
+
+    Verified messages themselves are not cached: every signed message covers its ReplayProtect timestamp and nonce,
+    so a byte-identical copy of a verified message is a replay and is rejected in any case.
+
+    :param vtn_fingerprint: The fingerprint of the VTN's certificate
+    :param cache_size: The number of certificates that are kept
+    """
+
+    def __init__(self, vtn_fingerprint: str, cache_size: int = DEFAULT_SIGNATURE_CACHE_SIZE) -> None:
+        if cache_size < 1:
+            raise ValueError("cache_size must be at least 1")
+        self.vtn_fingerprint = vtn_fingerprint.strip().upper()
+        self.cache_size = cache_size
+        self._certificates: "OrderedDict[str, X509]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def verify(self, tree) -> None:
+        """Verify the signature and the ReplayProtect element of a message.
+
+        :param tree: The parsed message
+        :raises errors.FingerprintMismatch: if the message was signed with another certificate than the VTN's
+        :raises InvalidSignature: if the signature does not match the message
+        :raises ValueError: if the ReplayProtect element is missing, too old or was seen before
+        """
+        VERIFIER.verify(tree, x509_cert=self._certificate(utils.extract_pem_cert(tree)), expect_references=2)
+        _verify_replay_protect(tree)
+
+    def _certificate(self, pem: str) -> X509:
+        certificate = self._certificates.get(pem)
+        if certificate is not None:
+            self._certificates.move_to_end(pem)
+            self.hits += 1
+            return certificate
+        self.misses += 1
+        fingerprint = utils.certificate_fingerprint(pem)
+        if fingerprint != self.vtn_fingerprint:
+            raise errors.FingerprintMismatch("The certificate fingerprint was incorrect. "
+                                             f"Expected: {self.vtn_fingerprint}; "
+                                             f"Received: {fingerprint}. Ignoring message.")
+        certificate = self._certificates[pem] = load_certificate(FILETYPE_PEM, pem.encode("utf-8"))
+        if len(self._certificates) > self.cache_size:
+            self._certificates.popitem(last=False)
+        return certificate
+
+    def stats(self) -> Dict:
+        """Return the hits, misses and hit rate of the certificate cache, and the number of cached certificates."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._certificates),
+        }
@@ -21,9 +21,11 @@
 #
 # ===----------------------------------------------------------------------===
 
+from lxml.etree import XMLSyntaxError
+from openleadr import errors, utils
 from openleadr.client import OpenADRClient
+from openleadr.messaging import parse_message, validate_xml_schema
 from openleadr.objects import Event
-from volttron.utils import (format_timestamp, jsonapi)
 
 from openadr_ven.constants import (
     VEN_NAME,
@@ -37,12 +39,42 @@ from openadr_ven.constants import (
     CA_FILE,
     VEN_ID,
     DISABLE_SIGNATURE,
+    POOL_SIZE,
+    KEEPALIVE_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    ADAPTIVE_POLLING,
+    POLL_INTERVAL,
+    ACTIVE_POLL_INTERVAL,
+    MAX_POLL_INTERVAL,
+    POLL_JITTER,
+    DEFAULT_POLL_JITTER,
+    SIGNATURE_CACHE_SIZE,
+    DEFAULT_SIGNATURE_CACHE_SIZE,
 )
+from openadr_ven.connection_pool import ConnectionPool
+from openadr_ven.metrics import VenMetrics
+from openadr_ven.openadr_event import OpenADREvent  # noqa: F401, imported from here by earlier versions
+from openadr_ven.poll_controller import AdaptivePollController, POLL_EMPTY, POLL_EVENTS, POLL_ERROR
+from openadr_ven.signature import SignatureVerifier
 from openleadr.enums import OPT, REPORT_NAME, MEASUREMENTS
-from datetime import timedelta, datetime, date, time, timezone
-from typing import Callable
+from openleadr.objects import SamplingRate
+from signxml.exceptions import InvalidSignature
+from datetime import timedelta
+from functools import partial
+from http import HTTPStatus
+from time import perf_counter
+from typing import Callable, Dict, Optional
 
 import abc
+import aiohttp
+import asyncio
+import logging
+
+
+_log = logging.getLogger(__name__)
+# messages of the requests that the client performs in place of openleadr are logged as openleadr logs them
+openleadr_log = logging.getLogger("openleadr")
 
 
 class OpenADRReportName(REPORT_NAME):
@@ -63,44 +95,27 @@ class OpenADROpt(OPT):
         super.__init__()
 
 
-class OpenADREvent:
+async def _call_handler(handler: Callable, event: Event):
+    return await utils.await_if_required(handler(event))
 
-    def __init__(self, event: Event):
-        self.event = event
 
-    def get_event_signals(self):
-        return self.event.get("event_signals")[0]
+class VenState:
+    """Readiness states of a VEN client, in the order in which they are normally reached."""
+    CONFIGURED = "configured"
+    REGISTERING = "registering"
+    REGISTERED = "registered"
+    POLLING = "polling"
+    FAILED = "failed"
+    STOPPED = "stopped"
 
-    def isTestEvent(self):
-        return self.event["event_descriptor"]["test_event"]
 
-    def parse_event(self) -> Event:
-        """Parse event so that it properly displays on message bus.
-
-        :param obj: The event received from a VTN
-        :return: A deserialized Event that is converted into a python object
-        """
-
-        # function that gets called for objects that can’t otherwise be serialized.
-        def _default_serialzer(x):
-            if isinstance(x, timedelta):
-                return int(x.total_seconds())
-            elif isinstance(x, datetime):
-                return format_timestamp(x)
-            elif isinstance(x, date):
-                return x.isoformat()
-            elif isinstance(x, time):
-                return x.isoformat()
-            elif isinstance(x, timezone):
-                return int(x.utcoffset().total_seconds())
-            else:
-                return None
-
-        obj_string = jsonapi.dumps(self.event, default=_default_serialzer)
-        return jsonapi.loads(obj_string)
-
-    def get_event_id(self) -> str:
-        return self.event['event_descriptor']['event_id']
+def _poll_settings(config: Dict) -> Dict:
+    return {
+        POLL_INTERVAL: config.get(POLL_INTERVAL),
+        ACTIVE_POLL_INTERVAL: config.get(ACTIVE_POLL_INTERVAL),
+        MAX_POLL_INTERVAL: config.get(MAX_POLL_INTERVAL),
+        POLL_JITTER: config.get(POLL_JITTER, DEFAULT_POLL_JITTER),
+    }
 
 
 class OpenADRClientInterface(metaclass=abc.ABCMeta):
@@ -109,6 +124,14 @@ class OpenADRClientInterface(metaclass=abc.ABCMeta):
     async def run(self):
         pass
 
+    @abc.abstractmethod
+    async def stop(self):
+        pass
+
+    @abc.abstractmethod
+    def update_settings(self, config: Dict):
+        pass
+
     @abc.abstractmethod
     def get_ven_name(self):
         pass
@@ -124,43 +147,456 @@ class OpenADRClientInterface(metaclass=abc.ABCMeta):
         report_name: OpenADRReportName,
         resource_id: str,
         measurement: OpenADRMeasurements,
-    ):
+    ) -> tuple:
+        pass
+
+    @abc.abstractmethod
+    def get_state(self) -> str:
+        pass
+
+    @abc.abstractmethod
+    def set_state_listener(self, listener: Callable[[str], None]):
         pass
 
 
 class VolttronOpenADRClient(OpenADRClientInterface):
 
-    def __init__(self, openadr_client: OpenADRClient) -> None:
+    def __init__(self,
+                 openadr_client: OpenADRClient,
+                 connection_pool: ConnectionPool = None,
+                 owns_connection_pool: bool = False,
+                 metrics: VenMetrics = None,
+                 poll_settings: Dict = None,
+                 poll_phase: float = 0.0,
+                 signature_verifier: SignatureVerifier = None) -> None:
         self._openadr_client = openadr_client
+        # a pool owned by this client is closed when the client stops; a shared pool is left open for other clients
+        if connection_pool is None:
+            connection_pool, owns_connection_pool = ConnectionPool(), True
+        self._connection_pool = connection_pool
+        self._owns_connection_pool = owns_connection_pool
+        self._state = VenState.CONFIGURED
+        self._state_listener = None
+        self._register_reports_task = None
+        # the event handlers added through add_handler, and the handler tasks started for the events of the message
+        # that is being handled, keyed by the id of the event
+        self._event_handlers: Dict[str, Callable] = {}
+        self._event_handler_tasks: Dict[int, asyncio.Future] = {}
+        # with adaptive polling, the poll settings of the configuration, the offset of the first poll as a fraction of
+        # the poll interval, and the task that paces the polls in place of openleadr's fixed schedule
+        self._poll_settings = poll_settings
+        self._poll_phase = poll_phase
+        self._poll_controller = None
+        self._poll_task = None
+        self._poll_failed = False
+        self._poll_received_events = False
+        self._poll_seconds = metrics.poll_seconds.labels(openadr_client.ven_name) if metrics else None
+        self._poll_errors = metrics.poll_errors.labels(openadr_client.ven_name) if metrics else None
+        # verifies the signatures of the VTN's messages in place of openleadr, with the VTN's certificate parsed once
+        self._signature_verifier = signature_verifier
+        if signature_verifier is not None:
+            signatures = metrics.signature_verifications if metrics else None
+            self._signatures_verified = signatures.labels(openadr_client.ven_name, "verified") if signatures else None
+            self._signatures_rejected = signatures.labels(openadr_client.ven_name, "rejected") if signatures else None
+            openadr_client._perform_request = self._perform_request
+
+        # openleadr registers from within run() and again whenever the VTN requests a reregistration, so the
+        # registration coroutine is wrapped to track when the VEN becomes registered
+        create_party_registration = openadr_client.create_party_registration
+        registration_seconds = metrics.registration_seconds.labels(openadr_client.ven_name) if metrics else None
+
+        async def _create_party_registration(*args, **kwargs):
+            started = perf_counter()
+            result = await create_party_registration(*args, **kwargs)
+            if registration_seconds is not None:
+                registration_seconds.observe(perf_counter() - started)
+            if self._openadr_client.registration_id:
+                self._set_state(VenState.REGISTERED)
+            return result
+
+        openadr_client.create_party_registration = _create_party_registration
+
+        # openleadr awaits the handler of each event of a message in turn; the handlers of all new and changed events
+        # are started at once instead, so that a handler that waits, e.g. for a deferred opt response, does not hold up
+        # the other events of the message
+        on_event = openadr_client._on_event
+
+        async def _on_event(message):
+            tasks = self._start_event_handlers(message)
+            try:
+                return await on_event(message)
+            finally:
+                for key, task in tasks.items():
+                    self._event_handler_tasks.pop(key, None)
+                    task.cancel()
+
+        openadr_client._on_event = _on_event
+
+        # every poll cycle ends in an empty response, or in none if the request failed; openleadr only logs failures
+        poll_vtn = openadr_client.poll
+
+        async def _poll_vtn(*args, **kwargs):
+            response_type, response_payload = await poll_vtn(*args, **kwargs)
+            if response_type is None:
+                self._poll_failed = True
+            elif response_type == "oadrDistributeEvent":
+                self._poll_received_events = True
+            return response_type, response_payload
+
+        openadr_client.poll = _poll_vtn
+
+    async def _perform_request(self, service: str, message: str):
+        """Send a message to the VTN and parse the response, as OpenADRClient._perform_request does, with the
+        signature of the response verified by the client's SignatureVerifier."""
+        client = self._openadr_client
+        await client._ensure_client_session()
+        url = f"{client.vtn_url}/{service}"
+        try:
+            async with client.client_session.post(url, data=message) as req:
+                content = await req.read()
+                if req.status != HTTPStatus.OK:
+                    openleadr_log.warning(f"Non-OK status {req.status} when performing a request to {url} "
+                                          f"with data {message}: {req.status} {content.decode('utf-8')}")
+                    return None, {}
+        except aiohttp.client_exceptions.ClientConnectorError as err:
+            openleadr_log.error(f"Could not connect to server with URL {client.vtn_url}:")
+            openleadr_log.error(f"{err.__class__.__name__}: {str(err)}")
+            return None, {}
+        except Exception as err:
+            openleadr_log.error(f"Request error {err.__class__.__name__}:{err}")
+            return None, {}
+        if len(content) == 0:
+            return None
+        try:
+            tree = validate_xml_schema(content)
+            try:
+                self._signature_verifier.verify(tree)
+            except Exception:
+                if self._signatures_rejected is not None:
+                    self._signatures_rejected.inc()
+                raise
+            if self._signatures_verified is not None:
+                self._signatures_verified.inc()
+            message_type, message_payload = parse_message(content)
+        except XMLSyntaxError as err:
+            openleadr_log.warning(f"Incoming message did not pass XML schema validation: {err}")
+            return None, {}
+        except errors.FingerprintMismatch as err:
+            openleadr_log.warning(err)
+            return None, {}
+        except InvalidSignature:
+            openleadr_log.warning("Incoming message had invalid signature, ignoring.")
+            return None, {}
+        except Exception as err:
+            openleadr_log.error(f"The incoming message could not be parsed or validated: {err}")
+            return None, {}
+        if 'response' in message_payload and 'response_code' in message_payload['response']:
+            if message_payload['response']['response_code'] != 200:
+                openleadr_log.warning("We got a non-OK OpenADR response from the server: "
+                                      f"{message_payload['response']['response_code']}: "
+                                      f"{message_payload['response']['response_description']}")
+        return message_type, message_payload
+
+    def get_signature_cache_stats(self) -> Optional[Dict]:
+        """Return the hits, misses and hit rate of the certificate cache of the signature verifier, or None if
+        signatures are not verified."""
+        return self._signature_verifier.stats() if self._signature_verifier is not None else None
 
     @staticmethod
-    def build_client(config):
+    def build_client(config, connection_pool: ConnectionPool = None, metrics: VenMetrics = None,
+                     poll_phase: float = 0.0):
         # Creates a VEN client using openleadr library
+        owns_connection_pool = connection_pool is None
+        if owns_connection_pool:
+            connection_pool = ConnectionPool(
+                pool_size=config.get(POOL_SIZE, DEFAULT_POOL_SIZE),
+                keepalive_timeout=config.get(KEEPALIVE_TIMEOUT, DEFAULT_KEEPALIVE_TIMEOUT))
+        cert, key = config.get(CERT), config.get(KEY)
+        passphrase = config.get(PASSPHRASE)
+        disable_signature = config.get(DISABLE_SIGNATURE)
+        # openleadr reads the certificate and key from disk for every client it builds and parses the key again for
+        # every message it signs; they are read and parsed through the TLS cache instead, which keeps them across
+        # reconfigurations until the files change
+        openadr_client = OpenADRClient(
+            config.get(VEN_NAME),
+            config.get(VTN_URL),
+            debug=config.get(DEBUG),
+            passphrase=passphrase,
+            vtn_fingerprint=config.get(VTN_FINGERPRINT),
+            ca_file=config.get(CA_FILE),
+            ven_id=config.get(VEN_ID),
+            disable_signature=disable_signature,
+        )
+        if cert and key:
+            tls_cache = connection_pool.tls_cache
+            certificate = tls_cache.read(cert)
+            if config.get(SHOW_FINGERPRINT, True):
+                _log.info(f"The certificate fingerprint of VEN {config.get(VEN_NAME)} is "
+                          f"{utils.certificate_fingerprint(certificate)}; deliver it to the VTN.")
+            openadr_client.cert_path, openadr_client.key_path = cert, key
+            openadr_client._create_message = partial(
+                openadr_client._create_message.func,
+                cert=certificate,
+                key=tls_cache.read(key) if disable_signature else tls_cache.private_key(key, passphrase),
+                passphrase=passphrase,
+                disable_signature=disable_signature)
+        signature_verifier = None
+        if config.get(VTN_FINGERPRINT):
+            signature_verifier = SignatureVerifier(
+                config[VTN_FINGERPRINT], int(config.get(SIGNATURE_CACHE_SIZE, DEFAULT_SIGNATURE_CACHE_SIZE)))
         return VolttronOpenADRClient(
-            OpenADRClient(
-                config.get(VEN_NAME),
-                config.get(VTN_URL),
-                debug=config.get(DEBUG),
-                cert=config.get(CERT),
-                key=config.get(KEY),
-                passphrase=config.get(PASSPHRASE),
-                vtn_fingerprint=config.get(VTN_FINGERPRINT),
-                show_fingerprint=config.get(SHOW_FINGERPRINT, True),
-                ca_file=config.get(CA_FILE),
-                ven_id=config.get(VEN_ID),
-                disable_signature=config.get(DISABLE_SIGNATURE),
-            ))
+            openadr_client, connection_pool, owns_connection_pool, metrics,
+            poll_settings=_poll_settings(config) if config.get(ADAPTIVE_POLLING) else None,
+            poll_phase=poll_phase,
+            signature_verifier=signature_verifier)
 
     ##### Abstract methods implemented#####
     async def run(self):
-        await self._openadr_client.run()
+        client = self._openadr_client
+        if client.client_session is None:
+            # borrow keep-alive connections from the pool instead of letting openleadr open a private session
+            client.client_session = self._connection_pool.session(cert=client.cert_path,
+                                                                  key=client.key_path,
+                                                                  passphrase=client.passphrase,
+                                                                  ca_file=client.ca_file,
+                                                                  check_hostname=client.check_hostname)
+        self._set_state(VenState.REGISTERING)
+        try:
+            await self._openadr_client.run()
+        except Exception:
+            self._set_state(VenState.FAILED)
+            raise
+        # run() returns after the first poll once automatic polling has been scheduled, or early if registration failed
+        if self._openadr_client.registration_id:
+            if self._poll_settings is not None:
+                self._start_adaptive_polling()
+            else:
+                self._poll_through_poll_once()
+            self._set_state(VenState.POLLING)
+        else:
+            self._set_state(VenState.FAILED)
+
+    async def stop(self):
+        """Stop polling and reporting and close the HTTP session.
+
+        Unlike OpenADRClient.stop, this is safe to call before the client has opened its session.
+        """
+        client = self._openadr_client
+        if client.scheduler.running:
+            client.scheduler.shutdown(wait=False)
+        if client.report_queue_task:
+            client.report_queue_task.cancel()
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+        if self._register_reports_task is not None:
+            self._register_reports_task.cancel()
+        if client.client_session is not None:
+            await client.client_session.close()
+            client.client_session = None
+        if self._owns_connection_pool:
+            await self._connection_pool.close()
+        self._set_state(VenState.STOPPED)
+
+    def update_settings(self, config: Dict):
+        """Apply the settings that do not require a new connection to the VTN.
+
+        :param config: The agent's configuration
+        """
+        self._openadr_client.debug = config.get(DEBUG)
+        if self._poll_settings is not None:
+            self._poll_settings = _poll_settings(config)
+            if self._poll_controller is not None:
+                self._poll_controller.configure(**self._poll_intervals())
 
     def get_ven_name(self):
         return self._openadr_client.ven_name
 
-    def add_handler(self, event, function):
-        self._openadr_client.add_handler(event, function)
+    def _poll_through_poll_once(self) -> None:
+        """Have openleadr's poll schedule call _poll_once, which times every scheduled poll once; openleadr's _poll
+        calls itself for as long as the VTN has more to send."""
+        client = self._openadr_client
+        for job in client.scheduler.get_jobs():
+            if job.func == client._poll:
+                job.modify(func=self._poll_once)
+
+    def _start_adaptive_polling(self) -> None:
+        """Replace openleadr's poll schedule, which polls at fixed times of the minute or hour, with polls paced by an
+        AdaptivePollController."""
+        client = self._openadr_client
+        for job in client.scheduler.get_jobs():
+            if job.func == client._poll:
+                job.remove()
+        self._poll_controller = AdaptivePollController(**self._poll_intervals(), phase=self._poll_phase)
+        self._poll_task = asyncio.ensure_future(self._poll_forever())
+
+    def _poll_intervals(self) -> Dict:
+        settings = self._poll_settings
+        return {
+            # unless configured, the idle poll interval is the one that the VTN requested when the VEN registered
+            "poll_interval": settings[POLL_INTERVAL] or self._openadr_client.poll_frequency.total_seconds(),
+            "active_poll_interval": settings[ACTIVE_POLL_INTERVAL],
+            "max_poll_interval": settings[MAX_POLL_INTERVAL],
+            "jitter": settings[POLL_JITTER],
+        }
+
+    async def _poll_forever(self) -> None:
+        controller = self._poll_controller
+        delay = controller.first_delay()
+        while True:
+            await asyncio.sleep(delay)
+            # an unexpected error must not end the task, or the VEN would silently stop polling
+            try:
+                outcome = await self._poll_once()
+                delay = controller.next_delay(outcome, self._has_pending_events())
+            except Exception as e:
+                outcome, delay = POLL_ERROR, controller.max_poll_interval
+                _log.exception(f"Unexpected error while polling for VEN {self.get_ven_name()}: {e}")
+            if outcome == POLL_ERROR:
+                _log.warning(f"Polling the VTN failed for VEN {self.get_ven_name()}; polling again in {delay:.1f} s")
+
+    async def _poll_once(self) -> str:
+        """Poll the VTN, again and again for as long as it has more to send, and time it as one poll.
+
+        :return: The outcome of the poll for the AdaptivePollController
+        """
+        self._poll_failed = self._poll_received_events = False
+        started = perf_counter()
+        try:
+            await self._openadr_client._poll()
+        except Exception as e:
+            _log.error(f"Error while polling the VTN for VEN {self.get_ven_name()}: {e}")
+            outcome = POLL_ERROR
+        else:
+            if self._poll_failed:
+                outcome = POLL_ERROR
+            else:
+                outcome = POLL_EVENTS if self._poll_received_events else POLL_EMPTY
+        if self._poll_seconds is not None:
+            self._poll_seconds.observe(perf_counter() - started)
+            if outcome == POLL_ERROR:
+                self._poll_errors.inc()
+        return outcome
+
+    def _has_pending_events(self) -> bool:
+        for event in self._openadr_client.received_events:
+            if event["event_descriptor"].get("event_status") == "cancelled":
+                continue
+            if utils.determine_event_status(event["active_period"]) != "completed":
+                return True
+        return False
+
+    def get_connection_metrics(self) -> Dict:
+        return self._connection_pool.get_metrics()
 
-    def add_report(self, callback, report_name, resource_id, measurement):
-        self._openadr_client.add_report(callback, report_name, resource_id,
-                                        measurement)
+    def add_handler(self, event, function):
+        self._event_handlers[event] = function
+        self._openadr_client.add_handler(event, partial(self._handle_event, event))
+
+    def _start_event_handlers(self, message: Dict) -> Dict[int, asyncio.Future]:
+        # mirrors how openleadr decides which handler, if any, it calls for each event of a message
+        client = self._openadr_client
+        tasks = {}
+        for event in message.get("events") or []:
+            descriptor = event["event_descriptor"]
+            received_event = utils.find_by(client.received_events, "event_descriptor.event_id",
+                                           descriptor["event_id"])
+            if received_event:
+                if received_event["event_descriptor"]["modification_number"] == descriptor["modification_number"]:
+                    continue
+                handler = self._event_handlers.get("on_update_event")
+            else:
+                handler = self._event_handlers.get("on_event")
+            if handler is not None:
+                tasks[id(event)] = asyncio.ensure_future(_call_handler(handler, event))
+        self._event_handler_tasks.update(tasks)
+        return tasks
+
+    async def _handle_event(self, handler_name: str, event: Event):
+        task = self._event_handler_tasks.pop(id(event), None)
+        if task is None:
+            return await _call_handler(self._event_handlers[handler_name], event)
+        return await task
+
+    def add_report(self,
+                   callback: Callable,
+                   report_name: str,
+                   resource_id: str,
+                   measurement: str,
+                   unit: str = None,
+                   min_sampling_interval: timedelta = timedelta(seconds=10),
+                   max_sampling_interval: timedelta = timedelta(hours=1)) -> tuple:
+        """Offer a report whose values are read one at a time.
+
+        The report uses openleadr's 'incremental' data collection mode: the callback is called without arguments once
+        per sampling interval and returns the current value.
+
+        :return: A tuple consisting of the report_specifier_id and the r_id of the report
+        """
+        return self._add_report(callback, report_name, resource_id, measurement, unit, "incremental",
+                                min_sampling_interval, max_sampling_interval)
+
+    def add_telemetry_report(self,
+                             callback: Callable,
+                             report_name: str,
+                             resource_id: str,
+                             measurement: str,
+                             unit: str = None,
+                             min_sampling_interval: timedelta = timedelta(seconds=10),
+                             max_sampling_interval: timedelta = timedelta(hours=1)) -> tuple:
+        """Offer a report whose values are returned a whole reporting window at a time.
+
+        The report uses openleadr's 'full' data collection mode: the callback is called once per reporting interval
+        with the 'date_from', 'date_to' and 'sampling_interval' keyword arguments and returns a list of
+        (datetime, value) pairs.
+
+        :return: A tuple consisting of the report_specifier_id and the r_id of the report
+        """
+        return self._add_report(callback, report_name, resource_id, measurement, unit, "full",
+                                min_sampling_interval, max_sampling_interval)
+
+    def _add_report(self, callback, report_name, resource_id, measurement, unit, data_collection_mode,
+                    min_sampling_interval, max_sampling_interval) -> tuple:
+        # openleadr adds a report to the first report of the same name and keeps that report's data collection mode,
+        # so the reports of each mode get a report_specifier_id of their own
+        report = next((r for r in self._openadr_client.reports
+                       if r.report_name == report_name and r.data_collection_mode == data_collection_mode), None)
+        report_ids = self._openadr_client.add_report(
+            callback,
+            resource_id,
+            measurement=measurement,
+            data_collection_mode=data_collection_mode,
+            report_specifier_id=report.report_specifier_id if report is not None else utils.generate_id(),
+            report_name=report_name,
+            unit=unit,
+            sampling_rate=SamplingRate(min_period=min_sampling_interval,
+                                       max_period=max_sampling_interval,
+                                       on_change=False),
+        )
+        # openleadr only registers the reports that exist when it starts, so a report added to a registered VEN is
+        # registered on its own
+        if self._openadr_client.registration_id:
+            self._register_reports_task = asyncio.ensure_future(self._register_reports())
+        return report_ids
+
+    async def _register_reports(self):
+        client = self._openadr_client
+        await client.register_reports(client.reports)
+        if client.report_queue_task is None:
+            client.report_queue_task = asyncio.ensure_future(client._report_queue_worker())
+
+    def get_state(self) -> str:
+        return self._state
+
+    def set_state_listener(self, listener: Callable[[str], None]):
+        """Set a callable that is called with the new state whenever the readiness state changes.
+
+        The listener is called from the thread that runs the client's event loop.
+        """
+        self._state_listener = listener
+
+    def _set_state(self, state: str) -> None:
+        if state == self._state:
+            return
+        self._state = state
+        if self._state_listener is not None:
+            self._state_listener(state)
@@ -21,9 +21,19 @@
 #
 # ===----------------------------------------------------------------------===
 
-# import openleadr
+import asyncio
+import base64
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest import mock
 
-# from volttron_openadr_ven.agent import OpenADRVenAgent
+import pytest
+
+from openadr_ven.agent import OpenADRVenAgent
+from openadr_ven.constants import OPENADR_EVENT
+from openadr_ven.event_index import EventIndex
+from openadr_ven.volttron_openadr_client import OpenADROpt, VenState
 
 # TODO: get environment variable for cert and key paths
 # {
@@ -40,3 +50,393 @@
 # TODO: Implement test when volttron-testing package is created
 def test_on_start_should_publish_event_to_volttron():
     pass
+
+
+@pytest.fixture
+def agent(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps({
+            "ven_name": "ven123",
+            "vtn_url": "http://127.0.0.1:8080/OpenADR2/Simple/2.0b"
+        }))
+    ven_client = mock.Mock()
+    ven_client.get_ven_name.return_value = "ven123"
+    with mock.patch.object(OpenADRVenAgent, "vip", create=True), \
+            mock.patch.object(OpenADRVenAgent, "core", create=True):
+        yield OpenADRVenAgent(str(config_path), fake_ven_client=ven_client)
+
+
+DTSTART = datetime.now(timezone.utc) + timedelta(minutes=5)
+
+
+def _event(modification_number=0, payload=100.0, dtstart=DTSTART):
+    return {
+        "event_descriptor": {
+            "event_id": "2ab3526f-235b-4c66-8b31-e04a95406913",
+            "modification_number": modification_number,
+            "test_event": False,
+        },
+        "active_period": {
+            "dtstart": dtstart,
+            "duration": timedelta(hours=1)
+        },
+        "event_signals": [{
+            "signal_name": "simple",
+            "signal_type": "level",
+            "intervals": [{
+                "dtstart": dtstart,
+                "duration": timedelta(hours=1),
+                "signal_payload": payload,
+                "uid": 0
+            }],
+        }],
+        "response_required": "always",
+    }
+
+
+def test_handle_event_should_publish_only_new_or_changed_events(agent):
+    assert asyncio.run(agent.handle_event(_event())) == OpenADROpt.OPT_IN
+    asyncio.run(agent.handle_event(_event()))
+    asyncio.run(agent.handle_event(_event(modification_number=1, payload=50.0)))
+
+    publish = agent.vip.pubsub.publish
+    assert publish.call_count == 2
+    assert publish.call_args.kwargs["topic"] == \
+        "openadr/event/2ab3526f-235b-4c66-8b31-e04a95406913/ven123"
+
+
+@pytest.mark.parametrize("publish_event_topics", [True, False])
+def test_handle_event_should_coalesce_events_into_one_publish_per_ven(agent, publish_event_topics):
+    agent._configure_publish_queue({"publish_window": 0.01, "publish_event_topics": publish_event_topics})
+    second = _event()
+    second["event_descriptor"]["event_id"] = "second"
+
+    async def handle_burst():
+        await asyncio.gather(agent.handle_event(_event()), agent.handle_event(second))
+        await asyncio.sleep(0.05)
+
+    asyncio.run(handle_burst())
+
+    publish = agent.vip.pubsub.publish
+    topics = [call.kwargs["topic"] for call in publish.call_args_list]
+    assert topics[-1] == "openadr/batch/ven123"
+    assert [entry["topic"] for entry in publish.call_args.kwargs["message"]] == [
+        "openadr/event/2ab3526f-235b-4c66-8b31-e04a95406913/ven123", "openadr/event/second/ven123"]
+    assert len(topics) == (3 if publish_event_topics else 1)
+    assert len(agent.publish_queue) == 0
+
+
+@pytest.fixture
+def built_clients(request):
+    agent = request.getfixturevalue("multi_ven_agent" if "multi_ven_agent" in request.fixturenames else "agent")
+    clients = []
+
+    def build_client(config, connection_pool=None, **kwargs):
+        client = mock.Mock()
+        client.run = mock.AsyncMock()
+        client.stop = mock.AsyncMock()
+        client.get_state.return_value = VenState.CONFIGURED
+        client.get_ven_name.return_value = config["ven_name"]
+        client.add_telemetry_report.return_value = ("report_specifier_id", "r_id")
+        client.add_report.return_value = ("report_specifier_id", "r_id")
+        clients.append(client)
+        return client
+
+    with mock.patch("openadr_ven.volttron_openadr_client.VolttronOpenADRClient.build_client",
+                    side_effect=build_client):
+        yield clients
+    agent.onstop(None)
+
+
+def test_configure_should_update_running_client_in_place(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {})
+    agent._configure_ven_client("config", "UPDATE", {})
+    agent._configure_ven_client("config", "UPDATE", {"debug": True})
+
+    assert len(built_clients) == 1
+    built_clients[0].update_settings.assert_called_once()
+    built_clients[0].stop.assert_not_called()
+
+
+def test_configure_should_stop_old_client_before_starting_new_one(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {})
+    agent._configure_ven_client("config", "UPDATE", {"vtn_url": "http://127.0.0.1:8081/OpenADR2/Simple/2.0b"})
+
+    assert len(built_clients) == 2
+    built_clients[0].stop.assert_awaited_once()
+    built_clients[1].stop.assert_not_called()
+
+
+def test_configure_should_ignore_invalid_updates(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {})
+    agent._configure_ven_client("config", "UPDATE", {"vtn_url": "ftp://127.0.0.1/vtn", "pool_size": 0})
+
+    assert len(built_clients) == 1
+    built_clients[0].update_settings.assert_not_called()
+    built_clients[0].stop.assert_not_called()
+
+
+@pytest.fixture
+def multi_ven_agent(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps({
+            "vtn_url": "http://127.0.0.1:8080/OpenADR2/Simple/2.0b",
+            "vens": [{"ven_name": "building1"}, {"ven_name": "building2", "ven_id": "ven_id_2"}]
+        }))
+    with mock.patch.object(OpenADRVenAgent, "vip", create=True), \
+            mock.patch.object(OpenADRVenAgent, "core", create=True):
+        yield OpenADRVenAgent(str(config_path), fake_ven_client=mock.Mock())
+
+
+def test_configure_should_start_a_client_per_ven(multi_ven_agent, built_clients):
+    multi_ven_agent._configure_ven_client("config", "NEW", {})
+
+    assert list(multi_ven_agent.ven_clients) == ["building1", "building2"]
+    for future in multi_ven_agent._ven_client_futures.values():
+        future.result(timeout=5)
+    assert [c.run.await_count for c in built_clients] == [1, 1]
+    assert built_clients[1].get_ven_name() == "building2"
+
+    asyncio.run(multi_ven_agent.handle_event(_event(), ven_name="building2"))
+    assert multi_ven_agent.vip.pubsub.publish.call_args.kwargs["topic"] == \
+        "openadr/event/2ab3526f-235b-4c66-8b31-e04a95406913/building2"
+
+
+def test_configure_should_stop_removed_vens(multi_ven_agent, built_clients):
+    multi_ven_agent._configure_ven_client("config", "NEW", {})
+    multi_ven_agent._configure_ven_client("config", "UPDATE", {"vens": [{"ven_name": "building1"}]})
+
+    assert list(multi_ven_agent.ven_clients) == ["building1"]
+    built_clients[1].stop.assert_awaited_once()
+    assert [s["ven_name"] for s in multi_ven_agent.list_vens()] == ["building1"]
+
+
+def test_removed_vens_should_unsubscribe_from_their_device_topics(multi_ven_agent, built_clients):
+    shared, own = "devices/campus/building/meter1/all", "devices/campus/building2/meter2/all"
+    multi_ven_agent._configure_ven_client("config", "NEW", {
+        "vens": [{"ven_name": "building1", "reports": [{"resource_id": "meter1", "measurement": "REAL_POWER",
+                                                        "topic": shared, "point": "Power"}]},
+                 {"ven_name": "building2", "reports": [{"resource_id": "meter1", "measurement": "REAL_POWER",
+                                                        "topic": shared, "point": "Power"},
+                                                       {"resource_id": "meter2", "measurement": "REAL_POWER",
+                                                        "topic": own, "point": "Power"}]}]
+    })
+    multi_ven_agent._configure_ven_client("config", "UPDATE", {"vens": [
+        {"ven_name": "building1", "reports": [{"resource_id": "meter1", "measurement": "REAL_POWER",
+                                               "topic": shared, "point": "Power"}]}]})
+
+    multi_ven_agent.vip.pubsub.unsubscribe.assert_called_once_with(peer="pubsub", prefix=own,
+                                                                   callback=multi_ven_agent._on_device_publish)
+    assert multi_ven_agent.telemetry.topics() == [shared]
+
+
+def test_configure_should_offer_reports_from_device_topics(agent, built_clients):
+    report = {
+        "resource_id": "meter1",
+        "measurement": "REAL_POWER",
+        "unit": "W",
+        "topic": "devices/campus/building/meter1/all",
+        "point": "Power"
+    }
+    agent._configure_ven_client("config", "NEW", {"reports": [report]})
+    agent._on_device_publish("pubsub", "platform.driver", "", report["topic"],
+                             {"TimeStamp": "2023-01-12T20:00:00+00:00"}, [{"Power": 1.5}, {}])
+
+    agent.vip.pubsub.subscribe.assert_called_once_with(peer="pubsub",
+                                                       prefix=report["topic"],
+                                                       callback=agent._on_device_publish)
+    callback = built_clients[0].add_telemetry_report.call_args.kwargs["callback"]
+    assert callback(date_from=datetime(2023, 1, 12, 19, tzinfo=timezone.utc),
+                    date_to=datetime(2023, 1, 12, 21, tzinfo=timezone.utc),
+                    sampling_interval=timedelta(minutes=1)) == \
+        [(datetime(2023, 1, 12, 20, tzinfo=timezone.utc), 1.5)]
+
+
+def test_add_report_capability_should_aggregate_topic_publishes(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {})
+
+    result = agent.add_report_capability("meter1", "REAL_POWER", "devices/campus/building/meter1/Power",
+                                         aggregation="max")
+    for power in (1.5, 3.0, 2.0):
+        agent._on_device_publish("pubsub", "platform.driver", "", "devices/campus/building/meter1/Power",
+                                 {}, [power, {}])
+
+    assert result == ("report_specifier_id", "r_id")
+    callback = built_clients[0].add_report.call_args.kwargs["callback"]
+    assert callback() == 3.0
+
+    # the capability is offered again, reading the same aggregate, when the client is rebuilt
+    agent._on_device_publish("pubsub", "platform.driver", "", "devices/campus/building/meter1/Power", {}, [4.0, {}])
+    agent._configure_ven_client("config", "UPDATE", {"vtn_url": "http://127.0.0.1:8081/OpenADR2/Simple/2.0b"})
+    assert built_clients[1].add_report.call_args.kwargs["callback"]() == 4.0
+    assert agent.get_metrics()["openadr_ven_report_callback_seconds"]["ven123,meter1"]["count"] == 2
+
+
+def test_set_event_logging_should_survive_unrelated_updates(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {})
+
+    assert agent.set_event_logging(False, payload_limit=100) == {"log_event_details": False, "log_payload_limit": 100}
+    agent._configure_ven_client("config", "UPDATE", {"debug": True})
+    assert not agent._event_log.enabled
+
+    agent._configure_ven_client("config", "UPDATE", {"debug": True, "log_payload_limit": 200})
+    assert (agent._event_log.enabled, agent._event_log.payload_limit) == (True, 200)
+
+
+def test_configure_should_republish_stored_events(agent, built_clients, tmp_path):
+    config = {"event_store": str(tmp_path / "events.db")}
+    agent._configure_ven_client("config", "NEW", config)
+    asyncio.run(agent.handle_event(_event()))
+    agent._event_store.close()
+    publish = agent.vip.pubsub.publish
+    publish.reset_mock()
+
+    restarted = OpenADRVenAgent(str(tmp_path / "config.json"), fake_ven_client=mock.Mock())
+    try:
+        restarted._configure_ven_client("config", "NEW", config)
+        event_topics = [c.kwargs["topic"] for c in publish.call_args_list
+                        if c.kwargs["topic"].startswith("openadr/event")]
+        assert event_topics == ["openadr/event/2ab3526f-235b-4c66-8b31-e04a95406913/ven123"]
+
+        # the VTN's copy of the restored event is not published again
+        asyncio.run(restarted.handle_event(_event()))
+        assert publish.call_args.kwargs["topic"].startswith("openadr/status")
+    finally:
+        restarted.onstop(None)
+
+
+def test_restored_events_should_be_indexed_on_the_loop_thread(agent, built_clients, tmp_path):
+    config = {"event_store": str(tmp_path / "events.db")}
+    agent._configure_ven_client("config", "NEW", config)
+    asyncio.run(agent.handle_event(_event()))
+    agent._event_store.close()
+
+    restarted = OpenADRVenAgent(str(tmp_path / "config.json"), fake_ven_client=mock.Mock())
+    threads = []
+    update = EventIndex.update
+
+    def recording_update(index, event):
+        threads.append(threading.get_ident())
+        return update(index, event)
+
+    try:
+        with mock.patch.object(EventIndex, "update", recording_update):
+            restarted._configure_ven_client("config", "NEW", config)
+        assert threads == [restarted._loop_thread._thread.ident]
+    finally:
+        restarted.onstop(None)
+
+
+def test_connection_metrics_should_include_the_signature_cache_of_verifying_vens(agent):
+    stats = {"hits": 3, "misses": 1, "hit_rate": 0.75, "size": 1}
+    agent.ven_clients["ven123"].get_signature_cache_stats.return_value = stats
+
+    assert agent.get_connection_metrics() == {"signature_cache": {"ven123": stats}}
+    agent.ven_clients["ven123"].get_signature_cache_stats.return_value = None
+    assert agent.get_connection_metrics() == {}
+
+
+def test_event_queries_should_answer_from_received_events(agent):
+    asyncio.run(agent.handle_event(_event()))
+
+    assert agent.get_active_events() == []
+    at_start = (DTSTART + timedelta(minutes=1)).isoformat()
+    assert [v["value"] for v in agent.get_signal_value_at(at_start, signal_name="simple")] == [100.0]
+    events = agent.get_events_between(DTSTART.isoformat(), (DTSTART + timedelta(days=1)).isoformat())
+    assert [e["event_descriptor"]["event_id"] for e in events] == ["2ab3526f-235b-4c66-8b31-e04a95406913"]
+
+
+def test_cancelled_event_should_publish_its_status_and_be_evicted_once_ended(agent):
+    asyncio.run(agent.handle_event(_event()))
+    cancelled = _event(modification_number=1)
+    cancelled["event_descriptor"]["event_status"] = "cancelled"
+    asyncio.run(agent.handle_event(cancelled))
+
+    publish = agent.vip.pubsub.publish
+    assert publish.call_args.kwargs["topic"] == "openadr/event/2ab3526f-235b-4c66-8b31-e04a95406913/ven123/status"
+    assert (publish.call_args.kwargs["message"]["previous_status"],
+            publish.call_args.kwargs["message"]["status"]) == ("pending", "cancelled")
+    # the event queries still report a cancelled event until its end
+    events = agent.get_events_between(DTSTART.isoformat(), (DTSTART + timedelta(days=1)).isoformat())
+    assert [e["event_descriptor"]["event_status"] for e in events] == ["cancelled"]
+
+    published = publish.call_count
+    with mock.patch.object(agent.event_sweeper, "_clock", lambda: DTSTART + timedelta(hours=1)):
+        agent.event_sweeper.run_due()
+
+    assert len(agent.signal_indexes["ven123"]) == 0 and len(agent.event_sweeper) == 0
+    assert "2ab3526f-235b-4c66-8b31-e04a95406913" not in agent.event_indexes["ven123"]
+    assert publish.call_count == published
+
+
+def test_delta_mode_should_publish_patches_between_snapshots(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {"publish_deltas": True, "delta_snapshot_every": 1})
+    publish = agent.vip.pubsub.publish
+    for modification_number in range(3):
+        asyncio.run(agent.handle_event(_event(modification_number, payload=100.0 + modification_number)))
+
+    topics = [c.kwargs["topic"].split("/")[1] for c in publish.call_args_list
+              if c.kwargs["topic"].startswith(("openadr/event", "openadr/delta"))]
+    assert topics == ["event", "delta", "event"]
+    # subscriptions match by prefix; subscribers to the events must not get the patches
+    assert not any("patch" in c.kwargs["message"] for c in publish.call_args_list
+                   if c.kwargs["topic"].startswith(OPENADR_EVENT))
+    delta = publish.call_args_list[-2].kwargs["message"]
+    assert (delta["base_modification_number"], delta["modification_number"]) == (0, 1)
+    assert {op["path"] for op in delta["patch"]} == {"/event_descriptor/modification_number",
+                                                     "/event_signals/0/intervals/0/signal_payload"}
+    assert agent.publish_event_snapshots() == 1
+
+
+def test_handle_event_should_respond_with_opt_rule_decision(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {
+        "opt_rules": [{"name": "high_level", "action": "optOut", "signal_name": "simple", "min_value": 50}]
+    })
+
+    assert asyncio.run(agent.handle_event(_event(payload=100.0))) == OpenADROpt.OPT_OUT
+    assert asyncio.run(agent.handle_event(_event(modification_number=1, payload=10.0))) == OpenADROpt.OPT_IN
+    assert agent.get_decision_metrics()["rules"][0]["matches"] == 1
+
+
+def test_deferred_opt_response_should_answer_the_event(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {"defer_opt_responses": True, "opt_response_timeout": 5})
+
+    async def handle_and_respond():
+        handled = asyncio.ensure_future(agent.handle_event(_event()))
+        await asyncio.sleep(0)
+        publish_headers = agent.vip.pubsub.publish.call_args.kwargs["headers"]
+        assert agent.respond_to_event("2ab3526f-235b-4c66-8b31-e04a95406913", "optOut",
+                                      correlation_id=publish_headers["correlation_id"])
+        return await handled
+
+    assert asyncio.run(handle_and_respond()) == OpenADROpt.OPT_OUT
+    assert len(agent.opt_responses) == 0
+    assert not agent.respond_to_event("2ab3526f-235b-4c66-8b31-e04a95406913", "optIn")
+
+
+def test_deferred_opt_response_should_default_after_timeout(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {
+        "defer_opt_responses": True,
+        "opt_response_timeout": 0.01,
+        "opt_default": "optOut"
+    })
+
+    assert asyncio.run(agent.handle_event(_event())) == OpenADROpt.OPT_OUT
+    assert len(agent.opt_responses) == 0
+
+
+def test_metrics_should_time_the_event_path(agent, built_clients):
+    agent._configure_ven_client("config", "NEW", {})
+    agent._configure_ven_client("config", "UPDATE", {"debug": True})
+    asyncio.run(agent.handle_event(_event()))
+
+    metrics = agent.get_metrics()
+    assert metrics["openadr_ven_events_received_total"] == {"ven123": 1}
+    assert metrics["openadr_ven_event_publish_seconds"]["ven123"]["count"] == 1
+    assert metrics["openadr_ven_reconfigurations_total"] == {"ven123,new": 1, "ven123,updated": 1}
+
+    status, body, response_headers = agent._serve_metrics({}, None)
+    assert status == "200 OK"
+    assert 'openadr_ven_events_received_total{ven_name="ven123"} 1' in base64.b64decode(body).decode().splitlines()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from dataclasses import FrozenInstanceError
+
+import json
+import logging
+import pytest
+
+from openadr_ven.config import VenConfig, parse_config, resolve_ven_configs
+
+CONFIG = {"ven_name": "ven123", "vtn_url": "http://127.0.0.1:8080/OpenADR2/Simple/2.0b"}
+
+
+def test_from_dict_should_fill_in_defaults_and_freeze_the_config():
+    config = VenConfig.from_dict({**CONFIG, "pool_size": "4", "unknown": 1})
+
+    assert config.pool_size == config["pool_size"] == 4
+    assert config.get("poll_interval") is None and config.show_fingerprint is True
+    assert "unknown" not in config
+    with pytest.raises(FrozenInstanceError):
+        config.pool_size = 5
+    # the config store holds the dict form, which parses back into an equal config
+    assert VenConfig.from_dict(json.loads(json.dumps(config.to_dict()))) == config
+
+
+@pytest.mark.parametrize("update, error", [
+    ({"pool_size": 0}, "pool_size must be at least 1"),
+    ({"keepalive_timeout": "soon"}, "keepalive_timeout must be a number"),
+    ({"vtn_url": "ftp://127.0.0.1/vtn"}, "vtn_url must be an http or https URL"),
+    ({"opt_rules": {"action": "optOut"}}, "opt_rules must be a list"),
+    ({"poll_interval": 10, "max_poll_interval": 5}, "max_poll_interval"),
+])
+def test_from_dict_should_reject_invalid_values(update, error):
+    with pytest.raises(ValueError, match=error):
+        VenConfig.from_dict({**CONFIG, **update})
+
+
+def test_from_dict_should_resolve_paths_of_existing_files(tmp_path, monkeypatch):
+    (tmp_path / "cert.pem").write_text("certificate")
+    monkeypatch.chdir(tmp_path)
+
+    assert VenConfig.from_dict({**CONFIG, "cert_path": "cert.pem"}).cert_path == str(tmp_path / "cert.pem")
+    with pytest.raises(FileNotFoundError):
+        VenConfig.from_dict({**CONFIG, "key_path": "key.pem"})
+
+
+def test_from_dict_should_coerce_flags_that_are_not_booleans(caplog):
+    with caplog.at_level(logging.WARNING, logger="openadr_ven.config"):
+        config = VenConfig.from_dict({**CONFIG, "debug": "true", "publish_deltas": 1, "adaptive_polling": "False"})
+
+    assert (config.debug, config.publish_deltas, config.adaptive_polling) == (True, True, False)
+    assert len([message for message in caplog.messages if "is deprecated" in message]) == 3
+
+
+def test_from_dict_should_resolve_paths_again_on_every_configuration(tmp_path):
+    (tmp_path / "cert-1.pem").write_text("certificate")
+    (tmp_path / "cert-2.pem").write_text("rotated certificate")
+    link = tmp_path / "cert.pem"
+    link.symlink_to(tmp_path / "cert-1.pem")
+    config = {**CONFIG, "cert_path": str(link)}
+
+    assert VenConfig.from_dict(config).cert_path == str(tmp_path / "cert-1.pem")
+    link.unlink()
+    link.symlink_to(tmp_path / "cert-2.pem")
+    assert VenConfig.from_dict(config).cert_path == str(tmp_path / "cert-2.pem")
+    (tmp_path / "cert-2.pem").unlink()
+    with pytest.raises(FileNotFoundError):
+        VenConfig.from_dict(config)
+
+
+def test_parse_config_should_validate_every_ven_and_keep_only_their_own_keys():
+    config = {"vtn_url": CONFIG["vtn_url"], "pool_size": 4,
+              "vens": [{"ven_name": "building1"}, {"ven_name": "building2", "pool_size": "8"}]}
+
+    parsed = parse_config(config)
+
+    assert parsed["vens"] == [{"ven_name": "building1"}, {"ven_name": "building2", "pool_size": 8}]
+    assert {name: ven.pool_size for name, ven in resolve_ven_configs(parsed).items()} == \
+        {"building1": 4, "building2": 8}
+    with pytest.raises(KeyError, match="more than once"):
+        parse_config({**config, "vens": [{"ven_name": "building1"}, {"ven_name": "building1"}]})
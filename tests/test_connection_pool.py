@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from openadr_ven.connection_pool import ConnectionPool, TlsCache
+
+
+def _write_certificate_and_key(tmp_path):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "ven")])
+    now = datetime.now(timezone.utc)
+    certificate = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key()) \
+        .serial_number(x509.random_serial_number()).not_valid_before(now - timedelta(days=1)) \
+        .not_valid_after(now + timedelta(days=1)).sign(key, hashes.SHA256())
+    cert_path, key_path = tmp_path / "cert.pem", tmp_path / "key.pem"
+    cert_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                           serialization.NoEncryption()))
+    return str(cert_path), str(key_path)
+
+
+def test_sessions_should_reuse_pooled_connections():
+
+    async def handler(request):
+        return web.Response(text="ok")
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/OadrPoll", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+
+        pool = ConnectionPool(pool_size=2)
+        for _ in range(2):
+            # every client session borrows from the same connector
+            session = pool.session()
+            for _ in range(2):
+                async with session.post(f"http://127.0.0.1:{port}/OadrPoll", data="<xml/>") as response:
+                    await response.read()
+            await session.close()
+        metrics = pool.get_metrics()
+        await pool.close()
+        await runner.cleanup()
+        return metrics
+
+    metrics = asyncio.run(run())
+
+    assert metrics["connections_created"] == 1
+    assert metrics["connections_reused"] == 3
+    assert metrics["tls_handshakes"] == 0
+    assert metrics["reuse_ratio"] == 0.75
+
+
+def test_tls_cache_should_be_reused_across_pools_until_files_change(tmp_path):
+    cert, key = _write_certificate_and_key(tmp_path)
+    cache = TlsCache()
+
+    context = ConnectionPool(tls_cache=cache).ssl_context(cert, key, ca_file=cert)
+    assert ConnectionPool(tls_cache=cache).ssl_context(cert, key, ca_file=cert) is context
+    assert cache.private_key(key) is cache.private_key(key)
+    assert cache.loads == {"ssl_context": 1, "private_key": 1, "file": 1}
+
+    # rotating the certificate on disk loads it again
+    stat = os.stat(cert)
+    cert, key = _write_certificate_and_key(tmp_path)
+    os.utime(cert, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    os.utime(key, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert ConnectionPool(tls_cache=cache).ssl_context(cert, key, ca_file=cert) is not context
+    assert cache.loads["ssl_context"] == 2
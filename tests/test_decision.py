@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from openadr_ven.decision import DecisionEngine
+from openadr_ven.reporting import TelemetryBuffer
+from openadr_ven.openadr_event import OpenADREvent
+
+# local time, since time-of-day conditions are evaluated in the agent's time zone
+DTSTART = datetime(2023, 1, 12, 14, 0).astimezone()
+TOPIC = "devices/campus/building/meter1/all"
+
+
+def _event(signal_type="level", payloads=(1.0, 3.0), dtstart=DTSTART):
+    return OpenADREvent({
+        "event_descriptor": {"event_id": "event-1", "modification_number": 0},
+        "active_period": {"dtstart": dtstart, "duration": timedelta(hours=1)},
+        "event_signals": [{
+            "signal_name": "simple",
+            "signal_type": signal_type,
+            "intervals": [{"duration": timedelta(minutes=30), "signal_payload": p} for p in payloads],
+        }],
+    })
+
+
+RULES = [
+    {"name": "no_headroom", "action": "optOut", "topic": TOPIC, "point": "Headroom", "max_headroom": 10},
+    {"name": "severe_in_business_hours", "action": "optOut", "signal_type": "level", "min_value": 3,
+     "start_time": "09:00", "end_time": "17:00"},
+    {"name": "overnight", "action": "optIn", "start_time": "22:00", "end_time": "06:00"},
+]
+
+
+def test_first_matching_rule_should_decide():
+    telemetry = TelemetryBuffer()
+    engine = DecisionEngine(RULES, "optIn", 0.05, telemetry)
+    assert engine.topics == [TOPIC]
+
+    assert engine.decide(_event()) == "optOut"
+    assert engine.decide(_event(payloads=(1.0, 2.0))) == "optIn"
+    assert engine.decide(_event(dtstart=DTSTART + timedelta(hours=10))) == "optIn"
+
+    telemetry.record(TOPIC, [{"Headroom": 5.0}, {}], datetime.now(timezone.utc))
+    assert engine.decide(_event(payloads=(1.0,))) == "optOut"
+
+    metrics = engine.get_metrics()
+    assert metrics["decisions"] == {"optIn": 2, "optOut": 2}
+    assert metrics["defaults_used"] == 1
+    assert [(r["name"], r["evaluations"], r["matches"]) for r in metrics["rules"]] == \
+        [("no_headroom", 4, 1), ("severe_in_business_hours", 3, 1), ("overnight", 2, 1)]
+
+
+def test_exhausted_budget_should_fall_back_to_default():
+    engine = DecisionEngine(RULES, "optOut", 0, TelemetryBuffer())
+
+    assert engine.decide(_event(dtstart=DTSTART + timedelta(hours=10))) == "optOut"
+    assert engine.get_metrics()["budget_exceeded"] == 1
+
+
+def test_invalid_rules_should_be_rejected():
+    with pytest.raises(ValueError):
+        DecisionEngine([{"action": "maybe"}], "optIn", 0.05, TelemetryBuffer())
+    with pytest.raises(ValueError):
+        DecisionEngine([{"action": "optOut", "max_headroom": 10}], "optIn", 0.05, TelemetryBuffer())
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from volttron.utils import jsonapi
+
+from openadr_ven.event_delta import apply_patch, diff
+
+
+def _payload(payloads, status="far"):
+    return {
+        "event_descriptor": {"event_id": "event-1", "event_status": status, "modification_number": 0},
+        "event_signals": [{
+            "signal_name": "simple",
+            "intervals": [{"uid": i, "duration": 900, "signal_payload": p} for i, p in enumerate(payloads)],
+        }],
+        "targets_by_type": {"ven_id": ["ven/1"]},
+    }
+
+
+def test_diff_should_patch_only_the_changed_interval():
+    old = _payload([1.0] * 1000)
+    new = _payload([1.0] * 1000)
+    new["event_signals"][0]["intervals"][500]["signal_payload"] = 2.0
+    new["event_descriptor"]["modification_number"] = 1
+
+    patch = diff(old, new)
+
+    assert patch == [{"op": "replace", "path": "/event_descriptor/modification_number", "value": 1},
+                     {"op": "replace", "path": "/event_signals/0/intervals/500/signal_payload", "value": 2.0}]
+    assert len(jsonapi.dumps(patch)) * 100 < len(jsonapi.dumps(new))
+    assert apply_patch(old, patch) == new
+
+
+def test_apply_patch_should_round_trip_structural_changes():
+    old = _payload([1.0, 2.0, 3.0])
+    new = _payload([1, 2.0], status="cancelled")
+    del new["targets_by_type"]
+    new["targets_by_type/escaped~key"] = True
+
+    patched = apply_patch(old, diff(old, new))
+
+    assert patched == new
+    assert patched["event_signals"][0]["intervals"][0]["signal_payload"].__class__ is int
+    assert diff(new, new) == []
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime, timedelta, timezone
+
+from openadr_ven.event_index import EventIndex
+from openadr_ven.openadr_event import OpenADREvent
+
+NOW = datetime(2023, 1, 12, 20, 0, tzinfo=timezone.utc)
+
+
+def _event(event_id="event-1", modification_number=0, payload=100.0, duration=timedelta(hours=1)):
+    return OpenADREvent({
+        "event_descriptor": {
+            "event_id": event_id,
+            "modification_number": modification_number,
+            "test_event": False,
+        },
+        "active_period": {
+            "dtstart": NOW,
+            "duration": duration
+        },
+        "event_signals": [{
+            "signal_name": "simple",
+            "intervals": [{
+                "dtstart": NOW,
+                "duration": duration,
+                "signal_payload": payload
+            }],
+        }],
+    })
+
+
+def test_update_should_skip_unchanged_copies():
+    index = EventIndex()
+
+    assert index.update(_event())
+    assert not index.update(_event())
+    assert index.update(_event(payload=50.0))
+    assert index.update(_event(modification_number=1, payload=50.0))
+
+
+def test_discard_should_keep_a_newer_version_of_the_event():
+    index = EventIndex()
+    ended = _event("event", duration=timedelta(minutes=5))
+    index.update(ended)
+    index.update(_event("event", duration=timedelta(minutes=30), modification_number=1))
+
+    index.discard("event", ended)
+    assert "event" in index
+    index.discard("event")
+    assert "event" not in index
+
+
+def test_update_should_bound_number_of_events():
+    index = EventIndex(max_events=2)
+    for i in range(3):
+        index.update(_event(f"event-{i}", duration=timedelta(hours=i + 1)))
+
+    assert len(index) == 2
+    assert "event-0" not in index
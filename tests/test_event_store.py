@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime, timedelta, timezone
+
+from openadr_ven.event_index import EventIndex
+from openadr_ven.event_store import EventStore
+from openadr_ven.openadr_event import OpenADREvent
+
+NOW = datetime(2023, 1, 12, 20, 0, tzinfo=timezone.utc)
+
+
+def _event(event_id, dtstart=NOW, duration=timedelta(hours=1), event_status="far"):
+    return OpenADREvent({
+        "event_descriptor": {
+            "event_id": event_id,
+            "modification_number": 0,
+            "event_status": event_status,
+            "test_event": False,
+        },
+        "active_period": {
+            "dtstart": dtstart,
+            "duration": duration
+        },
+        "event_signals": [],
+    })
+
+
+def test_store_should_restore_unexpired_events_unchanged(tmp_path):
+    path = str(tmp_path / "events.db")
+    store = EventStore(path)
+    store.save("ven123", _event("ended", dtstart=NOW - timedelta(hours=2)))
+    store.save("ven123", _event("open-ended", duration=timedelta(0)))
+    store.save("ven456", _event("later", dtstart=NOW + timedelta(hours=1)))
+    store.close()
+
+    store = EventStore(path)
+    assert store.delete_expired(NOW) == 1
+    restored = store.load_unexpired(NOW)
+
+    assert [(ven_name, event.get_event_id()) for ven_name, event in restored] == \
+        [("ven123", "open-ended"), ("ven456", "later")]
+    # a restored event hashes like the event it was saved from, so the VTN's next copy is recognized as unchanged
+    index = EventIndex()
+    assert index.update(restored[1][1])
+    assert not index.update(_event("later", dtstart=NOW + timedelta(hours=1)))
+
+
+def test_query_should_filter_by_time_window_and_status():
+    store = EventStore(":memory:")
+    store.save("ven123", _event("first", event_status="active"))
+    store.save("ven123", _event("second", dtstart=NOW + timedelta(hours=2)))
+
+    def event_ids(**kwargs):
+        return [event.get_event_id() for _, event in store.query(**kwargs)]
+
+    assert event_ids() == ["first", "second"]
+    assert event_ids(start=NOW + timedelta(minutes=30), end=NOW + timedelta(hours=1)) == ["first"]
+    assert event_ids(start=NOW + timedelta(hours=1)) == ["second"]
+    assert event_ids(status="far") == ["second"]
+    assert event_ids(ven_name="ven456") == []
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime, timedelta, timezone
+
+from openadr_ven.event_sweeper import EventSweeper
+from openadr_ven.openadr_event import EventStatus, OpenADREvent
+
+T0 = datetime(2023, 1, 12, 20, 0, tzinfo=timezone.utc)
+MINUTE = timedelta(minutes=1)
+
+
+class FakeClock:
+    """A clock and a single-shot timer that only move when the test advances them."""
+
+    def __init__(self):
+        self.now = T0
+        self.deadline = None
+        self.callback = None
+        self.scheduled = 0
+
+    def __call__(self):
+        return self.now
+
+    def schedule(self, deadline, callback):
+        self.deadline, self.callback = deadline, callback
+        self.scheduled += 1
+        timer = self
+
+        class Timer:
+
+            def cancel(self):
+                if timer.callback is callback:
+                    timer.deadline = timer.callback = None
+
+        return Timer()
+
+    def advance_to(self, when):
+        while self.deadline is not None and self.deadline <= when:
+            self.now = self.deadline
+            callback, self.deadline, self.callback = self.callback, None, None
+            callback()
+        self.now = when
+
+
+def _event(event_id="event-1", dtstart=T0 + 10 * MINUTE, duration=5 * MINUTE, modification_number=0,
+           event_status="far", test_event=False):
+    return OpenADREvent({
+        "event_descriptor": {
+            "event_id": event_id,
+            "modification_number": modification_number,
+            "event_status": event_status,
+            "test_event": test_event,
+        },
+        "active_period": {
+            "dtstart": dtstart,
+            "duration": duration
+        },
+        "event_signals": [],
+    })
+
+
+def _sweeper():
+    clock = FakeClock()
+    published, finished = [], []
+    sweeper = EventSweeper(lambda topic, message: published.append((clock.now, topic, message)), clock.schedule,
+                           lambda ven_name, event: finished.append((clock.now, ven_name, event.get_event_id())), clock=clock)
+    return sweeper, clock, published, finished
+
+
+def _statuses(published):
+    return [(when - T0, message["previous_status"], message["status"]) for when, _, message in published]
+
+
+def test_event_should_report_status_and_end_time():
+    event = _event()
+
+    assert event.end_time == T0 + 15 * MINUTE
+    assert event.status(T0) == EventStatus.PENDING
+    assert event.status(T0 + 10 * MINUTE) == EventStatus.ACTIVE
+    assert event.status(T0 + 15 * MINUTE) == EventStatus.COMPLETED
+    assert _event(event_status="cancelled").status(T0) == EventStatus.CANCELLED
+    # an event with a zero duration runs until it is cancelled
+    assert _event(duration=timedelta(0)).end_time is None
+    assert _event(duration=timedelta(0)).status(T0 + 60 * MINUTE) == EventStatus.ACTIVE
+
+
+def test_sweeper_should_publish_status_transitions_and_evict_finished_events():
+    sweeper, clock, published, finished = _sweeper()
+    sweeper.update("ven123", _event())
+
+    assert clock.deadline == T0 + 10 * MINUTE
+    clock.advance_to(T0 + 60 * MINUTE)
+
+    assert _statuses(published) == [(10 * MINUTE, "pending", "active"), (15 * MINUTE, "active", "completed")]
+    assert {topic for _, topic, _ in published} == {"openadr/event/event-1/ven123/status"}
+    assert published[-1][2]["end"].startswith("2023-01-12T20:15:00")
+    assert finished == [(T0 + 15 * MINUTE, "ven123", "event-1")]
+    assert clock.deadline is None and len(sweeper) == 0
+
+
+def test_sweeper_should_apply_modifications_and_cancellations_at_once():
+    sweeper, clock, published, finished = _sweeper()
+    sweeper.update("ven123", _event())
+    clock.advance_to(T0 + 11 * MINUTE)
+
+    # extending the event drops the end of its previous version
+    sweeper.update("ven123", _event(duration=20 * MINUTE, modification_number=1))
+    clock.advance_to(T0 + 20 * MINUTE)
+    assert sweeper.status("ven123", "event-1") == EventStatus.ACTIVE and not finished
+
+    sweeper.update("ven123", _event(duration=20 * MINUTE, modification_number=2, event_status="cancelled"))
+
+    assert _statuses(published) == [(10 * MINUTE, "pending", "active"), (20 * MINUTE, "active", "cancelled")]
+    # a cancelled event is only evicted once its active period has ended
+    assert not finished and clock.deadline == T0 + 30 * MINUTE
+    clock.advance_to(T0 + 60 * MINUTE)
+
+    assert len(published) == 2
+    assert finished == [(T0 + 30 * MINUTE, "ven123", "event-1")]
+    assert clock.deadline is None and len(sweeper) == 0
+
+
+def test_sweeper_should_only_evict_events_that_were_finished_when_seen_or_test_events():
+    sweeper, clock, published, finished = _sweeper()
+    sweeper.update("ven123", _event(dtstart=T0 - 60 * MINUTE))
+    sweeper.update("ven123", _event("cancelled", event_status="cancelled"))
+    sweeper.update("ven123", _event("open-ended", duration=timedelta(0), event_status="cancelled"))
+    sweeper.update("ven123", _event("test", test_event=True))
+    clock.advance_to(T0 + 60 * MINUTE)
+
+    assert published == []
+    assert finished == [(T0, "ven123", "event-1"), (T0, "ven123", "open-ended"),
+                        (T0 + 15 * MINUTE, "ven123", "cancelled"), (T0 + 15 * MINUTE, "ven123", "test")]
+
+
+def test_sweeper_should_share_one_timer_between_many_events():
+    sweeper, clock, published, finished = _sweeper()
+    for i in range(20000):
+        sweeper.update(f"ven{i % 2}", _event(f"event-{i}", dtstart=T0 + (1 + i % 60) * MINUTE))
+    for i in range(0, 20000, 2):
+        sweeper.update(f"ven{i % 2}", _event(f"event-{i}", dtstart=T0 + (1 + i % 60) * MINUTE, modification_number=1))
+    sweeper.remove("ven1")
+
+    assert len(sweeper) == 10000 and len(sweeper._heap) <= 2 * 10000 + 64
+    clock.advance_to(T0 + 2 * 60 * MINUTE)
+
+    assert len(finished) == 10000 and len(sweeper) == 0
+    assert len(published) == 2 * 10000
+    assert clock.scheduled <= 2 * 60
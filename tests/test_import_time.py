@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+import subprocess
+import sys
+
+import pytest
+
+# modules of the client stack that must not be loaded by importing the agent
+CLIENT_STACK = ("openleadr", "aiohttp", "lxml", "signxml", "openadr_ven.volttron_openadr_client")
+# time that importing the agent may take beyond importing the volttron client it subclasses, in microseconds; generous
+# so that slow machines pass, while a module that pulls in the client stack again (about 150 ms) fails
+AGENT_IMPORT_BUDGET = 100000
+
+
+def _import_times(statement: str):
+    """Run the statement in a fresh interpreter with -X importtime and return the cumulative import time of every
+    module, in microseconds, and the statement's output."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True,
+                            check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times, result.stdout
+
+
+def test_agent_import_should_not_load_client_stack():
+    times, _ = _import_times("import openadr_ven.agent")
+
+    assert not [module for module in times if module.split(".")[0] in CLIENT_STACK or module in CLIENT_STACK]
+    assert times["openadr_ven.agent"] - times["volttron.client"] < AGENT_IMPORT_BUDGET
+
+
+def test_invalid_config_should_fail_before_client_stack_is_imported(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text('{"vtn_url": "http://127.0.0.1:8080/OpenADR2/Simple/2.0b"}')
+
+    _, output = _import_times(
+        "import sys\n"
+        "from openadr_ven.agent import OpenADRVenAgent\n"
+        "try:\n"
+        f"    OpenADRVenAgent({str(config_path)!r})\n"
+        "except Exception as e:\n"
+        "    print(type(e).__name__)\n"
+        "print('openleadr' in sys.modules)\n")
+
+    assert output.split() == ["KeyError", "False"]
+
+
+@pytest.mark.parametrize("preload", [True, False])
+def test_client_stack_should_be_imported_by_preload(preload):
+    _, output = _import_times(
+        "import sys\n"
+        "from openadr_ven import agent\n"
+        f"if {preload}:\n"
+        "    agent.preload_client().join()\n"
+        "print(agent.CLIENT_MODULE in sys.modules)\n")
+
+    assert output.split() == [str(preload)]
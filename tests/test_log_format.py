@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+import logging
+from unittest import mock
+
+from openadr_ven.log_format import REDACTED, LazyFormat, PayloadLogger
+
+
+def test_lazy_format_should_redact_and_truncate():
+    config = {"ven_name": "ven123", "passphrase": "secret", "vens": [{"passphrase": "secret2"}]}
+
+    assert "secret" not in str(LazyFormat(config, max_length=0))
+    assert REDACTED in str(LazyFormat(config, max_length=0))
+    assert str(LazyFormat("x" * 100, max_length=10)) == "'xxxxxxxxx... (92 more characters)"
+
+
+class _CountingList(list):
+
+    def __init__(self, items):
+        super().__init__(items)
+        self.visited = 0
+
+    def __iter__(self):
+        for item in super().__iter__():
+            self.visited += 1
+            yield item
+
+
+def test_lazy_format_should_only_format_what_fits_within_the_limit():
+    intervals = _CountingList({"uid": i, "signal_payload": float(i), "duration": 900} for i in range(10000))
+    event = {"event_id": "1", "event_signals": [{"signal_name": "simple", "intervals": intervals}], "passphrase": "x"}
+
+    text = str(LazyFormat(event, max_length=200))
+
+    assert text.startswith("{'event_id': '1',") and text.endswith("... (truncated)")
+    assert len(text) == 200 + len("... (truncated)")
+    # only the intervals that fit are copied and formatted, not all 10000
+    assert intervals.visited < 100
+    assert "'x'" not in str(LazyFormat(event, max_length=100000))
+
+
+def test_payload_logger_should_not_build_disabled_payloads(caplog):
+    payload = mock.Mock(return_value={"event_id": "1"})
+    event_log = PayloadLogger(logging.getLogger("test_log_format"))
+
+    with caplog.at_level(logging.INFO, logger="test_log_format"):
+        event_log.detail(logging.DEBUG, "Publishing %s", payload, "1")
+        event_log.enabled = False
+        event_log.detail(logging.INFO, "Publishing %s", payload, "1")
+        payload.assert_not_called()
+
+        event_log.enabled = True
+        event_log.detail(logging.INFO, "Publishing %s", payload, "1")
+
+    assert caplog.messages == ["Publishing 1\n {'event_id': '1'}"]
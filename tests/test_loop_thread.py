@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+import asyncio
+import threading
+import time
+
+import gevent
+import pytest
+
+from openadr_ven.loop_thread import AsyncioLoopThread, GeventDispatcher
+
+
+@pytest.fixture
+def loop_thread():
+    loop_thread = AsyncioLoopThread(GeventDispatcher())
+    loop_thread.start()
+    yield loop_thread
+    loop_thread.stop()
+    loop_thread.dispatcher.close()
+
+
+def test_dispatch_should_run_callables_on_gevent_thread(loop_thread):
+    gevent_thread = threading.get_ident()
+    calls = []
+
+    async def handler():
+        loop_thread.dispatcher.dispatch(lambda: calls.append(threading.get_ident()))
+
+    loop_thread.submit(handler()).result(timeout=5)
+    with gevent.Timeout(5):
+        while not calls:
+            gevent.sleep(0.01)
+
+    assert calls == [gevent_thread]
+
+
+def test_dispatch_should_fail_once_closed(loop_thread):
+    loop_thread.dispatcher.close()
+
+    async def handler():
+        loop_thread.dispatcher.dispatch(lambda: None)
+
+    with pytest.raises(RuntimeError):
+        loop_thread.submit(handler()).result(timeout=5)
+
+
+def test_call_should_run_on_loop_thread_and_return_result(loop_thread):
+
+    def in_loop():
+        return asyncio.get_running_loop() is loop_thread.loop
+
+    assert loop_thread.call(in_loop)
+
+
+def test_call_soon_should_run_on_loop_thread_in_order(loop_thread):
+    calls = []
+
+    for i in range(3):
+        loop_thread.call_soon(lambda i: calls.append((i, loop_thread.in_loop_thread())), i)
+
+    assert loop_thread.call(len, calls) == 3
+    assert calls == [(0, True), (1, True), (2, True)]
+
+
+def test_stop_should_let_greenlets_run_and_allow_a_restart(loop_thread):
+    ticks = []
+
+    def tick():
+        while True:
+            ticks.append(None)
+            gevent.sleep(0.001)
+
+    ticker = gevent.spawn(tick)
+    gevent.sleep(0)
+    # keep the loop busy, so that stopping it takes a while
+    loop_thread.call_soon(time.sleep, 0.2)
+    loop_thread.stop()
+    ticker.kill()
+
+    assert not loop_thread.is_running() and len(ticks) > 10
+    loop_thread.start()
+    assert loop_thread.call(loop_thread.in_loop_thread)
+
+
+def test_call_should_raise_exceptions_from_loop_thread(loop_thread):
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        loop_thread.call(fail)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from openadr_ven.metrics import MetricsRegistry, timed
+
+import pytest
+
+
+def test_render_should_use_prometheus_text_format():
+    registry = MetricsRegistry()
+    events = registry.counter("events_total", "Handled events", ["ven_name"])
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    events.labels("ven123").inc()
+    events.labels("ven123").inc(2)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP events_total Handled events",
+        "# TYPE events_total counter",
+        'events_total{ven_name="ven123"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_labels_should_require_every_label():
+    events = MetricsRegistry().counter("events_total", "Handled events", ["ven_name"])
+
+    with pytest.raises(ValueError):
+        events.labels()
+
+
+def test_timed_should_observe_failing_calls():
+    latency = MetricsRegistry().histogram("latency_seconds", "Latency")
+
+    def fail():
+        raise RuntimeError()
+
+    with pytest.raises(RuntimeError):
+        timed(latency.labels(), fail)()
+    assert latency.snapshot()[""]["count"] == 1
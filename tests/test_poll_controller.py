@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from openadr_ven.poll_controller import AdaptivePollController, POLL_EMPTY, POLL_EVENTS, POLL_ERROR
+
+import pytest
+
+
+def test_next_delay_should_back_off_while_idle_up_to_the_cap():
+    controller = AdaptivePollController(10, max_poll_interval=30, jitter=0)
+
+    assert [controller.next_delay(POLL_EMPTY) for _ in range(5)] == [10, 15, 22.5, 30, 30]
+    assert controller.next_delay(POLL_EVENTS) == 5
+    assert controller.next_delay(POLL_EMPTY, active=True) == 5
+    assert controller.next_delay(POLL_EMPTY) == 10
+
+
+def test_next_delay_should_back_off_exponentially_with_jitter_on_errors():
+    controller = AdaptivePollController(10, max_poll_interval=60, seed=1)
+
+    delays = [controller.next_delay(POLL_ERROR) for _ in range(4)]
+
+    for delay, backoff in zip(delays, [20, 40, 60, 60]):
+        assert backoff / 2 <= delay <= backoff
+    assert len(set(delays)) == 4
+    assert 9 <= controller.next_delay(POLL_EMPTY) <= 11
+
+
+def test_next_delay_should_stay_capped_after_thousands_of_polls():
+    controller = AdaptivePollController(10, max_poll_interval=60, jitter=0, seed=1)
+
+    assert [controller.next_delay(POLL_EMPTY) for _ in range(5000)][-1] == 60
+    delays = [controller.next_delay(POLL_ERROR) for _ in range(5000)]
+    assert max(delays) <= 60 and min(delays[3:]) >= 30
+    assert controller.next_delay(POLL_EVENTS) == 5
+
+
+def test_first_delay_should_spread_vens_over_the_poll_interval():
+    assert [AdaptivePollController(60, phase=i / 4).first_delay() for i in range(4)] == [0, 15, 30, 45]
+
+
+def test_configure_should_reject_inconsistent_intervals():
+    with pytest.raises(ValueError):
+        AdaptivePollController(10, active_poll_interval=20)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from openadr_ven.publish_queue import PublishQueue
+
+import asyncio
+import pytest
+
+
+def test_queue_should_coalesce_items_put_within_the_window():
+    batches = []
+
+    async def put_burst():
+        queue = PublishQueue(lambda batch, done: batches.append(batch), window=0.01, max_depth=10)
+        for i in range(3):
+            await queue.put(i)
+        assert batches == []
+        await asyncio.sleep(0.05)
+        await queue.put(3)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(put_burst())
+
+    assert batches == [[0, 1, 2], [3]]
+
+
+def test_full_queue_should_flush_and_wait_for_room():
+    batches = []
+
+    async def put_burst():
+        queue = PublishQueue(lambda batch, done: batches.append((batch, done)), window=60, max_depth=2)
+        await queue.put(0)
+        await queue.put(1)
+        blocked = asyncio.ensure_future(queue.put(2))
+        await asyncio.sleep(0)
+        assert not blocked.done() and len(queue) == 2
+        batches[0][1]()
+        await asyncio.wait_for(blocked, 1)
+        assert len(queue) == 1
+        queue.flush()
+
+    asyncio.run(put_burst())
+
+    assert [batch for batch, _ in batches] == [[0, 1], [2]]
+
+
+def test_failed_flush_should_release_its_room():
+
+    def flush(batch, done):
+        raise RuntimeError("the dispatcher is closed")
+
+    async def put_burst():
+        queue = PublishQueue(flush, window=60, max_depth=2)
+        for i in range(5):
+            await asyncio.wait_for(queue.put(i), 1)
+        return len(queue)
+
+    assert asyncio.run(put_burst()) == 1
+
+
+def test_queue_should_reject_invalid_settings():
+    with pytest.raises(ValueError):
+        PublishQueue(lambda batch, done: None, window=0, max_depth=10)
+    with pytest.raises(ValueError):
+        PublishQueue(lambda batch, done: None, window=0.1, max_depth=0)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+from openleadr.client import OpenADRClient
+
+from openadr_ven.metrics import VenMetrics, timed
+from openadr_ven.reporting import RingBuffer, TelemetryBuffer
+from openadr_ven.volttron_openadr_client import VolttronOpenADRClient
+
+T0 = datetime(2023, 1, 12, 20, 0, tzinfo=timezone.utc)
+TOPIC = "devices/campus/building/meter1/all"
+
+
+def test_ring_buffer_should_keep_newest_samples_in_fixed_memory():
+    buffer = RingBuffer(3)
+    for i in range(5):
+        buffer.append(float(i), i * 10.0)
+
+    timestamps, values = buffer.window(0, 10)
+
+    assert list(timestamps) == [2.0, 3.0, 4.0]
+    assert list(values) == [20.0, 30.0, 40.0]
+    assert buffer.last() == (4.0, 40.0)
+    assert not buffer.append(1.0, 0.0)
+
+
+def test_samples_should_keep_last_sample_per_sampling_interval():
+    telemetry = TelemetryBuffer()
+    telemetry.add_series(TOPIC, "Power", capacity=100)
+    for second in range(0, 60, 5):
+        telemetry.record(TOPIC, [{"Power": second, "Status": "on"}, {}], T0 + timedelta(seconds=second))
+
+    samples = telemetry.samples(TOPIC, "Power", T0, T0 + timedelta(seconds=59), timedelta(seconds=20))
+
+    assert samples == [(T0 + timedelta(seconds=15), 15.0), (T0 + timedelta(seconds=35), 35.0),
+                       (T0 + timedelta(seconds=55), 55.0)]
+
+
+def test_telemetry_report_should_be_answered_in_one_batch():
+    telemetry = TelemetryBuffer()
+    telemetry.add_series(TOPIC, "Power", capacity=10)
+    openadr_client = OpenADRClient("ven123", "http://127.0.0.1:8080/OpenADR2/Simple/2.0b", show_fingerprint=False)
+    client = VolttronOpenADRClient(openadr_client)
+
+    report_specifier_id, r_id = client.add_telemetry_report(partial(telemetry.samples, TOPIC, "Power"),
+                                                            report_name="TELEMETRY_USAGE",
+                                                            resource_id="meter1",
+                                                            measurement="REAL_POWER",
+                                                            unit="W")
+
+    assert openadr_client.reports[0].data_collection_mode == "full"
+    assert (report_specifier_id, r_id) in openadr_client.report_callbacks
+
+
+def test_timed_telemetry_report_should_be_accepted_by_openleadr():
+    telemetry = TelemetryBuffer()
+    telemetry.add_series(TOPIC, "Power", capacity=10)
+    openadr_client = OpenADRClient("ven123", "http://127.0.0.1:8080/OpenADR2/Simple/2.0b", show_fingerprint=False)
+    client = VolttronOpenADRClient(openadr_client)
+    callback = timed(VenMetrics().report_callback_seconds.labels("ven123", "meter1"),
+                     partial(telemetry.samples, TOPIC, "Power"))
+
+    report_ids = client.add_telemetry_report(callback, report_name="TELEMETRY_USAGE", resource_id="meter1",
+                                             measurement="REAL_POWER", unit="W")
+
+    assert openadr_client.report_callbacks[report_ids] is callback
+
+
+def test_aggregates_should_cover_samples_since_last_read():
+    telemetry = TelemetryBuffer()
+    mean = telemetry.add_aggregate(TOPIC, "Power", "mean", key="mean")
+    maximum = telemetry.add_aggregate(TOPIC, "Power", "max", key="max")
+    assert mean.report() == []
+
+    for second, power in enumerate([1, 2, 6]):
+        telemetry.record(TOPIC, [{"Power": power}, {}], T0 + timedelta(seconds=second))
+
+    assert (mean.read(), maximum.read()) == (3.0, 6.0)
+    assert (mean.read(), maximum.read()) == (6.0, 6.0)
+    assert telemetry.add_aggregate(TOPIC, "Power", "mean", key="mean") is mean
+
+
+def test_report_should_be_sampled_incrementally():
+    openadr_client = OpenADRClient("ven123", "http://127.0.0.1:8080/OpenADR2/Simple/2.0b", show_fingerprint=False)
+    client = VolttronOpenADRClient(openadr_client)
+
+    report_specifier_id, r_id = client.add_report(lambda: 1.0,
+                                                  report_name="TELEMETRY_USAGE",
+                                                  resource_id="meter1",
+                                                  measurement="REAL_POWER",
+                                                  unit="W")
+
+    report = openadr_client.reports[0]
+    assert report.data_collection_mode == "incremental"
+    assert report.report_descriptions[0].report_subject.resource_id == "meter1"
+    assert (report_specifier_id, r_id) in openadr_client.report_callbacks
+
+
+def test_reports_should_be_split_by_collection_mode():
+    telemetry = TelemetryBuffer()
+    telemetry.add_series(TOPIC, "Power", capacity=10)
+    aggregate = telemetry.add_aggregate(TOPIC, "Power", "mean", key="mean")
+    openadr_client = OpenADRClient("ven123", "http://127.0.0.1:8080/OpenADR2/Simple/2.0b", show_fingerprint=False)
+    client = VolttronOpenADRClient(openadr_client)
+
+    full = client.add_telemetry_report(partial(telemetry.samples, TOPIC, "Power"), resource_id="meter1",
+                                       report_name="TELEMETRY_USAGE", measurement="REAL_POWER", unit="W")
+    incremental = client.add_report(aggregate.report, resource_id="meter2", report_name="TELEMETRY_USAGE",
+                                    measurement="REAL_POWER", unit="W")
+    second_full = client.add_telemetry_report(partial(telemetry.samples, TOPIC, "Power"), resource_id="meter3",
+                                              report_name="TELEMETRY_USAGE", measurement="REAL_POWER", unit="W")
+
+    reports = {report.report_specifier_id: report for report in openadr_client.reports}
+    assert [report.data_collection_mode for report in openadr_client.reports] == ["full", "incremental"]
+    assert full[0] == second_full[0] != incremental[0]
+    assert reports[full[0]].data_collection_mode == "full" and len(reports[full[0]].report_descriptions) == 2
+    assert reports[incremental[0]].data_collection_mode == "incremental"
+    for report_ids in (full, incremental, second_full):
+        assert report_ids in openadr_client.report_callbacks
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from openadr_ven.signal_index import IntervalIndex, SignalIndex
+from openadr_ven.openadr_event import OpenADREvent
+
+NOW = datetime(2023, 1, 12, 20, 0, tzinfo=timezone.utc)
+
+
+def _event(event_id, payloads, dtstart=NOW, event_status="far"):
+    interval = timedelta(minutes=15)
+    return OpenADREvent({
+        "event_descriptor": {
+            "event_id": event_id,
+            "modification_number": 0,
+            "event_status": event_status,
+        },
+        "active_period": {
+            "dtstart": dtstart,
+            "duration": interval * len(payloads)
+        },
+        # intervals without their own dtstart follow each other from the start of the active period
+        "event_signals": [{
+            "signal_name": "simple",
+            "signal_type": "level",
+            "signal_id": "signal-1",
+            "intervals": [{"duration": interval, "uid": i, "signal_payload": p} for i, p in enumerate(payloads)],
+        }],
+    })
+
+
+def test_interval_index_should_match_brute_force():
+    rng = random.Random(1)
+    index = IntervalIndex()
+    intervals = []
+    for i in range(5000):
+        start = rng.uniform(0, 10000)
+        end = None if i % 500 == 0 else start + rng.uniform(1, 100)
+        index.add(i % 50, start, end, i)
+        intervals.append((start, end, i % 50, i))
+    index.remove(7)
+    intervals = [interval for interval in intervals if interval[2] != 7]
+
+    for _ in range(100):
+        start = rng.uniform(0, 10000)
+        end = start + rng.uniform(0, 200)
+        expected = [item for s, e, _, item in sorted(intervals, key=lambda x: (x[0], x[3]))
+                    if s < end and (e is None or e > start)]
+        assert index.overlapping(start, end) == expected
+        expected = [item for s, e, _, item in sorted(intervals, key=lambda x: (x[0], x[3]))
+                    if s <= start and (e is None or e > start)]
+        assert index.containing(start) == expected
+
+
+def test_signal_index_should_answer_time_queries():
+    index = SignalIndex()
+    index.update(_event("event-1", [1.0, 2.0, 3.0]))
+    index.update(_event("event-2", [5.0], dtstart=NOW + timedelta(hours=2)))
+    index.update(_event("event-3", [9.0], event_status="cancelled"))
+
+    values = index.signal_values_at(NOW + timedelta(minutes=20))
+    assert [(v["event_id"], v["value"], v["dtstart"]) for v in values] == \
+        [("event-1", 2.0, "2023-01-12T20:15:00.000000+00:00")]
+    assert [e["event_descriptor"]["event_id"] for e in index.active_events(NOW)] == ["event-1"]
+    assert [e["event_descriptor"]["event_id"] for e in index.events_between(NOW + timedelta(minutes=40),
+                                                                           NOW + timedelta(hours=3))] == \
+        ["event-1", "event-2"]
+
+    index.update(_event("event-1", [4.0]))
+    assert index.signal_values_at(NOW + timedelta(minutes=20)) == []
+    # cancelled events are reported until they are removed
+    assert [e["event_descriptor"]["event_id"] for e in index.events_between(NOW, NOW + timedelta(minutes=1))] == \
+        ["event-3", "event-1"]
+    index.remove("event-1")
+    assert "event-1" not in index and "event-3" in index
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime, timedelta, timezone
+
+from openadr_ven.signal_scheduler import SignalScheduler
+from openadr_ven.openadr_event import OpenADREvent
+
+T0 = datetime(2023, 1, 12, 20, 0, tzinfo=timezone.utc)
+MINUTE = timedelta(minutes=1)
+
+
+class FakeClock:
+    """A clock and a single-shot timer that only move when the test advances them."""
+
+    def __init__(self):
+        self.now = T0
+        self.deadline = None
+        self.callback = None
+
+    def __call__(self):
+        return self.now
+
+    def schedule(self, deadline, callback):
+        self.deadline, self.callback = deadline, callback
+        timer = self
+
+        class Timer:
+
+            def cancel(self):
+                if timer.callback is callback:
+                    timer.deadline = timer.callback = None
+
+        return Timer()
+
+    def advance_to(self, when):
+        # fire the timer at its deadline, as often as it is rescheduled before the target time
+        while self.deadline is not None and self.deadline <= when:
+            self.now = self.deadline
+            callback, self.deadline, self.callback = self.callback, None, None
+            callback()
+        self.now = when
+
+
+def _event(payloads, dtstart=T0 + 10 * MINUTE, modification_number=0, event_status="far", **active_period):
+    return OpenADREvent({
+        "event_descriptor": {
+            "event_id": "event-1",
+            "modification_number": modification_number,
+            "event_status": event_status,
+            "test_event": False,
+        },
+        "active_period": {
+            "dtstart": dtstart,
+            "duration": 5 * MINUTE * len(payloads),
+            **active_period
+        },
+        "event_signals": [{
+            "signal_name": "simple",
+            "signal_type": "level",
+            "signal_id": "signal-1",
+            "intervals": [{"duration": 5 * MINUTE, "uid": i, "signal_payload": p} for i, p in enumerate(payloads)],
+        }],
+    })
+
+
+def _scheduler():
+    clock = FakeClock()
+    published = []
+    scheduler = SignalScheduler(lambda topic, message: published.append((clock.now, topic, message)),
+                                clock.schedule, clock=clock)
+    return scheduler, clock, published
+
+
+def _states(published):
+    return [(when - T0, message["state"], message["value"]) for when, _, message in published]
+
+
+def test_scheduler_should_publish_interval_boundaries_from_one_timer():
+    scheduler, clock, published = _scheduler()
+    scheduler.update("ven123", _event([1.0, 2.0], ramp_up=2 * MINUTE))
+
+    assert clock.deadline == T0 + 8 * MINUTE
+    clock.advance_to(T0 + 60 * MINUTE)
+
+    assert _states(published) == [(8 * MINUTE, "ramp_up", 1.0), (10 * MINUTE, "start", 1.0),
+                                  (15 * MINUTE, "start", 2.0), (20 * MINUTE, "end", None)]
+    assert {topic for _, topic, _ in published} == {"openadr/signal/ven123/simple"}
+    assert clock.deadline is None and len(scheduler) == 0
+
+
+def test_scheduler_should_randomize_start_within_tolerance():
+    scheduler, clock, published = _scheduler()
+    scheduler.update("ven123", _event([1.0], tolerance={"tolerate": {"startafter": 3 * MINUTE}}))
+    clock.advance_to(T0 + 60 * MINUTE)
+
+    (start, _, first), (end, _, _) = published
+    assert T0 + 10 * MINUTE <= start <= T0 + 13 * MINUTE
+    assert end - start == 5 * MINUTE
+    assert first["dtstart"].startswith(start.strftime("%Y-%m-%dT%H:%M"))
+
+    # the offset only depends on the VEN and the event, so it survives restarts and modifications
+    scheduler, clock, republished = _scheduler()
+    scheduler.update("ven123", _event([1.0], tolerance={"tolerate": {"startafter": 3 * MINUTE}}))
+    clock.advance_to(T0 + 60 * MINUTE)
+    assert [when for when, _, _ in republished] == [start, end]
+
+
+def test_scheduler_should_apply_modifications_and_cancellations_at_once():
+    scheduler, clock, published = _scheduler()
+    scheduler.update("ven123", _event([1.0, 2.0]))
+    clock.advance_to(T0 + 12 * MINUTE)
+
+    scheduler.update("ven123", _event([3.0, 2.0], modification_number=1))
+    clock.advance_to(T0 + 13 * MINUTE)
+    scheduler.update("ven123", _event([3.0, 2.0], modification_number=2, event_status="cancelled"))
+    clock.advance_to(T0 + 60 * MINUTE)
+
+    assert _states(published) == [(10 * MINUTE, "start", 1.0), (12 * MINUTE, "start", 3.0),
+                                  (13 * MINUTE, "end", None)]
+    assert len(scheduler) == 0
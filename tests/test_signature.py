@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from openleadr import errors, utils
+from openleadr.messaging import create_message, validate_xml_schema
+
+from openadr_ven.metrics import VenMetrics
+from openadr_ven.signature import SignatureVerifier, load_private_key
+from openadr_ven.volttron_openadr_client import VolttronOpenADRClient
+
+import asyncio
+import pytest
+
+
+def _certificate_and_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "vtn")])
+    now = datetime.now(timezone.utc)
+    certificate = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key()) \
+        .serial_number(x509.random_serial_number()).not_valid_before(now - timedelta(days=1)) \
+        .not_valid_after(now + timedelta(days=1)).sign(key, hashes.SHA256())
+    return (certificate.public_bytes(serialization.Encoding.PEM),
+            key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                              serialization.NoEncryption()))
+
+
+@pytest.fixture(scope="module")
+def vtn_credentials():
+    return _certificate_and_key()
+
+
+def _signed_response(cert, key):
+    message = create_message("oadrResponse", cert=cert, key=key, response={
+        "response_code": 200, "response_description": "OK", "request_id": "request"}, ven_id="ven_id_123")
+    return message.encode("utf-8")
+
+
+def test_verifier_should_parse_the_certificate_once_and_reject_replays(vtn_credentials):
+    cert, key = vtn_credentials
+    verifier = SignatureVerifier(utils.certificate_fingerprint(cert))
+
+    first, second = _signed_response(cert, key), _signed_response(cert, load_private_key(key))
+
+    verifier.verify(validate_xml_schema(first))
+    verifier.verify(validate_xml_schema(second))
+    with pytest.raises(ValueError, match="already used"):
+        verifier.verify(validate_xml_schema(first))
+    assert verifier.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "size": 1}
+
+
+def test_verifier_should_reject_messages_signed_with_another_certificate(vtn_credentials):
+    cert, key = vtn_credentials
+    other_cert, other_key = _certificate_and_key()
+    verifier = SignatureVerifier(utils.certificate_fingerprint(cert))
+    content = _signed_response(other_cert, other_key)
+
+    with pytest.raises(errors.FingerprintMismatch):
+        verifier.verify(validate_xml_schema(content))
+    assert verifier.stats()["size"] == 0
+
+
+def test_client_should_verify_vtn_responses_with_the_verifier(vtn_credentials):
+    cert, key = vtn_credentials
+    responses = [_signed_response(cert, key)] * 2
+
+    class _Response:
+        status = 200
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            pass
+
+        async def read(self):
+            return responses.pop(0)
+
+    openadr_client = mock.Mock(ven_name="ven123", vtn_url="http://vtn", _ensure_client_session=mock.AsyncMock())
+    openadr_client.client_session.post.side_effect = lambda url, data: _Response()
+    metrics = VenMetrics()
+    client = VolttronOpenADRClient(openadr_client, metrics=metrics,
+                                   signature_verifier=SignatureVerifier(utils.certificate_fingerprint(cert)))
+
+    assert asyncio.run(openadr_client._perform_request("EiEvent", "<message/>"))[0] == "oadrResponse"
+    # the replayed response is rejected by the replay protection
+    assert asyncio.run(openadr_client._perform_request("EiEvent", "<message/>")) == (None, {})
+    assert metrics.signature_verifications.labels("ven123", "verified").value == 1
+    assert metrics.signature_verifications.labels("ven123", "rejected").value == 1
+    assert client.get_signature_cache_stats()["hits"] == 1
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*- {{{
+# ===----------------------------------------------------------------------===
+#
+#                 Installable Component of Eclipse VOLTTRON
+#
+# ===----------------------------------------------------------------------===
+#
+# Copyright 2022 Battelle Memorial Institute
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+# ===----------------------------------------------------------------------===
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from unittest import mock
+
+from volttron.utils import format_timestamp, jsonapi
+
+from openadr_ven.metrics import VenMetrics
+from openadr_ven.openadr_event import OpenADREvent
+from openadr_ven.volttron_openadr_client import VenState, VolttronOpenADRClient
+
+
+def _json_round_trip(obj):
+
+    def _default_serializer(x):
+        if isinstance(x, timedelta):
+            return int(x.total_seconds())
+        elif isinstance(x, datetime):
+            return format_timestamp(x)
+        return None
+
+    return jsonapi.loads(jsonapi.dumps(obj, default=_default_serializer))
+
+
+def _event(num_intervals=3):
+    dtstart = datetime(2023, 1, 12, 20, 5, 47, 204310, tzinfo=timezone.utc)
+    return {
+        "event_descriptor": {
+            "event_id": "2ab3526f-235b-4c66-8b31-e04a95406913",
+            "modification_number": 0,
+            "created_date_time": dtstart,
+            "event_status": "far",
+            "test_event": False,
+        },
+        "active_period": {
+            "dtstart": dtstart,
+            "duration": timedelta(hours=num_intervals)
+        },
+        "event_signals": [{
+            "signal_name": "simple",
+            "signal_type": "level",
+            "intervals": [{
+                "dtstart": dtstart + timedelta(hours=i),
+                "duration": timedelta(hours=1),
+                "signal_payload": 100.0,
+                "uid": i,
+            } for i in range(num_intervals)],
+        }],
+        "targets": [{"ven_id": "ven_id_123"}],
+        "targets_by_type": {"ven_id": ("ven_id_123", )},
+        "response_required": "always",
+    }
+
+
+def test_parse_event_should_match_json_round_trip():
+    event = _event()
+    event["event_descriptor"]["modification_date_time"] = datetime(
+        2023, 1, 12, 14, 0, tzinfo=timezone(timedelta(hours=-5, minutes=-30)))
+    event["event_descriptor"][1] = object()
+
+    assert OpenADREvent(event).parse_event() == _json_round_trip(event)
+
+
+def test_parse_event_should_match_json_round_trip_for_intervals_that_are_not_compacted():
+    event = _event()
+    intervals = event["event_signals"][0]["intervals"]
+    intervals[0]["signal_payload"] = 1
+    intervals[1]["dtstart"] = intervals[1]["dtstart"].replace(tzinfo=None)
+    event["event_signals"].append({"signal_name": "simple", "intervals": [{"uid": "a", "extra": [1, 2]}]})
+
+    assert OpenADREvent(event).parse_event() == _json_round_trip(event)
+
+
+def test_event_should_round_trip_through_its_payload():
+    event = OpenADREvent(_event(num_intervals=24))
+    restored = OpenADREvent.from_payload(event.parse_event())
+
+    assert restored.parse_event() == event.parse_event()
+    assert restored.content_hash() == event.content_hash()
+    assert restored.time_span() == event.time_span()
+    assert [list(s.intervals()) for s in restored.signals] == [list(s.intervals()) for s in event.signals]
+
+
+def test_parse_event_should_not_keep_the_payload():
+    event = OpenADREvent(_event())
+    payload = event.parse_event()
+    payload["event_signals"].clear()
+
+    assert event.parse_event() is not payload
+    assert len(event.parse_event()["event_signals"]) == 1
+
+
+def test_event_should_hold_intervals_in_arrays():
+    event = OpenADREvent(_event(num_intervals=4))
+    signal = event.signals[0]
+    dtstart = datetime(2023, 1, 12, 20, 5, 47, 204310, tzinfo=timezone.utc)
+
+    assert len(signal) == 4
+    assert list(signal.payload_values()) == [100.0] * 4
+    assert list(signal.intervals())[1] == (dtstart + timedelta(hours=1), timedelta(hours=1), 1, 100.0)
+    assert signal.signal_name is OpenADREvent(_event()).signals[0].signal_name
+
+
+def test_content_hash_should_change_with_the_payload():
+    event = _event()
+    changed = _event()
+    changed["event_signals"][0]["intervals"][2]["signal_payload"] = 50.0
+
+    assert OpenADREvent(event).content_hash() == OpenADREvent(_event()).content_hash()
+    assert OpenADREvent(event).content_hash() != OpenADREvent(changed).content_hash()
+
+
+class _FakeOpenLEADRClient:
+
+    def __init__(self, registration_id):
+        self.ven_name = "ven123"
+        self.registration_id = None
+        self._registration_id = registration_id
+        self.client_session = None
+        self.cert_path = self.key_path = self.passphrase = self.ca_file = None
+        self.check_hostname = True
+        self.scheduler = mock.Mock(running=False)
+        self.scheduler.get_jobs.return_value = []
+        self.report_queue_task = None
+        self.received_events = []
+        self.poll_responses = []
+        self.poll_frequency = timedelta(seconds=10)
+
+    def add_handler(self, handler, callback):
+        setattr(self, handler, callback)
+
+    async def _on_event(self, message):
+        # like openleadr, awaits the handler of each event in turn
+        results = []
+        for event in message["events"]:
+            self.received_events.append(event)
+            results.append(await self.on_event(event))
+        return results
+
+    async def poll(self):
+        return self.poll_responses.pop(0) if self.poll_responses else ("oadrResponse", {})
+
+    async def _poll(self):
+        # like openleadr, polls again after every message until the VTN has nothing left to send
+        response_type, _ = await self.poll()
+        if response_type not in (None, "oadrResponse"):
+            await self._poll()
+
+    async def create_party_registration(self, ven_id=None):
+        self.registration_id = self._registration_id
+
+    async def run(self):
+        await self.create_party_registration()
+
+
+def test_run_should_report_readiness_states_in_order():
+    states = []
+    client = VolttronOpenADRClient(_FakeOpenLEADRClient("reg_id_123"))
+    client.set_state_listener(states.append)
+
+    async def run_and_stop():
+        await client.run()
+        await client.stop()
+
+    asyncio.run(run_and_stop())
+
+    assert states == [VenState.REGISTERING, VenState.REGISTERED, VenState.POLLING, VenState.STOPPED]
+
+
+def test_run_should_time_registration_and_polls():
+    metrics = VenMetrics()
+    openadr_client = _FakeOpenLEADRClient("reg_id_123")
+    poll_job = mock.Mock(func=openadr_client._poll)
+    openadr_client.scheduler.get_jobs.return_value = [poll_job]
+    client = VolttronOpenADRClient(openadr_client, metrics=metrics)
+
+    async def run_and_poll():
+        await client.run()
+        # openleadr polls again after each message, but that is still one scheduled poll
+        openadr_client.poll_responses = [("oadrDistributeEvent", {"events": []}), ("oadrResponse", {})]
+        await client._poll_once()
+        openadr_client.poll_responses = [(None, {})]
+        await client._poll_once()
+        await client.stop()
+
+    asyncio.run(run_and_poll())
+
+    poll_job.modify.assert_called_once_with(func=client._poll_once)
+    snapshot = metrics.snapshot()
+    assert snapshot["openadr_ven_registration_seconds"]["ven123"]["count"] == 1
+    assert snapshot["openadr_ven_poll_seconds"]["ven123"]["count"] == 2
+    assert snapshot["openadr_ven_poll_errors_total"]["ven123"] == 1
+
+
+def test_adaptive_polling_should_replace_fixed_schedule_and_back_off_on_errors():
+    openadr_client = _FakeOpenLEADRClient("reg_id_123")
+    poll_job = mock.Mock(func=openadr_client._poll)
+    openadr_client.scheduler.get_jobs.return_value = [poll_job, mock.Mock(func=object())]
+    openadr_client.poll_responses = [(None, {}), (None, {}), ("oadrDistributeEvent", {"events": []})]
+    client = VolttronOpenADRClient(openadr_client,
+                                   poll_settings={
+                                       "poll_interval": 0.01,
+                                       "active_poll_interval": None,
+                                       "max_poll_interval": 0.04,
+                                       "poll_jitter": 0
+                                   })
+    delays = []
+    next_delay = None
+
+    async def run_and_poll():
+        nonlocal next_delay
+        await client.run()
+        next_delay = client._poll_controller.next_delay
+
+        def record(outcome, active=False):
+            delays.append((outcome, next_delay(outcome, active)))
+            return 0
+
+        client._poll_controller.next_delay = record
+        while len(delays) < 4:
+            await asyncio.sleep(0.001)
+        await client.stop()
+
+    asyncio.run(run_and_poll())
+
+    poll_job.remove.assert_called_once()
+    assert [outcome for outcome, _ in delays[:4]] == ["error", "error", "events", "empty"]
+    assert 0.01 <= delays[0][1] <= 0.02 and 0.02 <= delays[1][1] <= 0.04
+    assert delays[2][1] == 0.005 and delays[3][1] == 0.01
+
+
+def test_adaptive_polling_should_survive_unexpected_errors():
+    client = VolttronOpenADRClient(_FakeOpenLEADRClient("reg_id_123"),
+                                   poll_settings={
+                                       "poll_interval": 0.01,
+                                       "active_poll_interval": None,
+                                       "max_poll_interval": 0.01,
+                                       "poll_jitter": 0
+                                   })
+    outcomes = []
+
+    async def run_and_poll():
+        await client.run()
+        poll_once = client._poll_once
+
+        async def flaky_poll_once():
+            outcomes.append(await poll_once())
+            if len(outcomes) == 1:
+                raise RuntimeError("unexpected")
+            return outcomes[-1]
+
+        client._poll_once = flaky_poll_once
+        while len(outcomes) < 3:
+            await asyncio.sleep(0.005)
+        polling = not client._poll_task.done()
+        await client.stop()
+        return polling
+
+    assert asyncio.run(asyncio.wait_for(run_and_poll(), 5))
+
+
+def test_run_should_report_failed_registration():
+    client = VolttronOpenADRClient(_FakeOpenLEADRClient(None))
+
+    async def run():
+        await client.run()
+        state = client.get_state()
+        await client.stop()
+        return state
+
+    assert asyncio.run(run()) == VenState.FAILED
+
+
+def test_on_event_should_not_hold_up_events_behind_a_waiting_handler():
+    client = VolttronOpenADRClient(_FakeOpenLEADRClient("reg_id_123"))
+    first, second = _event(), _event()
+    second["event_descriptor"]["event_id"] = "second"
+
+    async def handle():
+        second_handled = asyncio.Event()
+
+        async def handle_event(event):
+            if event is first:
+                # would never return if the second event were only handled after the first one
+                await asyncio.wait_for(second_handled.wait(), timeout=5)
+                return "optOut"
+            second_handled.set()
+            return "optIn"
+
+        client.add_handler("on_event", handle_event)
+        return await client._openadr_client._on_event({"events": [first, second]})
+
+    assert asyncio.run(handle()) == ["optOut", "optIn"]
@@ -0,0 +1,67 @@
+"""
+=========================
+Event logging overhead benchmark
+=========================
+
+Measures the per-event cost of the log statements on the agent's event path (receiving an event and publishing it)
+when the records are discarded. The eager f-strings with ``pformat`` that the agent used before are compared with the
+lazily formatted ``PayloadLogger`` details, both with the log level above INFO and with INFO enabled but event details
+turned off through ``set_event_logging``. Synthetic events are those of ``bench_parse_event.py``.
+
+Usage::
+
+    python utils/bench_event_logging.py
+"""
+
+import logging
+import timeit
+from pprint import pformat
+
+from bench_parse_event import INTERVAL_COUNTS, make_event
+
+from openadr_ven.log_format import PayloadLogger
+from openadr_ven.openadr_event import OpenADREvent
+
+_log = logging.getLogger("bench_event_logging")
+_log.addHandler(logging.NullHandler())
+_log.propagate = False
+
+
+def eager(event: OpenADREvent) -> None:
+    _log.info(f"Received event. Processing event now...\n Event signal:\n {pformat(event.get_event_signals())}")
+    _log.debug(f"Publishing real/non-test event \n {pformat(event.parse_event())}")
+
+
+def lazy(event_log: PayloadLogger, event: OpenADREvent) -> None:
+    event_log.detail(logging.INFO, "Received event %s for VEN %s. Event signals:",
+                     event.signal_payloads, event.get_event_id(), "ven123")
+    event_log.detail(logging.DEBUG, "Publishing real/non-test event %s", event.parse_event, event.get_event_id())
+
+
+def per_event(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    event_log = PayloadLogger(_log)
+    print(f"{'intervals':>10} {'eager, WARNING (us)':>20} {'lazy, WARNING (us)':>19} {'eager, INFO (us)':>17} "
+          f"{'details off, INFO (us)':>23}")
+    for count in INTERVAL_COUNTS:
+        event = OpenADREvent(make_event(count, num_signals=2))
+        event.parse_event()
+        number = max(1, 2000 // count)
+
+        _log.setLevel(logging.WARNING)
+        eager_warning = per_event(lambda: eager(event), number)
+        lazy_warning = per_event(lambda: lazy(event_log, event), 10000)
+        _log.setLevel(logging.INFO)
+        eager_info = per_event(lambda: eager(event), number)
+        event_log.enabled = False
+        lazy_off = per_event(lambda: lazy(event_log, event), 10000)
+        event_log.enabled = True
+        print(f"{count:>10} {eager_warning * 1e6:>20.2f} {lazy_warning * 1e6:>19.2f} {eager_info * 1e6:>17.2f} "
+              f"{lazy_off * 1e6:>23.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+=======================
+Event memory benchmark
+=======================
+
+Compares the memory that the agent holds per active event in its compact representation (``OpenADREvent`` with its
+``CompactSignal`` arrays, and the entries of the ``SignalIndex``) with the approach that it replaced: the event as
+openleadr hands it to the handler, the parsed copy of it that was kept for publishing, and one dict per signal
+interval in the signal index. Synthetic events are those of ``bench_parse_event.py``, with two signals of 24, 96 and
+288 intervals, for a VEN with 100 active events.
+
+Usage::
+
+    python utils/bench_event_memory.py
+"""
+
+import gc
+import tracemalloc
+
+from bench_parse_event import make_event
+
+from openadr_ven.signal_index import SignalIndex, expand_signal_intervals
+from openadr_ven.openadr_event import OpenADREvent, _to_primitive
+
+INTERVAL_COUNTS = (24, 96, 288)
+EVENTS = 100
+
+
+def retained(build) -> int:
+    """Return the bytes still allocated by build once it has returned, keeping its result alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()  # noqa: F841
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def previous(count: int):
+    events = []
+    for _ in range(EVENTS):
+        event = make_event(count, num_signals=2)
+        values = [value for *_, value in expand_signal_intervals(OpenADREvent(event))]
+        events.append((event, _to_primitive(event), values))
+    return events
+
+
+def compact(count: int):
+    index = SignalIndex()
+    for _ in range(EVENTS):
+        index.update(OpenADREvent(make_event(count, num_signals=2)))
+    return index
+
+
+def main():
+    print(f"{'intervals':>10} {'previous (KiB/event)':>21} {'compact (KiB/event)':>20} {'saving':>7}")
+    for count in INTERVAL_COUNTS:
+        before = retained(lambda: previous(count)) / EVENTS
+        after = retained(lambda: compact(count)) / EVENTS
+        print(f"{count:>10} {before / 1024:>21.1f} {after / 1024:>20.1f} {1 - after / before:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+=======================
+Event sweeper benchmark
+=======================
+
+Times the ``EventSweeper`` that publishes the status of events as they start, end or are cancelled, for tens of
+thousands of events spread over a day: tracking them as they are received, and sweeping them as time passes until
+every event has completed and was evicted. The time is compared with a sweep that checks the status of every event on
+each tick of a one minute timer. The sweeper holds a single timer at any time; the number of times it was reset is
+shown as well. A fake clock stands in for the agent's core timer.
+
+Usage::
+
+    python utils/bench_event_sweeper.py
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from openadr_ven.event_sweeper import EventSweeper
+from openadr_ven.openadr_event import OpenADREvent
+
+EVENT_COUNTS = (1000, 10000, 50000)
+T0 = datetime(2023, 1, 12, tzinfo=timezone.utc)
+TICK = timedelta(minutes=1)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = T0
+        self.deadline = self.callback = None
+        self.timers = 0
+
+    def __call__(self):
+        return self.now
+
+    def schedule(self, deadline, callback):
+        self.deadline, self.callback = deadline, callback
+        self.timers += 1
+        return self
+
+    def cancel(self):
+        self.deadline = self.callback = None
+
+
+def make_events(count: int):
+    return [OpenADREvent({
+        "event_descriptor": {"event_id": f"event-{i}", "modification_number": 0, "event_status": "far",
+                             "test_event": False},
+        "active_period": {"dtstart": T0 + TICK + timedelta(seconds=i * 86400 // count), "duration": timedelta(hours=1)},
+        "event_signals": [],
+    }) for i in range(count)]
+
+
+def sweeper(events) -> int:
+    clock = Clock()
+    published = []
+    sweeper = EventSweeper(lambda topic, message: published.append(message), clock.schedule, clock=clock)
+    for event in events:
+        sweeper.update("ven", event)
+    while clock.deadline is not None:
+        clock.now = clock.deadline
+        clock.deadline = None
+        sweeper.run_due()
+    assert len(sweeper) == 0 and len(published) == 2 * len(events)
+    return clock.timers
+
+
+def ticks(events) -> None:
+    statuses = {event.get_event_id(): event.status(T0) for event in events}
+    now = T0
+    while statuses:
+        now += TICK
+        for event in events:
+            event_id = event.get_event_id()
+            if event_id in statuses:
+                status = event.status(now)
+                if status == "completed":
+                    del statuses[event_id]
+                else:
+                    statuses[event_id] = status
+
+
+def main():
+    print(f"{'events':>7} {'sweeper (ms)':>13} {'timer resets':>13} {'per-tick scan (ms)':>19}")
+    for count in EVENT_COUNTS:
+        events = make_events(count)
+        started = time.perf_counter()
+        timers = sweeper(events)
+        swept = time.perf_counter() - started
+        started = time.perf_counter()
+        ticks(events)
+        scanned = time.perf_counter() - started
+        print(f"{count:>7} {swept * 1e3:>13.1f} {timers:>13} {scanned * 1e3:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
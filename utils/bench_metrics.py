@@ -0,0 +1,59 @@
+"""
+=========================
+Metrics overhead benchmark
+=========================
+
+Measures the per-event cost of the instrumentation that OpenADRVenAgent adds to its event path (the perf_counter
+reads, the received events counter and the parse_event and receipt-to-publish histograms) and compares it with the
+cost of the event path itself: converting a new event into its published payload, indexing it for deduplication and
+the event query RPCs, and serializing the payload as the message bus does. Delivery over the bus is left out, which
+makes the reported overhead an upper bound. The overhead should stay under 1%. Synthetic events are those of ``bench_parse_event.py``.
+
+Usage::
+
+    python utils/bench_metrics.py
+"""
+
+import time
+import timeit
+
+from bench_parse_event import INTERVAL_COUNTS, make_event
+from volttron.utils import jsonapi
+
+from openadr_ven.event_index import EventIndex
+from openadr_ven.metrics import VenMetrics
+from openadr_ven.signal_index import SignalIndex
+from openadr_ven.openadr_event import OpenADREvent
+
+
+def event_path(event: dict) -> None:
+    openadr_event = OpenADREvent(event)
+    EventIndex().update(openadr_event)
+    SignalIndex().update(openadr_event)
+    jsonapi.dumps(openadr_event.parse_event())
+
+
+def instrumentation(metrics: VenMetrics) -> None:
+    received = time.perf_counter()
+    metrics.events_received.labels("ven123").inc()
+    started = time.perf_counter()
+    metrics.parse_event_seconds.observe(time.perf_counter() - started)
+    metrics.event_publish_seconds.labels("ven123").observe(time.perf_counter() - received)
+
+
+def per_call(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    metrics = VenMetrics()
+    overhead = per_call(lambda: instrumentation(metrics), 100000)
+    print(f"{'intervals':>10} {'event path (us)':>16} {'metrics (us)':>13} {'overhead':>9}")
+    for count in INTERVAL_COUNTS:
+        event = make_event(count)
+        path = per_call(lambda: event_path(event), max(1, 2000 // count))
+        print(f"{count:>10} {path * 1e6:>16.2f} {overhead * 1e6:>13.2f} {overhead / path:>9.2%}")
+
+
+if __name__ == "__main__":
+    main()
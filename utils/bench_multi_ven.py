@@ -0,0 +1,110 @@
+"""
+=======================
+Multi-VEN scaling benchmark
+=======================
+
+Starts 1, 10 and 100 VolttronOpenADRClients on one shared asyncio loop, the way OpenADRVenAgent hosts the VENs listed
+under "vens" in its configuration, and measures the time until every VEN is polling and the memory allocated per VEN.
+The VENs register against a local VTN that accepts any VEN name and is started in a subprocess.
+
+Usage::
+
+    python utils/bench_multi_ven.py [--port 8080] [--vens 1 10 100]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from bench_startup import wait_for_port
+
+from openadr_ven.volttron_openadr_client import VenState, VolttronOpenADRClient
+
+
+def run_vtn(port: int) -> None:
+    """Run a VTN that registers every VEN that asks."""
+    from openleadr import OpenADRServer
+
+    async def on_create_party_registration(registration_info):
+        ven_name = registration_info['ven_name']
+        return f"{ven_name}_id", f"{ven_name}_reg"
+
+    server = OpenADRServer(vtn_id='benchvtn', http_port=port, show_fingerprint=False)
+    server.add_handler('on_create_party_registration', on_create_party_registration)
+    loop = asyncio.new_event_loop()
+    loop.create_task(server.run())
+    loop.run_forever()
+
+
+async def start_vens(num_vens: int, vtn_url: str) -> dict:
+    polling = asyncio.Event()
+    ready = set()
+    failed = set()
+
+    def on_state(ven_name, state):
+        if state == VenState.FAILED:
+            failed.add(ven_name)
+        if state in (VenState.POLLING, VenState.FAILED):
+            ready.add(ven_name)
+            if len(ready) == num_vens:
+                polling.set()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    clients = []
+    for i in range(num_vens):
+        ven_name = f"ven{i}"
+        client = VolttronOpenADRClient.build_client({
+            "ven_name": ven_name,
+            "vtn_url": vtn_url,
+            "show_fingerprint": False
+        })
+        client.set_state_listener(lambda state, ven_name=ven_name: on_state(ven_name, state))
+        client.add_handler("on_event", lambda event: "optIn")
+        clients.append(client)
+    tasks = [asyncio.create_task(client.run()) for client in clients]
+    await asyncio.wait_for(polling.wait(), timeout=120)
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    await asyncio.gather(*(client.stop() for client in clients))
+    return {"elapsed": elapsed, "allocated": allocated, "failed": len(failed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--vens", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--vtn", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.vtn:
+        run_vtn(args.port)
+        return
+
+    vtn = subprocess.Popen([sys.executable, __file__, "--vtn", "--port", str(args.port)],
+                           env=os.environ,
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.port)
+        vtn_url = f"http://127.0.0.1:{args.port}/OpenADR2/Simple/2.0b"
+        print(f"{'vens':>5} {'all polling (ms)':>17} {'per VEN (ms)':>13} {'memory (KiB)':>13} {'per VEN (KiB)':>14} "
+              f"{'failed':>7}")
+        for num_vens in args.vens:
+            result = asyncio.run(start_vens(num_vens, vtn_url))
+            print(f"{num_vens:>5} {result['elapsed'] * 1e3:>17.1f} {result['elapsed'] * 1e3 / num_vens:>13.2f} "
+                  f"{result['allocated'] / 1024:>13.1f} {result['allocated'] / 1024 / num_vens:>14.1f} {result['failed']:>7}")
+    finally:
+        vtn.terminate()
+        vtn.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+=========================
+parse_event micro-benchmark
+=========================
+
+Compares the single-pass converter used by ``OpenADREvent`` against the JSON round-trip (``jsonapi.dumps`` followed
+by ``jsonapi.loads``) that it replaced, and times ``OpenADREvent.parse_event``, which rebuilds the payload from the
+compact representation of the event on every call. Synthetic events with 1, 100 and 10,000 intervals
+are generated in the shape that openleadr hands to the ``on_event`` handler.
+
+Usage::
+
+    python utils/bench_parse_event.py
+"""
+
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from volttron.utils import format_timestamp, jsonapi
+
+from openadr_ven.openadr_event import OpenADREvent, _to_primitive
+
+INTERVAL_COUNTS = (1, 100, 10000)
+
+
+def make_event(num_intervals: int, num_signals: int = 1) -> dict:
+    """Build a synthetic event dict with the given number of intervals per signal."""
+    now = datetime.now(timezone.utc)
+    interval_duration = timedelta(minutes=15)
+    signals = []
+    for s in range(num_signals):
+        signals.append({
+            'signal_name': 'ELECTRICITY_PRICE' if s else 'simple',
+            'signal_type': 'price' if s else 'level',
+            'signal_id': str(uuid.uuid4()),
+            'current_value': 0.0,
+            'intervals': [{
+                'dtstart': now + i * interval_duration,
+                'duration': interval_duration,
+                'uid': i,
+                'signal_payload': float(i % 4),
+            } for i in range(num_intervals)],
+        })
+    return {
+        'event_descriptor': {
+            'event_id': str(uuid.uuid4()),
+            'modification_number': 0,
+            'modification_date_time': now,
+            'priority': 0,
+            'market_context': 'oadr://unknown.context',
+            'created_date_time': now,
+            'event_status': 'far',
+            'test_event': False,
+        },
+        'active_period': {
+            'dtstart': now,
+            'duration': num_intervals * interval_duration,
+        },
+        'event_signals': signals,
+        'targets': [{'ven_id': 'ven_id_123'}],
+        'targets_by_type': {'ven_id': ['ven_id_123']},
+        'response_required': 'always',
+    }
+
+
+def _default_serializer(x):
+    if isinstance(x, timedelta):
+        return int(x.total_seconds())
+    elif isinstance(x, datetime):
+        return format_timestamp(x)
+    return None
+
+
+def json_round_trip(event: dict) -> dict:
+    return jsonapi.loads(jsonapi.dumps(event, default=_default_serializer))
+
+
+def main():
+    print(f"{'intervals':>10} {'round-trip (ms)':>16} {'single-pass (ms)':>17} {'compact (ms)':>13} {'speedup':>8}")
+    for count in INTERVAL_COUNTS:
+        event = make_event(count, num_signals=2)
+        assert json_round_trip(event) == _to_primitive(event)
+        number = max(1, 2000 // count)
+        round_trip = min(timeit.repeat(lambda: json_round_trip(event), number=number, repeat=5)) / number
+        single_pass = min(timeit.repeat(lambda: _to_primitive(event), number=number, repeat=5)) / number
+        openadr_event = OpenADREvent(event)
+        assert openadr_event.parse_event() == _to_primitive(event)
+        # every call rebuilds the payload; nothing is kept with the event
+        assert openadr_event.parse_event() is not openadr_event.parse_event()
+        compact = min(timeit.repeat(openadr_event.parse_event, number=number, repeat=5)) / number
+        print(f"{count:>10} {round_trip * 1e3:>16.3f} {single_pass * 1e3:>17.3f} {compact * 1e3:>13.3f} "
+              f"{round_trip / single_pass:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
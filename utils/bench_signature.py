@@ -0,0 +1,112 @@
+"""
+===========================
+Signed message benchmark
+===========================
+
+Times the handling of an ``oadrDistributeEvent`` response from the VTN, from its bytes to its parsed payload, with
+signatures disabled (schema validation and parsing only), with openleadr's signature verification, and with the
+``SignatureVerifier`` of ``VolttronOpenADRClient``, which parses the VTN's certificate once. It also times the signing
+of the VEN's own messages with the private key parsed for every message, as openleadr does, and parsed once. A
+throwaway certificate and key are generated for the run.
+
+Usage::
+
+    python utils/bench_signature.py
+"""
+
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from openleadr import messaging, utils
+from openleadr.messaging import create_message, parse_message, validate_xml_schema, validate_xml_signature
+
+from openadr_ven.signature import SignatureVerifier, load_private_key
+
+MESSAGES = 200
+
+
+def credentials():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "vtn")])
+    now = datetime.now(timezone.utc)
+    certificate = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key()) \
+        .serial_number(x509.random_serial_number()).not_valid_before(now - timedelta(days=1)) \
+        .not_valid_after(now + timedelta(days=1)).sign(key, hashes.SHA256())
+    return (certificate.public_bytes(serialization.Encoding.PEM),
+            key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                              serialization.BestAvailableEncryption(b"secret")))
+
+
+def distribute_event(cert=None, key=None, passphrase=None, intervals=24):
+    now = datetime.now(timezone.utc)
+    return create_message("oadrDistributeEvent", cert=cert, key=key, passphrase=passphrase,
+                          disable_signature=cert is None, request_id="request", vtn_id="vtn", events=[{
+                              "event_descriptor": {
+                                  "event_id": "event", "modification_number": 0, "modification_date_time": now,
+                                  "priority": 0, "market_context": "oadr://unknown.context",
+                                  "created_date_time": now, "event_status": "far", "test_event": False},
+                              "active_period": {"dtstart": now, "duration": timedelta(hours=intervals)},
+                              "event_signals": [{
+                                  "signal_name": "simple", "signal_type": "level", "signal_id": "signal",
+                                  "intervals": [{"dtstart": now + timedelta(hours=i), "duration": timedelta(hours=1),
+                                                 "uid": i, "signal_payload": 1.0} for i in range(intervals)]}],
+                              "targets": [{"ven_id": "ven_id_123"}],
+                              "response_required": "always"}]).encode("utf-8")
+
+
+def per_message(fn, messages) -> float:
+    """Return the best time per message of five runs of fn over the messages, which are made afresh for every run."""
+    best = float("inf")
+    for _ in range(5):
+        batch = messages()
+        iterator = iter(batch)
+        best = min(best, timeit.timeit(lambda: fn(next(iterator)), number=len(batch)) / len(batch))
+    return best
+
+
+def main():
+    cert, key = credentials()
+    fingerprint = utils.certificate_fingerprint(cert)
+    parsed_key = load_private_key(key, "secret")
+    unsigned = [distribute_event()] * MESSAGES
+
+    def signed():
+        # Signed just before they are handled, so that none of them is older than the replay protection allows.
+        return [distribute_event(cert, parsed_key) for _ in range(MESSAGES)]
+
+    def without_signature(content):
+        validate_xml_schema(content)
+        parse_message(content)
+
+    def openleadr(content):
+        messaging.NONCE_CACHE.clear()
+        validate_xml_signature(validate_xml_schema(content), cert_fingerprint=fingerprint)
+        parse_message(content)
+
+    certificate_verifier = SignatureVerifier(fingerprint)
+
+    def verifier(content):
+        messaging.NONCE_CACHE.clear()
+        certificate_verifier.verify(validate_xml_schema(content))
+        parse_message(content)
+
+    results = [
+        ("signatures disabled", per_message(without_signature, lambda: unsigned)),
+        ("openleadr verification", per_message(openleadr, signed)),
+        ("verifier", per_message(verifier, signed)),
+        ("signing, key parsed per message",
+         per_message(lambda _: distribute_event(cert, key, "secret"), lambda: [None] * 20)),
+        ("signing, key parsed once", per_message(lambda _: distribute_event(cert, parsed_key), lambda: [None] * 20)),
+    ]
+    print(f"{'':32} {'ms per message':>15}")
+    for name, seconds in results:
+        print(f"{name:32} {seconds * 1e3:>15.3f}")
+    print(f"certificate cache: {certificate_verifier.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+=========================
+Startup-latency benchmark
+=========================
+
+Measures how long it takes a VolttronOpenADRClient to move through its readiness states (configured -> registering ->
+registered -> polling) against the toy VTN in ``utils/vtn.py``. The agent previously waited a fixed 3 seconds before
+the client even started registering; that delay is reported alongside the measured latencies for comparison.
+
+Usage::
+
+    python utils/bench_startup.py [--runs 5] [--port 8080]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from openadr_ven.constants import VTN_URL
+from openadr_ven.volttron_openadr_client import VenState, VolttronOpenADRClient
+
+UTILS = Path(__file__).resolve().parent
+PREVIOUS_FIXED_DELAY = 3.0
+
+
+def wait_for_port(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.05)
+    raise TimeoutError(f"The toy VTN did not start listening on port {port}")
+
+
+async def measure_startup(config: dict) -> dict:
+    """Start a client and return the seconds elapsed until each readiness state was reached."""
+    start = time.perf_counter()
+    reached = {}
+    polling = asyncio.Event()
+
+    def on_state(state):
+        reached[state] = time.perf_counter() - start
+        if state in (VenState.POLLING, VenState.FAILED):
+            polling.set()
+
+    client = VolttronOpenADRClient.build_client(config)
+    client.set_state_listener(on_state)
+    client.add_handler("on_event", lambda event: "optIn")
+    task = asyncio.create_task(client.run())
+    await asyncio.wait_for(polling.wait(), timeout=30)
+    await task
+    await client.stop()
+    return reached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    config = json.loads((UTILS / "config_toy_ven.json").read_text())
+    config[VTN_URL] = f"http://127.0.0.1:{args.port}/OpenADR2/Simple/2.0b"
+    config["show_fingerprint"] = False
+
+    vtn = subprocess.Popen([sys.executable, str(UTILS / "vtn.py")],
+                           env={**os.environ, "VTN_PORT": str(args.port)},
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.port)
+        results = [asyncio.run(measure_startup(config)) for _ in range(args.runs)]
+    finally:
+        vtn.terminate()
+        vtn.wait()
+
+    print(f"previous fixed startup delay: {PREVIOUS_FIXED_DELAY * 1e3:.1f} ms (before registering)")
+    for state in (VenState.REGISTERING, VenState.REGISTERED, VenState.POLLING):
+        samples = sorted(r[state] for r in results if state in r)
+        if samples:
+            print(f"{state:>12}: median {samples[len(samples) // 2] * 1e3:8.1f} ms, "
+                  f"max {samples[-1] * 1e3:8.1f} ms over {len(samples)} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+=============
+VTN simulator
+=============
+
+A parametrized VTN for load tests of the VolttronOpenADRVEN agent, built on openleadr's ``OpenADRServer``. Unlike the
+toy VTN in ``utils/vtn.py``, it registers any number of VENs named ``ven0``, ``ven1``, ... (with the ven_ids
+``ven_id_0``, ``ven_id_1``, ...), gives each of them a number of events with a configurable number of intervals, and
+keeps changing them: every tick, a share of the events is modified and a share is cancelled and replaced by a new
+event. Every report that a VEN offers is requested and counted.
+
+The events are generated by ``EventScenario``, which the benchmark suite in ``benchmarks/`` also uses to feed the agent
+directly. The events have the shape in which openleadr's client hands them to the agent's handlers.
+
+Usage::
+
+    python utils/vtn_simulator.py [--port 8080] [--vens 10] [--events 5] [--intervals 24] [--churn 0.2]
+                                  [--cancel 0.05] [--tick 10]
+"""
+
+import argparse
+import asyncio
+import copy
+import random
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from openleadr import OpenADRServer, utils
+
+
+def ven_name(index: int) -> str:
+    return f"ven{index}"
+
+
+def ven_id(name: str) -> str:
+    return f"ven_id_{name[len('ven'):]}"
+
+
+class EventScenario:
+    """Generates the events of a number of VENs and changes them over time.
+
+    :param vens: The number of VENs
+    :param events_per_ven: The number of events of every VEN at any time
+    :param intervals: The number of intervals per event
+    :param interval_duration: The duration of every interval
+    :param churn: The share of the events that is modified per tick
+    :param cancel: The share of the events that is cancelled, and replaced by a new event, per tick
+    :param seed: The seed of the random choices, so that runs are repeatable
+    """
+
+    def __init__(self,
+                 vens: int = 1,
+                 events_per_ven: int = 1,
+                 intervals: int = 1,
+                 interval_duration: timedelta = timedelta(minutes=15),
+                 churn: float = 0.0,
+                 cancel: float = 0.0,
+                 seed: int = 0) -> None:
+        self.ven_names = [ven_name(i) for i in range(vens)]
+        self.events_per_ven = events_per_ven
+        self.intervals = intervals
+        self.interval_duration = interval_duration
+        self.churn = churn
+        self.cancel = cancel
+        self._random = random.Random(seed)
+        # the current version of every event, keyed by ven_name and event_id
+        self.events: Dict[str, Dict[str, Dict]] = {name: {} for name in self.ven_names}
+
+    def populate(self) -> List[Tuple[str, Dict]]:
+        """Create the initial events of every VEN.
+
+        :return: The (ven_name, event) pairs of the new events
+        """
+        created = []
+        for name in self.ven_names:
+            while len(self.events[name]) < self.events_per_ven:
+                created.append((name, self._new_event(name)))
+        return created
+
+    def tick(self) -> List[Tuple[str, Dict]]:
+        """Modify and cancel a share of the events, and create new events in place of the cancelled ones.
+
+        :return: The (ven_name, event) pairs of the modified, cancelled and new events; every event is a new copy
+        """
+        changed = []
+        for name in self.ven_names:
+            for event_id in list(self.events[name]):
+                draw = self._random.random()
+                if draw < self.cancel:
+                    event = self._update(name, event_id)
+                    event["event_descriptor"]["event_status"] = "cancelled"
+                    del self.events[name][event_id]
+                    changed.append((name, event))
+                elif draw < self.cancel + self.churn:
+                    event = self._update(name, event_id)
+                    for interval in event["event_signals"][0]["intervals"]:
+                        interval["signal_payload"] = float(self._random.randint(0, 3))
+                    changed.append((name, event))
+        changed.extend(self.populate())
+        return changed
+
+    def _update(self, name: str, event_id: str) -> Dict:
+        event = self.events[name][event_id] = copy.deepcopy(self.events[name][event_id])
+        event["event_descriptor"]["modification_number"] += 1
+        event["event_descriptor"]["modification_date_time"] = datetime.now(timezone.utc)
+        return event
+
+    def _new_event(self, name: str) -> Dict:
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        dtstart = now + timedelta(minutes=self._random.randint(1, 60))
+        event_id = str(uuid.UUID(int=self._random.getrandbits(128)))
+        event = {
+            "event_descriptor": {
+                "event_id": event_id,
+                "modification_number": 0,
+                "modification_date_time": now,
+                "priority": 0,
+                "market_context": "oadr://unknown.context",
+                "created_date_time": now,
+                "event_status": "far",
+                "test_event": False,
+            },
+            "active_period": {
+                "dtstart": dtstart,
+                "duration": self.intervals * self.interval_duration,
+            },
+            "event_signals": [{
+                "signal_name": "simple",
+                "signal_type": "level",
+                "signal_id": f"{event_id}-simple",
+                "intervals": [{
+                    "dtstart": dtstart + i * self.interval_duration,
+                    "duration": self.interval_duration,
+                    "uid": i,
+                    "signal_payload": float(self._random.randint(0, 3)),
+                } for i in range(self.intervals)],
+            }],
+            "targets": [{"ven_id": ven_id(name)}],
+            "targets_by_type": {"ven_id": [ven_id(name)]},
+            "response_required": "always",
+        }
+        self.events[name][event_id] = event
+        return event
+
+
+class VTNSimulator:
+    """Serves the events of an EventScenario to the VENs that poll it.
+
+    :param scenario: The events to serve
+    :param port: The HTTP port of the VTN
+    :param tick: Seconds between ticks of the scenario; no ticks if None
+    """
+
+    def __init__(self, scenario: EventScenario, port: int = 8080, tick: Optional[float] = None) -> None:
+        self.scenario = scenario
+        self.tick_interval = tick
+        self.opt_responses = Counter()
+        self.reports = Counter()
+        self.server = OpenADRServer(vtn_id="simulatorvtn", http_port=port, show_fingerprint=False)
+        self.server.add_handler("on_create_party_registration", self._on_create_party_registration)
+        self.server.add_handler("on_register_report", self._on_register_report)
+        self._tick_task = None
+
+    async def run(self) -> None:
+        self._serve(self.scenario.populate())
+        await self.server.run()
+        if self.tick_interval:
+            self._tick_task = asyncio.ensure_future(self._tick_forever())
+
+    async def stop(self) -> None:
+        if self._tick_task is not None:
+            self._tick_task.cancel()
+        await self.server.stop()
+
+    def tick(self) -> None:
+        # cancellations were served on the previous tick; stop sending them
+        for events in self.server.events.values():
+            events[:] = [e for e in events if utils.getmember(e, "event_descriptor.event_status") != "cancelled"]
+        self._serve(self.scenario.tick())
+
+    async def _tick_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.tick()
+
+    def _serve(self, events: List[Tuple[str, Dict]]) -> None:
+        for name, event in events:
+            target = ven_id(name)
+            event_id = event["event_descriptor"]["event_id"]
+            if event["event_descriptor"]["modification_number"]:
+                utils.pop_by(self.server.events.get(target, []), "event_descriptor.event_id", event_id)
+            self.server.add_raw_event(target, copy.deepcopy(event), callback=self._on_opt_response)
+
+    async def _on_create_party_registration(self, registration_info):
+        name = registration_info["ven_name"]
+        if name not in self.scenario.events:
+            return False
+        return ven_id(name), f"reg_id_{name}"
+
+    async def _on_register_report(self, ven_id, resource_id, measurement, unit, scale, min_sampling_interval,
+                                  max_sampling_interval):
+        self.reports[ven_id] += 1
+        return partial(self._on_update_report, ven_id=ven_id), min_sampling_interval
+
+    async def _on_update_report(self, data, ven_id):
+        pass
+
+    async def _on_opt_response(self, ven_id, event_id, opt_type):
+        self.opt_responses[opt_type] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--vens", type=int, default=10)
+    parser.add_argument("--events", type=int, default=5, help="events per VEN")
+    parser.add_argument("--intervals", type=int, default=24, help="intervals per event")
+    parser.add_argument("--churn", type=float, default=0.2, help="share of the events modified per tick")
+    parser.add_argument("--cancel", type=float, default=0.05, help="share of the events cancelled per tick")
+    parser.add_argument("--tick", type=float, default=10, help="seconds between ticks")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    scenario = EventScenario(args.vens, args.events, args.intervals, churn=args.churn, cancel=args.cancel,
+                             seed=args.seed)
+    simulator = VTNSimulator(scenario, port=args.port, tick=args.tick)
+    loop = asyncio.new_event_loop()
+    loop.create_task(simulator.run())
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        loop.run_until_complete(simulator.stop())
+        print(f"reports registered: {sum(simulator.reports.values())}, "
+              f"opt responses: {dict(simulator.opt_responses)}")
+
+
+if __name__ == "__main__":
+    main()